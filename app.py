@@ -4,7 +4,6 @@ Multi-Agent Coaching System — Gradio ChatInterface
 
 import os
 import time
-import asyncio
 
 import gradio as gr
 from gradio import ChatMessage
@@ -13,21 +12,59 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
-from agents import Runner
-from custom_agents.dialect_coach import dialect_agent
-from custom_agents.public_speaking_coach import public_speaking_agent
-from custom_agents.voice_coach import voice_coach_agent
-from custom_agents.triage_agent import triage_agent
+from openai.types.responses import ResponseTextDeltaEvent
+from workflows.concurrency import ServerBusy, configure_model_client, model_calls
+from workflows.memory import ConversationMemory, conversation_memory, reply_items
+from workflows.model_router import model_router
+from workflows.response_cache import response_cache, run_streamed_cached
+from workflows.speculative import speculative_router
+from workflows.telemetry import telemetry
 
-AGENT_MAP = {
-    "dialect_coach": dialect_agent,
-    "public_speaking_coach": public_speaking_agent,
-    "voice_coach": voice_coach_agent,
-}
+# Upper bound on UI refreshes per second while a reply is streaming
+STREAM_REFRESH_HZ = float(os.getenv("STREAM_REFRESH_HZ", "15"))
 
 
-async def coach_chat(message: str, history: list[dict]):
+def session_id(request: gr.Request | None) -> str:
+    return getattr(request, "session_hash", None) or "default"
+
+
+def session_memory(request: gr.Request | None, history: list[dict]) -> ConversationMemory:
+    """The session's conversation memory, rebuilt from the visible chat if they differ.
+
+    They diverge when the chat is cleared or a saved conversation is reopened.
+    """
+    memory = conversation_memory.session(session_id(request))
+    turns: list[list[str]] = []
+    for msg in history:
+        if msg["role"] == "user":
+            turns.append([str(msg["content"]), ""])
+        elif turns and not (msg.get("metadata") or {}).get("title"):
+            # Skip the triage "thought" bubbles, keep the coach's reply
+            turns[-1][1] += str(msg["content"])
+    if memory.turn_count != len(turns):
+        memory.reset()
+        for user, reply in turns:
+            memory.add_turn(user, [{"role": "assistant", "content": reply}])
+    return memory
+
+
+async def coach_chat(message: str, history: list[dict], request: gr.Request):
+    """Answer the message, or say the coaches are busy when too many turns are in progress."""
+    try:
+        with model_calls.admit(session_id(request)):
+            async for update in coach_turn(message, history, request):
+                yield update
+    except ServerBusy as exc:
+        yield ChatMessage(content=str(exc))
+
+
+async def coach_turn(message: str, history: list[dict], request: gr.Request | None):
     """Route the message through triage → specialist and stream thoughts."""
+    memory = session_memory(request, history)
+    # Later turns are answered in context; only standalone questions use the cache
+    in_context = memory.has_context
+    # Only a real follow-up (re-asking, or asking about the last reply) starts a tier up
+    follow_up = memory.is_follow_up(message)
 
     # 1️⃣ Triage (intermediate thought)
     triage_chat = ChatMessage(
@@ -35,11 +72,32 @@ async def coach_chat(message: str, history: list[dict]):
         metadata={"title": "🔍 Triage & Tool Selection", "id": 0, "status": "pending"},
     )
     start = time.time()
+    trace = telemetry.start_turn("gradio")
     yield triage_chat
 
-    triage_result = await Runner.run(triage_agent, message)
-    selected_agent_name = triage_result.final_output.selected_agent
-    reasoning = triage_result.final_output.reasoning
+    # The likely specialist starts streaming speculatively while triage is running
+    with trace.span("triage"):
+        turn = await speculative_router.run(
+            message,
+            lambda key, tier: run_streamed_cached(
+                key,
+                model_router.agent(key, tier),
+                message,
+                memory.input_for(key, message) if in_context else None,
+            ),
+            cancel=lambda run: run.cancel(),
+            follow_up=follow_up,
+        )
+    triage = turn.triage
+    selected_agent_name = triage.selected_agent
+    reasoning = triage.reasoning
+    model = model_router.model(selected_agent_name, turn.tier)
+    trace.set(
+        agent=selected_agent_name,
+        confidence=triage.confidence,
+        speculated=turn.speculated,
+        model=model,
+    )
 
     triage_chat.content = (
         f"**Reasoning**\n{reasoning}\n\n"
@@ -49,12 +107,40 @@ async def coach_chat(message: str, history: list[dict]):
     triage_chat.metadata["duration"] = round(time.time() - start, 2)
     yield triage_chat
 
-    # 2️⃣ Specialist response
-    coach = AGENT_MAP[selected_agent_name]
-    coach_result = await Runner.run(coach, message)
-    reply = coach_result.final_output
+    # 2️⃣ Specialist response, streamed token by token
+    reply = ChatMessage(content="")
+    last_yield = 0.0
+    specialist_start = time.perf_counter()
+    try:
+        with trace.span("specialist", agent=selected_agent_name):
+            async for event in turn.handle.stream_events():
+                if event.type != "raw_response_event" or not isinstance(
+                    event.data, ResponseTextDeltaEvent
+                ):
+                    continue
+                if not reply.content:
+                    trace.mark("first_token")
+                    ttft = round(time.time() - start, 2)
+                    triage_chat.metadata["log"] = f"first token after {ttft}s"
+                reply.content += event.data.delta
+
+                # Coalesce deltas so Gradio re-renders at most STREAM_REFRESH_HZ times/s
+                now = time.monotonic()
+                if now - last_yield >= 1 / STREAM_REFRESH_HZ:
+                    last_yield = now
+                    yield [triage_chat, reply]
 
-    yield reply
+        if reply.content:
+            trace.add_usage(selected_agent_name, turn.handle)
+            model_router.observe(model, time.perf_counter() - specialist_start)
+            if not in_context:
+                response_cache.put(selected_agent_name, message, reply.content, model)
+        else:
+            reply.content = str(turn.handle.final_output)
+        memory.add_turn(message, reply_items(turn.handle, reply.content))
+        yield [triage_chat, reply]
+    finally:
+        trace.end()
 
 
 demo = gr.ChatInterface(
@@ -77,5 +163,8 @@ demo = gr.ChatInterface(
 )
 
 if __name__ == "__main__":
-    demo.queue()
+    telemetry.start_exporters()
+    configure_model_client()
+    # Admission control in coach_chat bounds the work, so Gradio need not serialise turns
+    demo.queue(default_concurrency_limit=None)
     demo.launch(server_name="0.0.0.0", show_api=False)
@@ -0,0 +1,317 @@
+"""Streaming acoustic analysis of the user's speech.
+
+Each capture chunk is decimated to 8 kHz and appended to a preallocated sample
+buffer; every complete 10 ms hop is analysed as soon as it arrives, all frames
+of a chunk at once:
+
+* pitch with YIN (difference function via FFT, cumulative-mean normalisation,
+  parabolic refinement),
+* RMS level and peak amplitude.
+
+Per-frame tracks go into preallocated arrays. `StreamingAnalyzer.finish` turns
+them into an `UtteranceSummary`: pitch range and variability, loudness and
+dynamic range, speaking rate (syllable nuclei counted on the energy envelope),
+pause lengths, and jitter / shimmer. Jitter and shimmer are frame-level
+approximations of the cycle-to-cycle measures, so treat them as trends rather
+than clinical values.
+"""
+
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+ANALYSIS_RATE = 8_000
+HOP_S = 0.01
+WINDOW_S = 0.03
+MIN_PITCH_HZ = 60.0
+MAX_PITCH_HZ = 500.0
+YIN_THRESHOLD = 0.15
+SILENCE_DB = -50.0  # dBFS; quieter frames are never voiced
+MIN_PAUSE_S = 0.25
+SYLLABLE_REACH = 12  # frames searched on each side of a syllable nucleus
+SYLLABLES_PER_WORD = 1.4
+
+
+@dataclass
+class AnalysisStats:
+    chunks: int = 0
+    audio_s: float = 0.0
+    cpu_s: float = 0.0
+
+    @property
+    def real_time_factor(self) -> float:
+        return self.cpu_s / self.audio_s if self.audio_s else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.chunks} chunks, {self.cpu_s * 1000:.0f} ms CPU for {self.audio_s:.1f}s "
+            f"of audio (RTF {self.real_time_factor:.3f})"
+        )
+
+
+@dataclass
+class UtteranceSummary:
+    duration_s: float
+    voiced_s: float
+    mean_pitch_hz: float
+    pitch_range_st: float  # 5th–95th percentile, semitones
+    pitch_std_st: float
+    mean_level_db: float  # dBFS over voiced frames
+    dynamic_range_db: float  # 10th–95th percentile level over speech
+    syllables_per_s: float
+    words_per_min: float  # estimated from the syllable rate
+    pauses: int
+    mean_pause_s: float
+    max_pause_s: float
+    jitter_pct: float
+    shimmer_pct: float
+    observations: list[str] = field(default_factory=list)
+
+    def as_dict(self) -> dict:
+        return {k: round(v, 2) if isinstance(v, float) else v for k, v in asdict(self).items()}
+
+    def __str__(self) -> str:
+        return (
+            f"{self.duration_s:.1f}s, pitch {self.mean_pitch_hz:.0f} Hz "
+            f"(range {self.pitch_range_st:.1f} st), level {self.mean_level_db:.0f} dBFS "
+            f"(range {self.dynamic_range_db:.0f} dB), {self.words_per_min:.0f} wpm, "
+            f"{self.pauses} pauses, jitter {self.jitter_pct:.1f}%, shimmer {self.shimmer_pct:.1f}%"
+        )
+
+
+def describe(summary: UtteranceSummary) -> list[str]:
+    """Rule-of-thumb reading of a summary, phrased for the coaches."""
+    notes = []
+    if summary.voiced_s < 0.5:
+        return ["too little voiced speech to judge"]
+    if summary.pitch_range_st < 4:
+        notes.append("narrow pitch range: delivery sounds monotone")
+    elif summary.pitch_range_st > 14:
+        notes.append("very wide pitch swings")
+    if summary.syllables_per_s > 5.5:
+        notes.append("speaking fast")
+    elif 0 < summary.syllables_per_s < 3:
+        notes.append("speaking slowly")
+    if summary.max_pause_s > 2.0:
+        notes.append("long hesitation pauses")
+    elif summary.duration_s > 8 and summary.pauses == 0:
+        notes.append("no pauses: phrases run together")
+    if summary.mean_level_db < -35:
+        notes.append("quiet voice: projection could improve")
+    if summary.dynamic_range_db < 6:
+        notes.append("flat loudness: little emphasis")
+    if summary.jitter_pct > 2.0 or summary.shimmer_pct > 12.0:
+        notes.append("unsteady voicing (possible strain, breathiness or fatigue)")
+    return notes or ["no notable issues"]
+
+
+class StreamingAnalyzer:
+    """Incremental pitch / level tracker producing per-utterance summaries."""
+
+    def __init__(self, sample_rate: int, max_utterance_s: float = 120.0, max_chunk_s: float = 1.0) -> None:
+        self.sample_rate = sample_rate
+        self.decimate = max(1, sample_rate // ANALYSIS_RATE)
+        self.rate = sample_rate / self.decimate
+        self.hop = int(self.rate * HOP_S)
+        self.window = int(self.rate * WINDOW_S)
+        self.min_lag = int(self.rate / MAX_PITCH_HZ)
+        self.max_lag = int(self.rate / MIN_PITCH_HZ)
+        self.frame_len = self.window + self.max_lag
+        self.n_fft = 1 << (self.frame_len + self.window - 1).bit_length()
+        self.stats = AnalysisStats()
+
+        # Sample buffer: leftover context plus one (decimated) chunk
+        self._buf = np.zeros(self.frame_len + int(self.rate * max_chunk_s) + self.hop, dtype=np.float32)
+        self._filled = 0
+        # Per-frame tracks for the current utterance
+        capacity = int(max_utterance_s / HOP_S)
+        self._f0 = np.zeros(capacity, dtype=np.float32)
+        self._level_db = np.zeros(capacity, dtype=np.float32)
+        self._peak = np.zeros(capacity, dtype=np.float32)
+        self._frames = 0
+        self._lags = np.arange(self.max_lag + 1, dtype=np.float32)
+
+    def reset(self) -> None:
+        self._filled = 0
+        self._frames = 0
+
+    # -------------------- per chunk --------------------
+
+    def process(self, chunk: np.ndarray) -> None:
+        t0 = time.perf_counter()
+        samples = chunk.reshape(-1)
+        usable = len(samples) - len(samples) % self.decimate
+        decimated = samples[:usable].reshape(-1, self.decimate).mean(axis=1) / 32768.0
+        n = min(len(decimated), len(self._buf) - self._filled)
+        self._buf[self._filled:self._filled + n] = decimated[:n]
+        self._filled += n
+
+        if self._filled >= self.frame_len:
+            frames = sliding_window_view(self._buf[:self._filled], self.frame_len)[:: self.hop]
+            self._analyse(frames)
+            consumed = len(frames) * self.hop
+            remaining = self._filled - consumed
+            self._buf[:remaining] = self._buf[consumed:self._filled]
+            self._filled = remaining
+
+        self.stats.chunks += 1
+        self.stats.audio_s += len(samples) / self.sample_rate
+        self.stats.cpu_s += time.perf_counter() - t0
+
+    def _analyse(self, frames: np.ndarray) -> None:
+        room = len(self._f0) - self._frames
+        frames = frames[:room]
+        if not len(frames):
+            return
+        head = frames[:, : self.window]
+        energy = np.einsum("ij,ij->i", head, head)
+        level_db = 10.0 * np.log10(energy / self.window + 1e-10)
+
+        # YIN difference function d(τ) = E(0) + E(τ) - 2 r(τ), with r via FFT
+        spec = np.conj(np.fft.rfft(head, self.n_fft)) * np.fft.rfft(frames, self.n_fft)
+        corr = np.fft.irfft(spec, self.n_fft)[:, : self.max_lag + 1]
+        squares = np.zeros((len(frames), self.frame_len + 1), dtype=np.float32)
+        np.cumsum(frames * frames, axis=1, out=squares[:, 1:])
+        shifted = squares[:, self.window:self.window + self.max_lag + 1] - squares[:, : self.max_lag + 1]
+        diff = np.maximum(energy[:, None] + shifted - 2.0 * corr, 0.0)
+
+        # Cumulative-mean normalised difference
+        cmndf = np.ones_like(diff)
+        running = np.cumsum(diff[:, 1:], axis=1)
+        cmndf[:, 1:] = diff[:, 1:] * self._lags[1:] / np.maximum(running, 1e-12)
+        cmndf[:, : self.min_lag] = 1.0
+
+        # First dip under the threshold, then down to its local minimum
+        below = cmndf < YIN_THRESHOLD
+        voiced = below.any(axis=1) & (level_db > SILENCE_DB)
+        first = np.argmax(below, axis=1)
+        rising = np.zeros_like(below)
+        rising[:, :-1] = cmndf[:, 1:] > cmndf[:, :-1]
+        rising &= self._lags >= first[:, None]
+        rising[:, -1] = True
+        tau = np.argmax(rising, axis=1)
+
+        # Parabolic interpolation around the chosen lag
+        rows = np.arange(len(frames))
+        inner = np.clip(tau, 1, self.max_lag - 1)
+        a, b, c = cmndf[rows, inner - 1], cmndf[rows, inner], cmndf[rows, inner + 1]
+        denom = a - 2.0 * b + c
+        offset = np.where(np.abs(denom) > 1e-9, 0.5 * (a - c) / np.where(denom == 0, 1.0, denom), 0.0)
+        period = inner + np.clip(offset, -1.0, 1.0)
+
+        end = self._frames + len(frames)
+        self._f0[self._frames:end] = np.where(voiced, self.rate / np.maximum(period, 1.0), 0.0)
+        self._level_db[self._frames:end] = level_db
+        self._peak[self._frames:end] = np.abs(head).max(axis=1)
+        self._frames = end
+
+    # -------------------- per utterance --------------------
+
+    def finish(self) -> UtteranceSummary | None:
+        """Summarise the audio since the last reset and start a new utterance."""
+        n = self._frames
+        f0, level, peak = self._f0[:n], self._level_db[:n], self._peak[:n]
+        self.reset()
+        if n < 3:
+            return None
+
+        voiced = f0 > 0
+        active = level > max(SILENCE_DB, float(np.percentile(level, 90)) - 30.0)
+        if not active.any():
+            return None
+        first, last = np.flatnonzero(active)[[0, -1]]
+        span = active[first:last + 1]
+
+        # Pauses: inactive runs inside the utterance
+        edges = np.diff(np.concatenate(([0], (~span).astype(np.int8), [0])))
+        runs = (np.flatnonzero(edges == -1) - np.flatnonzero(edges == 1)) * HOP_S
+        pauses = runs[runs >= MIN_PAUSE_S]
+        speaking_s = len(span) * HOP_S - float(pauses.sum())
+
+        # Syllable nuclei: voiced local maxima of the smoothed level that stand
+        # ≥ 2 dB above the dips on both sides (within 120 ms)
+        syllables = 0
+        if n >= 2 * SYLLABLE_REACH + 1:
+            env = np.convolve(level, np.ones(3) / 3.0, mode="same")
+            reach = SYLLABLE_REACH
+            left = sliding_window_view(np.pad(env, (reach, 0), mode="edge"), reach + 1)
+            right = sliding_window_view(np.pad(env, (0, reach), mode="edge"), reach + 1)
+            near = sliding_window_view(np.pad(env, reach // 2, mode="edge"), reach + 1)
+            dip = np.maximum(left.min(axis=1), right.min(axis=1))
+            peaks = (env >= near.max(axis=1)) & (env - dip >= 2.0) & voiced & active
+            syllables = int(np.count_nonzero(peaks))
+        rate = syllables / speaking_s if speaking_s > 0 else 0.0
+
+        pitch = f0[voiced]
+        if len(pitch) >= 2:
+            st = 12.0 * np.log2(pitch / np.median(pitch))
+            p5, p95 = np.percentile(st, [5, 95])
+            pitch_range, pitch_std, mean_pitch = float(p95 - p5), float(st.std()), float(pitch.mean())
+        else:
+            pitch_range = pitch_std = mean_pitch = 0.0
+
+        # Jitter / shimmer over consecutive voiced frames
+        pairs = voiced[1:] & voiced[:-1]
+        jitter = shimmer = 0.0
+        if pairs.any():
+            periods = 1.0 / np.where(voiced, f0, 1.0)
+            jitter = float(np.abs(np.diff(periods))[pairs].mean() / periods[voiced].mean() * 100.0)
+            shimmer = float(np.abs(np.diff(peak))[pairs].mean() / peak[voiced].mean() * 100.0)
+
+        speech_level = level[active]
+        p10, p95 = np.percentile(speech_level, [10, 95])
+        summary = UtteranceSummary(
+            # First to last active frame: pre-roll and the silence that ended the turn are not speech
+            duration_s=len(span) * HOP_S,
+            voiced_s=float(np.count_nonzero(voiced)) * HOP_S,
+            mean_pitch_hz=mean_pitch,
+            pitch_range_st=pitch_range,
+            pitch_std_st=pitch_std,
+            mean_level_db=float(level[voiced].mean()) if voiced.any() else float(speech_level.mean()),
+            dynamic_range_db=float(p95 - p10),
+            syllables_per_s=rate,
+            words_per_min=rate / SYLLABLES_PER_WORD * 60.0,
+            pauses=len(pauses),
+            mean_pause_s=float(pauses.mean()) if len(pauses) else 0.0,
+            max_pause_s=float(pauses.max()) if len(pauses) else 0.0,
+            jitter_pct=jitter,
+            shimmer_pct=shimmer,
+        )
+        summary.observations = describe(summary)
+        return summary
+
+
+class UtteranceLog:
+    """Most recent utterance summaries, read by the coaches' analysis tool."""
+
+    def __init__(self, maxlen: int = 20) -> None:
+        self._summaries: deque[UtteranceSummary] = deque(maxlen=maxlen)
+
+    def add(self, summary: UtteranceSummary) -> None:
+        self._summaries.append(summary)
+
+    def __len__(self) -> int:
+        return len(self._summaries)
+
+    def latest(self) -> UtteranceSummary | None:
+        return self._summaries[-1] if self._summaries else None
+
+    def report(self, last: int = 3) -> dict:
+        if not self._summaries:
+            return {
+                "available": False,
+                "reason": "No speech has been recorded in this session (text-only chat).",
+            }
+        recent = list(self._summaries)[-last:]
+        return {
+            "available": True,
+            "utterances_analysed": len(self._summaries),
+            "latest": recent[-1].as_dict(),
+            "previous": [s.as_dict() for s in recent[:-1]],
+        }
+
+
+utterance_log = UtteranceLog()
@@ -0,0 +1,245 @@
+"""Callback-driven microphone capture.
+
+PortAudio invokes `MicCapture._callback` on its own thread for every block.
+The callback copies the block into a preallocated single-producer /
+single-consumer ring buffer and wakes the event loop, which drains fixed-size
+chunks into an async sink such as `StreamedAudioInput.add_audio`. Nothing
+polls, so the loop sleeps between chunks.
+
+`WavReplayStream` mimics `sd.InputStream` by replaying a WAV file, so capture
+can run on machines without audio hardware.
+"""
+
+import asyncio
+import threading
+import time
+import wave
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+import numpy as np
+
+
+@dataclass
+class CaptureStats:
+    chunks: int = 0
+    overruns: int = 0
+    underruns: int = 0
+    dropped_frames: int = 0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.chunks} chunks, {self.overruns} overruns "
+            f"({self.dropped_frames} frames dropped), {self.underruns} underruns"
+        )
+
+
+class RingBuffer:
+    """Lock-free SPSC ring of audio frames.
+
+    Only the producer advances `_write` and only the consumer advances
+    `_read`; both are monotonically increasing, so reading the other side's
+    index is always safe under the GIL. A block that does not fit is dropped
+    rather than overwriting unread frames.
+    """
+
+    def __init__(self, capacity: int, channels: int = 1, dtype: Any = np.int16) -> None:
+        self.capacity = capacity
+        self._buf = np.zeros((capacity, channels), dtype=dtype)
+        self._write = 0
+        self._read = 0
+
+    @property
+    def available(self) -> int:
+        return self._write - self._read
+
+    def write(self, frames: np.ndarray) -> bool:
+        n = len(frames)
+        if n > self.capacity - self.available:
+            return False
+        start = self._write % self.capacity
+        first = min(n, self.capacity - start)
+        self._buf[start:start + first] = frames[:first]
+        self._buf[:n - first] = frames[first:]
+        self._write += n
+        return True
+
+    def read(self, n: int) -> np.ndarray | None:
+        """Copy out exactly `n` frames, or return None if fewer are buffered."""
+        if self.available < n:
+            return None
+        start = self._read % self.capacity
+        first = min(n, self.capacity - start)
+        out = np.concatenate((self._buf[start:start + first], self._buf[:n - first]))
+        self._read += n
+        return out
+
+    def read_into(self, out: np.ndarray) -> int:
+        """Copy up to `len(out)` frames into `out` without allocating."""
+        n = min(len(out), self.available)
+        start = self._read % self.capacity
+        first = min(n, self.capacity - start)
+        out[:first] = self._buf[start:start + first]
+        out[first:n] = self._buf[:n - first]
+        self._read += n
+        return n
+
+    def clear(self) -> None:
+        """Consumer-side discard of everything buffered."""
+        self._read = self._write
+
+
+class MicCapture:
+    """Feed fixed-size microphone chunks to an async sink."""
+
+    def __init__(
+        self,
+        sink: Callable[[np.ndarray], Awaitable[None]],
+        sample_rate: int,
+        chunk_length_s: float,
+        channels: int = 1,
+        dtype: Any = np.int16,
+        stream_factory: Callable[..., Any] | None = None,
+        gate: asyncio.Event | None = None,
+        buffer_s: float = 2.0,
+    ) -> None:
+        self.sink = sink
+        self.sample_rate = sample_rate
+        self.chunk_frames = int(sample_rate * chunk_length_s)
+        self.channels = channels
+        self.dtype = dtype
+        self.stream_factory = stream_factory
+        self.gate = gate
+        self.stats = CaptureStats()
+        self._ring = RingBuffer(int(sample_rate * buffer_s), channels, dtype)
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wakeup: asyncio.Event | None = None
+
+    # Runs on the PortAudio thread: no allocation beyond the ring copy, no awaits
+    def _callback(self, indata: np.ndarray, frames: int, time_info: Any, status: Any) -> None:
+        if getattr(status, "input_overflow", False):
+            self.stats.overruns += 1
+        if getattr(status, "input_underflow", False):
+            self.stats.underruns += 1
+        if self.gate is not None and not self.gate.is_set():
+            return
+        if not self._ring.write(indata):
+            self.stats.overruns += 1
+            self.stats.dropped_frames += frames
+            return
+        if self._ring.available >= self.chunk_frames:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def _open_stream(self) -> Any:
+        factory = self.stream_factory
+        if factory is None:
+            import sounddevice as sd
+
+            factory = sd.InputStream
+        return factory(
+            samplerate=self.sample_rate,
+            channels=self.channels,
+            dtype=self.dtype,
+            blocksize=self.chunk_frames,
+            callback=self._callback,
+        )
+
+    async def run(self) -> None:
+        """Capture until cancelled (or until a replay stream runs out)."""
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        stream = self._open_stream()
+        stream.start()
+        try:
+            while stream.active or self._ring.available >= self.chunk_frames:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=0.2)
+                except asyncio.TimeoutError:
+                    continue
+                self._wakeup.clear()
+                while (chunk := self._ring.read(self.chunk_frames)) is not None:
+                    self.stats.chunks += 1
+                    await self.sink(chunk)
+        finally:
+            stream.stop()
+            stream.close()
+
+    def discard(self) -> None:
+        """Drop any partial chunk left over from the previous recording."""
+        self._ring.clear()
+
+
+class _NoStatus:
+    input_overflow = False
+    input_underflow = False
+
+
+class WavReplayStream:
+    """Drop-in for `sd.InputStream` that plays a WAV file into the callback.
+
+    Blocks are delivered on a background thread at `speed` × real time
+    (`speed=0` replays as fast as possible). The stream becomes inactive at
+    the end of the file unless `loop=True`.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        samplerate: int,
+        channels: int,
+        dtype: Any,
+        blocksize: int,
+        callback: Callable[..., None],
+        speed: float = 1.0,
+        loop: bool = False,
+    ) -> None:
+        with wave.open(path, "rb") as wav:
+            if wav.getframerate() != samplerate or wav.getsampwidth() != 2:
+                raise ValueError(
+                    f"{path}: expected 16-bit audio at {samplerate} Hz, got "
+                    f"{8 * wav.getsampwidth()}-bit at {wav.getframerate()} Hz"
+                )
+            data = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+            data = data.reshape(-1, wav.getnchannels())
+        if data.shape[1] != channels:
+            data = np.repeat(data.mean(axis=1, keepdims=True).astype(np.int16), channels, axis=1)
+        self.frames = data.astype(dtype, copy=False)
+        self.samplerate = samplerate
+        self.blocksize = blocksize
+        self.callback = callback
+        self.speed = speed
+        self.loop = loop
+        self.active = False
+        self._thread: threading.Thread | None = None
+
+    def _pump(self) -> None:
+        period = self.blocksize / self.samplerate / self.speed if self.speed else 0.0
+        next_at = time.monotonic()
+        pos = 0
+        while self.active:
+            block = self.frames[pos:pos + self.blocksize]
+            if len(block) < self.blocksize:
+                if not self.loop:
+                    break
+                pos = 0
+                continue
+            self.callback(block, len(block), None, _NoStatus)
+            pos += self.blocksize
+            next_at += period
+            delay = next_at - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        self.active = False
+
+    def start(self) -> None:
+        self.active = True
+        self._thread = threading.Thread(target=self._pump, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self.active = False
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def close(self) -> None:
+        self.stop()
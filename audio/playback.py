@@ -0,0 +1,196 @@
+"""Non-blocking TTS playback with a jitter buffer.
+
+`AudioPlayer.write` only copies synthesized samples into a preallocated ring
+buffer and returns immediately; a callback-driven `sd.OutputStream` drains the
+ring on the PortAudio thread. Each reply ("burst") starts playing once
+`jitter_ms` of audio is buffered, so network jitter between TTS chunks does not
+cause audible gaps.
+"""
+
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Callable
+
+import numpy as np
+
+from audio.capture import RingBuffer
+
+PLAYBACK_JITTER_MS = float(os.getenv("PLAYBACK_JITTER_MS", "120"))
+
+
+@dataclass
+class PlaybackStats:
+    bursts: int = 0
+    underruns: int = 0
+    underrun_frames: int = 0
+    overruns: int = 0
+    flushes: int = 0
+    last_latency_s: float = 0.0
+    total_latency_s: float = 0.0
+    # Flushes that cut audible playback, timed from flush() to silence at the DAC
+    cuts: int = 0
+    last_cut_s: float = 0.0
+    total_cut_s: float = 0.0
+
+    @property
+    def mean_latency_s(self) -> float:
+        return self.total_latency_s / self.bursts if self.bursts else 0.0
+
+    @property
+    def mean_cut_s(self) -> float:
+        return self.total_cut_s / self.cuts if self.cuts else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"first-sample latency {self.last_latency_s * 1000:.0f} ms "
+            f"(mean {self.mean_latency_s * 1000:.0f} ms), {self.underruns} underruns, "
+            f"{self.overruns} overruns, {self.flushes} flushes"
+        )
+
+
+def _dac_delay(time_info: Any) -> float:
+    """Time until the current buffer actually reaches the DAC, when reported."""
+    return max(
+        0.0,
+        getattr(time_info, "outputBufferDacTime", 0.0) - getattr(time_info, "currentTime", 0.0),
+    )
+
+
+class AudioPlayer:
+    """Ring-buffered, callback-driven audio output."""
+
+    def __init__(
+        self,
+        sample_rate: int,
+        channels: int = 1,
+        dtype: Any = np.int16,
+        jitter_ms: float = PLAYBACK_JITTER_MS,
+        buffer_s: float = 30.0,
+        stream_factory: Callable[..., Any] | None = None,
+    ) -> None:
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.dtype = dtype
+        self.prebuffer_frames = int(sample_rate * jitter_ms / 1000)
+        self.stream_factory = stream_factory
+        self.stats = PlaybackStats()
+        self._ring = RingBuffer(int(sample_rate * buffer_s), channels, dtype)
+        self._stream: Any = None
+
+        # Burst state, written by the loop and read by the callback (and v.v.)
+        self._in_burst = False
+        self._draining = False
+        self._playing = False
+        self._burst_started_at = 0.0
+        self._latency_pending = False
+        self._flush_requested = False
+        self._flush_at: float | None = None
+        self._burst_frames = 0
+        self._burst_played = 0
+
+    # -------------------- event-loop side --------------------
+
+    def start(self) -> None:
+        factory = self.stream_factory
+        if factory is None:
+            import sounddevice as sd
+
+            factory = sd.OutputStream
+        self._stream = factory(
+            samplerate=self.sample_rate,
+            channels=self.channels,
+            dtype=self.dtype,
+            callback=self._callback,
+        )
+        self._stream.start()
+
+    def write(self, data: np.ndarray) -> None:
+        """Queue synthesized samples; never blocks."""
+        frames = data.reshape(-1, self.channels)
+        if not self._in_burst:
+            self._in_burst = True
+            self._draining = False
+            self._burst_started_at = time.monotonic()
+            self._latency_pending = True
+            self._burst_frames = 0
+            self._burst_played = 0
+        if self._ring.write(frames):
+            self._burst_frames += len(frames)
+        else:
+            self.stats.overruns += 1
+
+    def end_burst(self) -> None:
+        """The reply is fully synthesized: play out whatever is buffered."""
+        self._in_burst = False
+        self._draining = True
+
+    def flush(self) -> bool:
+        """Silence playback immediately (applied on the next callback).
+
+        Returns whether there was queued or playing audio to cut.
+        """
+        audible = self.is_playing
+        self._flush_at = time.monotonic() if audible else None
+        self._flush_requested = True
+        self._in_burst = False
+        self._draining = False
+        self._latency_pending = False
+        self.stats.flushes += 1
+        return audible
+
+    @property
+    def is_playing(self) -> bool:
+        return self._playing or self._in_burst or self._ring.available > 0
+
+    @property
+    def burst_progress(self) -> float:
+        """Fraction of the current (or last) reply's queued audio already played."""
+        if not self._burst_frames:
+            return 1.0
+        return min(1.0, self._burst_played / self._burst_frames)
+
+    def close(self) -> None:
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
+
+    # -------------------- PortAudio thread --------------------
+
+    def _callback(self, outdata: np.ndarray, frames: int, time_info: Any, status: Any) -> None:
+        if self._flush_requested:
+            self._flush_requested = False
+            self._ring.clear()
+            self._playing = False
+            if self._flush_at is not None:
+                cut = time.monotonic() - self._flush_at + _dac_delay(time_info)
+                self._flush_at = None
+                self.stats.cuts += 1
+                self.stats.last_cut_s = cut
+                self.stats.total_cut_s += cut
+
+        if not self._playing:
+            ready = self._ring.available >= self.prebuffer_frames
+            if not (ready or (self._draining and self._ring.available)):
+                outdata.fill(0)
+                return
+            self._playing = True
+
+        n = self._ring.read_into(outdata)
+        self._burst_played += n
+        if n and self._latency_pending:
+            self._latency_pending = False
+            latency = time.monotonic() - self._burst_started_at + _dac_delay(time_info)
+            self.stats.bursts += 1
+            self.stats.last_latency_s = latency
+            self.stats.total_latency_s += latency
+        if n < frames:
+            outdata[n:] = 0
+            self._playing = False
+            if self._in_burst:
+                # Ran dry mid-reply: rebuffer to the jitter depth before resuming
+                self.stats.underruns += 1
+                self.stats.underrun_frames += frames - n
+            else:
+                self._draining = False
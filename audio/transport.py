@@ -0,0 +1,266 @@
+"""Upstream audio transport: resampling and low-latency compression.
+
+Captured speech is 24 kHz int16 PCM (48 KB/s), more than transcription needs.
+`AudioTransport` sits between capture and `StreamedAudioInput`:
+
+* the sending side resamples each chunk to `AUDIO_TRANSPORT_RATE` (16 kHz by
+  default) with a streaming polyphase FIR and encodes it with
+  `AUDIO_TRANSPORT_CODEC`: `mulaw` (8-bit G.711-style companding, one byte
+  per sample, no look-ahead) or `pcm16`;
+* the receiving side decodes the payload and resamples back to the rate the
+  pipeline's STT model expects.
+
+With the defaults a speaker costs 16 KB/s on the wire instead of 48 KB/s. The
+two resampling filters (flat to 6 kHz, about -80 dB from 8.8 kHz) delay audio
+by about 2.5 ms in total and the codec works sample by sample, so nothing else
+is added to latency. Bytes and CPU time are counted per session in
+`AudioTransport.stats` and exported on the telemetry `/metrics` endpoint.
+
+The realtime app runs both sides in one process, where encoding only costs
+CPU and hands STT lossy audio, so it is off unless `AUDIO_TRANSPORT=1` (for a
+deployment with a real network hop between capture and the STT pipeline, or
+to measure the hop).
+"""
+
+import os
+import time
+from dataclasses import dataclass
+from math import gcd
+
+import numpy as np
+
+from workflows.telemetry import telemetry
+
+# Rate and encoding of audio on the wire; off (raw PCM) unless AUDIO_TRANSPORT=1
+AUDIO_TRANSPORT = os.getenv("AUDIO_TRANSPORT", "0") == "1"
+AUDIO_TRANSPORT_RATE = int(os.getenv("AUDIO_TRANSPORT_RATE", "16000"))
+AUDIO_TRANSPORT_CODEC = os.getenv("AUDIO_TRANSPORT_CODEC", "mulaw")
+
+CODECS = ("pcm16", "mulaw")
+_MU = 255.0
+_PREFIX = "vocal_coach"
+
+
+# ---------------------------------------------------------------------------
+# Streaming polyphase resampler
+# ---------------------------------------------------------------------------
+
+
+class PolyphaseResampler:
+    """Rational-ratio resampler (`out_rate / in_rate = up / down`) over chunks.
+
+    A Kaiser-windowed sinc low-pass is split into `up` phases of
+    `taps_per_phase` coefficients. Each output sample is one dot product of a
+    phase with the most recent input, so the cost per sample is independent of
+    the ratio. The last `taps_per_phase - 1` input samples are carried over
+    between chunks, which makes chunked output identical to processing the
+    whole signal at once.
+    """
+
+    def __init__(self, in_rate: int, out_rate: int, taps_per_phase: int = 48, beta: float = 8.0) -> None:
+        g = gcd(in_rate, out_rate)
+        self.up, self.down = out_rate // g, in_rate // g
+        self.in_rate, self.out_rate = in_rate, out_rate
+        self.taps = taps_per_phase
+        # Cut off just below the lower of the two Nyquist frequencies
+        cutoff = 0.92 / max(self.up, self.down)
+        n = self.up * taps_per_phase
+        t = np.arange(n) - (n - 1) / 2
+        h = self.up * cutoff * np.sinc(cutoff * t) * np.kaiser(n, beta)
+        # Phase p holds h[p], h[p + up], ...; reversed for a plain dot product
+        self._phases = h.reshape(taps_per_phase, self.up).T[:, ::-1].astype(np.float32)
+        self._history = np.zeros(taps_per_phase - 1, dtype=np.float32)
+        self._consumed = 0  # input samples before `_history[-1] + 1`
+        self._produced = 0  # output samples so far
+
+    @property
+    def delay_s(self) -> float:
+        """Group delay of the filter."""
+        return (self.up * self.taps - 1) / 2 / (self.in_rate * self.up)
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """Resample a mono chunk; returns float32 samples at `out_rate`."""
+        x = np.concatenate([self._history, samples.astype(np.float32).ravel()])
+        available = self._consumed + len(samples)
+        # Output n needs input (n * down) // up; emit all outputs now computable
+        end = -(-available * self.up // self.down)
+        n = np.arange(self._produced, end)
+        base = n * self.down // self.up
+        phase = n * self.down - base * self.up
+        # Window k covers x[k : k + taps]; its last sample is input `base`
+        start = base - self._consumed
+        windows = np.lib.stride_tricks.sliding_window_view(x, self.taps)[start]
+        out = np.einsum("nk,nk->n", windows, self._phases[phase])
+
+        self._history = x[len(x) - (self.taps - 1):]
+        self._consumed = available
+        self._produced = end
+        return out
+
+    def reset(self) -> None:
+        self._history[:] = 0.0
+        self._consumed = self._produced = 0
+
+
+# ---------------------------------------------------------------------------
+# Codecs
+# ---------------------------------------------------------------------------
+
+
+_mulaw_table: np.ndarray | None = None
+
+
+def _mulaw_decode_table() -> np.ndarray:
+    global _mulaw_table
+    if _mulaw_table is None:
+        y = np.arange(256) / 127.5 - 1.0
+        x = np.sign(y) * np.expm1(np.abs(y) * np.log1p(_MU)) / _MU
+        _mulaw_table = (x * 32767).astype(np.float32)
+    return _mulaw_table
+
+
+def mulaw_encode(samples: np.ndarray) -> bytes:
+    """Float samples in int16 scale → one companded byte per sample."""
+    x = np.clip(samples / 32767.0, -1.0, 1.0)
+    y = np.sign(x) * np.log1p(_MU * np.abs(x)) / np.log1p(_MU)
+    return np.rint((y + 1.0) * 127.5).astype(np.uint8).tobytes()
+
+
+def mulaw_decode(payload: bytes) -> np.ndarray:
+    return _mulaw_decode_table()[np.frombuffer(payload, dtype=np.uint8)]
+
+
+def pcm16_encode(samples: np.ndarray) -> bytes:
+    return np.clip(np.rint(samples), -32768, 32767).astype("<i2").tobytes()
+
+
+def pcm16_decode(payload: bytes) -> np.ndarray:
+    return np.frombuffer(payload, dtype="<i2").astype(np.float32)
+
+
+_ENCODERS = {"pcm16": pcm16_encode, "mulaw": mulaw_encode}
+_DECODERS = {"pcm16": pcm16_decode, "mulaw": mulaw_decode}
+
+
+# ---------------------------------------------------------------------------
+# Transport
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class TransportStats:
+    chunks: int = 0
+    audio_s: float = 0.0
+    raw_bytes: int = 0  # what the captured int16 PCM would have cost
+    wire_bytes: int = 0
+    encode_s: float = 0.0
+    decode_s: float = 0.0
+
+    @property
+    def ratio(self) -> float:
+        return self.wire_bytes / self.raw_bytes if self.raw_bytes else 1.0
+
+    @property
+    def cpu_per_audio_s(self) -> float:
+        return (self.encode_s + self.decode_s) / self.audio_s if self.audio_s else 0.0
+
+    def __str__(self) -> str:
+        rate = self.wire_bytes / self.audio_s / 1000 if self.audio_s else 0.0
+        return (
+            f"{self.wire_bytes / 1000:.0f} KB sent for {self.audio_s:.1f}s of audio "
+            f"({rate:.1f} KB/s, {self.ratio:.0%} of raw PCM), "
+            f"CPU {self.cpu_per_audio_s * 1000:.2f} ms per audio second"
+        )
+
+
+class AudioEncoder:
+    """Sending side: resample to the wire rate, then encode."""
+
+    def __init__(self, in_rate: int, wire_rate: int, codec: str) -> None:
+        self.resampler = PolyphaseResampler(in_rate, wire_rate) if wire_rate != in_rate else None
+        self._encode = _ENCODERS[codec]
+
+    def encode(self, chunk: np.ndarray) -> bytes:
+        samples = chunk.astype(np.float32).ravel()
+        if self.resampler is not None:
+            samples = self.resampler.process(samples)
+        return self._encode(samples)
+
+
+class AudioDecoder:
+    """Receiving side: decode, then resample to the rate the pipeline expects."""
+
+    def __init__(self, wire_rate: int, out_rate: int, codec: str) -> None:
+        self.resampler = PolyphaseResampler(wire_rate, out_rate) if wire_rate != out_rate else None
+        self._decode = _DECODERS[codec]
+
+    def decode(self, payload: bytes) -> np.ndarray:
+        samples = self._decode(payload)
+        if self.resampler is not None:
+            samples = self.resampler.process(samples)
+        return np.clip(np.rint(samples), -32768, 32767).astype(np.int16)
+
+
+class AudioTransport:
+    """Both ends of one speaker's upstream audio link, with byte counters.
+
+    `send()` runs where audio is captured and `receive()` where the voice
+    pipeline runs; `relay()` does both for the single-process app, so the
+    bytes in between are exactly what a network hop would carry.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int,
+        wire_rate: int = AUDIO_TRANSPORT_RATE,
+        codec: str = AUDIO_TRANSPORT_CODEC,
+        session: str = "local",
+    ) -> None:
+        if codec not in CODECS:
+            raise ValueError(f"unknown audio codec {codec!r} (choose from {', '.join(CODECS)})")
+        self.sample_rate = sample_rate
+        self.wire_rate = wire_rate
+        self.codec = codec
+        self.session = session
+        self.stats = TransportStats()
+        self._encoder = AudioEncoder(sample_rate, wire_rate, codec)
+        self._decoder = AudioDecoder(wire_rate, sample_rate, codec)
+        telemetry.stats.collectors.append(self.prometheus)
+
+    @property
+    def delay_s(self) -> float:
+        """Audio delay added by the two resampling filters."""
+        return sum(
+            side.resampler.delay_s for side in (self._encoder, self._decoder) if side.resampler is not None
+        )
+
+    def send(self, chunk: np.ndarray) -> bytes:
+        t0 = time.perf_counter()
+        payload = self._encoder.encode(chunk)
+        self.stats.encode_s += time.perf_counter() - t0
+        self.stats.chunks += 1
+        self.stats.audio_s += len(chunk) / self.sample_rate
+        self.stats.raw_bytes += chunk.size * 2
+        self.stats.wire_bytes += len(payload)
+        return payload
+
+    def receive(self, payload: bytes) -> np.ndarray:
+        t0 = time.perf_counter()
+        samples = self._decoder.decode(payload)
+        self.stats.decode_s += time.perf_counter() - t0
+        return samples
+
+    def relay(self, chunk: np.ndarray) -> np.ndarray:
+        """Send and receive `chunk`; returns int16 PCM shaped like the input."""
+        samples = self.receive(self.send(chunk))
+        return samples.reshape(-1, 1) if chunk.ndim == 2 else samples
+
+    def prometheus(self) -> list[str]:
+        labels = f'session="{self.session}",codec="{self.codec}",rate="{self.wire_rate}"'
+        return [
+            f"# TYPE {_PREFIX}_audio_upstream_bytes_total counter",
+            f"{_PREFIX}_audio_upstream_bytes_total{{{labels},kind=\"wire\"}} {self.stats.wire_bytes}",
+            f"{_PREFIX}_audio_upstream_bytes_total{{{labels},kind=\"raw\"}} {self.stats.raw_bytes}",
+            f"# TYPE {_PREFIX}_audio_upstream_seconds_total counter",
+            f"{_PREFIX}_audio_upstream_seconds_total{{{labels}}} {self.stats.audio_s:.3f}",
+        ]
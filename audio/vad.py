@@ -0,0 +1,188 @@
+"""Streaming voice activity detection with endpointing.
+
+Every capture chunk is split into 10 ms frames; log energy (relative to an
+adaptive noise floor) and zero-crossing rate are computed for all frames at
+once with NumPy. Chunks are forwarded only while speech is active, plus a
+pre-roll before the onset and a short hangover after it. An utterance is
+closed once `end_silence_s` of silence has followed the last speech frame.
+The caller then sends `closing_silence()` upstream, so the server-side turn
+detection (`server_turn_detection()`, a little shorter than `end_silence_s`)
+also sees enough trailing silence to commit the turn.
+"""
+
+import os
+from collections import deque
+from dataclasses import dataclass
+
+import numpy as np
+
+VAD_THRESHOLD_DB = float(os.getenv("VAD_THRESHOLD_DB", "9"))
+VAD_HANGOVER_S = float(os.getenv("VAD_HANGOVER_S", "0.3"))
+VAD_END_SILENCE_S = float(os.getenv("VAD_END_SILENCE_S", "0.7"))
+
+SPEECH_START = "speech_start"
+SPEECH_END = "speech_end"
+
+# The server needs this much less silence than is sent after an utterance
+_SERVER_SILENCE_MARGIN_S = 0.1
+
+
+@dataclass
+class VADConfig:
+    frame_s: float = 0.01
+    threshold_db: float = VAD_THRESHOLD_DB  # above the noise floor
+    min_level_db: float = -55.0  # dBFS; quieter frames are never speech
+    max_zcr: float = 0.45  # higher crossing rates look like hiss, not voice
+    onset_frames: int = 3  # speech frames needed to open an utterance
+    pre_roll_s: float = 0.2  # audio sent from before the detected onset
+    hangover_s: float = VAD_HANGOVER_S  # trailing silence still sent
+    end_silence_s: float = VAD_END_SILENCE_S  # trailing silence closing the turn
+    noise_adapt: float = 0.05  # noise-floor smoothing per silent chunk
+
+
+@dataclass
+class VADStats:
+    utterances: int = 0
+    total_s: float = 0.0
+    sent_s: float = 0.0
+
+    @property
+    def suppressed_s(self) -> float:
+        return self.total_s - self.sent_s
+
+    @property
+    def suppressed_ratio(self) -> float:
+        return self.suppressed_s / self.total_s if self.total_s else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.utterances} utterances, suppressed {self.suppressed_s:.1f}s "
+            f"of {self.total_s:.1f}s ({self.suppressed_ratio:.0%})"
+        )
+
+
+class StreamingVAD:
+    """Energy / zero-crossing VAD with hangover smoothing and endpointing."""
+
+    def __init__(self, sample_rate: int, chunk_length_s: float, config: VADConfig | None = None) -> None:
+        self.config = config or VADConfig()
+        self.sample_rate = sample_rate
+        self.chunk_s = chunk_length_s
+        self.frame_len = int(sample_rate * self.config.frame_s)
+        self.stats = VADStats()
+
+        self.in_speech = False
+        # Loudest frame of the latest chunk (dBFS), e.g. for a level meter
+        self.level_db = self.config.min_level_db
+        self._noise_db = self.config.min_level_db
+        self._onset_run = 0
+        self._silence_s = 0.0
+        # Trailing silence of the current utterance already forwarded (the hangover)
+        self._sent_silence_s = 0.0
+        self._pre_roll: deque[np.ndarray] = deque(
+            maxlen=max(1, round(self.config.pre_roll_s / chunk_length_s))
+        )
+
+    def frame_features(self, chunk: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Per-frame level (dBFS) and zero-crossing rate for one chunk."""
+        samples = chunk.reshape(-1)
+        n_frames = len(samples) // self.frame_len
+        frames = samples[: n_frames * self.frame_len].reshape(n_frames, self.frame_len)
+        frames = frames.astype(np.float32) / 32768.0
+        level_db = 10.0 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (self.frame_len - 1)
+        return level_db, zcr
+
+    def process(self, chunk: np.ndarray) -> tuple[list[np.ndarray], str | None]:
+        """Return the chunks to forward for this input chunk and any endpoint event."""
+        cfg = self.config
+        self.stats.total_s += self.chunk_s
+
+        level_db, zcr = self.frame_features(chunk)
+        self.level_db = float(level_db.max())
+        speech = (
+            (level_db > self._noise_db + cfg.threshold_db)
+            & (level_db > cfg.min_level_db)
+            & (zcr < cfg.max_zcr)
+        )
+        n_speech = int(np.count_nonzero(speech))
+        if n_speech == 0:
+            # Track the noise floor on silent chunks only (fast down, slow up)
+            quiet = float(level_db.min())
+            if quiet < self._noise_db:
+                self._noise_db = quiet
+            else:
+                self._noise_db += cfg.noise_adapt * (quiet - self._noise_db)
+            self._noise_db = max(self._noise_db, cfg.min_level_db - cfg.threshold_db)
+
+        if not self.in_speech:
+            self._onset_run = self._onset_run + n_speech if n_speech else 0
+            if self._onset_run < cfg.onset_frames:
+                self._pre_roll.append(chunk)
+                return [], None
+            self.in_speech = True
+            self._silence_s = 0.0
+            self._sent_silence_s = 0.0
+            out = [*self._pre_roll, chunk]
+            self._pre_roll.clear()
+            self.stats.sent_s += len(out) * self.chunk_s
+            return out, SPEECH_START
+
+        if n_speech:
+            self._silence_s = 0.0
+            self._sent_silence_s = 0.0
+        else:
+            self._silence_s += self.chunk_s
+
+        if self._silence_s >= cfg.end_silence_s:
+            self.in_speech = False
+            self._onset_run = 0
+            self.stats.utterances += 1
+            self._pre_roll.append(chunk)
+            return [], SPEECH_END
+        if self._silence_s > cfg.hangover_s:
+            self._pre_roll.append(chunk)
+            return [], None
+        if self._silence_s:
+            self._sent_silence_s += self.chunk_s
+        self.stats.sent_s += self.chunk_s
+        return [chunk], None
+
+    def closing_silence(self, chunk_shape: tuple[int, ...]) -> list[np.ndarray]:
+        """Silent chunks to send after an utterance ends (on SPEECH_END).
+
+        Together with the hangover already sent they make `end_silence_s` of
+        trailing silence, more than the server's `silence_duration_ms`, so
+        the server-side turn detection commits the turn too.
+        """
+        missing = self.config.end_silence_s - self._sent_silence_s
+        n = max(1, int(np.ceil(missing / self.chunk_s - 1e-9)))
+        self._sent_silence_s += n * self.chunk_s
+        self.stats.sent_s += n * self.chunk_s
+        return [np.zeros(chunk_shape, dtype=np.int16) for _ in range(n)]
+
+    def end_utterance(self, chunk_shape: tuple[int, ...]) -> list[np.ndarray]:
+        """Force-close an open utterance (e.g. the mic was switched off).
+
+        Returns the `closing_silence` the server needs to commit the turn.
+        """
+        if not self.in_speech:
+            return []
+        self.in_speech = False
+        self._onset_run = 0
+        self.stats.utterances += 1
+        return self.closing_silence(chunk_shape)
+
+    def server_turn_detection(self) -> dict:
+        """STT turn-detection settings matching the local endpointing.
+
+        The server waits for a little less silence than `closing_silence`
+        sends, so it always commits the turn the local VAD has ended.
+        """
+        silence_s = max(self.chunk_s, self.config.end_silence_s - _SERVER_SILENCE_MARGIN_S)
+        return {
+            "type": "server_vad",
+            "prefix_padding_ms": int(self.config.pre_roll_s * 1000),
+            "silence_duration_ms": int(silence_s * 1000),
+        }
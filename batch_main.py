@@ -0,0 +1,387 @@
+"""
+Batch coaching over recorded sessions — triage → specialist for every turn.
+
+Inputs can be any mix of:
+  • JSON dialogues in the `data/mock_dialogue.json` shape (every non-coach line
+    is a turn),
+  • JSONL files with one turn per line (`{"id": ..., "text": ...}` or
+    `{"id": ..., "audio": "path.wav"}`),
+  • `.txt` transcripts and `.wav` recordings (a sidecar `.txt` next to a WAV is
+    used as its transcript, otherwise it is transcribed),
+  • directories containing any of the above.
+
+Turns run concurrently (`--concurrency`). Rate limits and transient API errors
+are retried with backoff; a 429 pauses every worker for the server's
+`Retry-After`. Each result is appended to the output JSONL as soon as it is
+done, and that file is the checkpoint: re-running with the same output skips
+turns already answered and retries the ones that failed.
+
+Usage:
+    python batch_main.py data/mock_dialogue.json -o feedback.jsonl
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import numpy as np
+from openai import RateLimitError
+
+from workflows.concurrency import configure_model_client
+from workflows.model_router import model_router
+from workflows.prompt_cache import prompt_cache_stats
+from workflows.resilience import is_backend_failure, resilience
+from workflows.response_cache import response_cache, run_cached
+from workflows.speculative import speculative_router
+from workflows.telemetry import telemetry
+
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+BATCH_MAX_ATTEMPTS = int(os.getenv("BATCH_MAX_ATTEMPTS", "6"))
+BATCH_BACKOFF_S = float(os.getenv("BATCH_BACKOFF_S", "1"))
+BATCH_MAX_BACKOFF_S = float(os.getenv("BATCH_MAX_BACKOFF_S", "60"))
+BATCH_STT_MODEL = os.getenv("BATCH_STT_MODEL", "gpt-4o-mini-transcribe")
+
+COACH_SPEAKERS = {"coach"}
+_TEXT_SUFFIXES = {".json", ".jsonl", ".txt", ".wav"}
+
+
+# ---------------------------------------------------------------------------
+# Inputs
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class BatchItem:
+    id: str
+    source: str
+    text: str | None = None
+    audio: str | None = None
+    speaker: str | None = None
+
+
+def _read_sidecar(wav_path: str) -> str | None:
+    sidecar = os.path.splitext(wav_path)[0] + ".txt"
+    if os.path.exists(sidecar):
+        with open(sidecar, encoding="utf-8") as fh:
+            return fh.read().strip() or None
+    return None
+
+
+def _items_from_file(path: str, name: str) -> Iterator[BatchItem]:
+    suffix = os.path.splitext(path)[1].lower()
+    if suffix == ".json":
+        with open(path, encoding="utf-8") as fh:
+            data = json.load(fh)
+        lines = data.get("dialogue", []) if isinstance(data, dict) else data
+        for i, line in enumerate(lines):
+            speaker = line.get("speaker")
+            if (speaker or "").lower() in COACH_SPEAKERS or not line.get("text"):
+                continue
+            yield BatchItem(f"{name}#{i}", path, line["text"], speaker=speaker)
+    elif suffix == ".jsonl":
+        base = os.path.dirname(path)
+        with open(path, encoding="utf-8") as fh:
+            for n, raw in enumerate(fh, 1):
+                if not raw.strip():
+                    continue
+                line = json.loads(raw)
+                audio = line.get("audio")
+                if audio and not os.path.isabs(audio):
+                    audio = os.path.join(base, audio)
+                yield BatchItem(
+                    str(line.get("id", f"{name}:{n}")), path, line.get("text"), audio, line.get("speaker")
+                )
+    elif suffix == ".txt":
+        # Sidecar transcripts are read with their WAV
+        if os.path.exists(os.path.splitext(path)[0] + ".wav"):
+            return
+        with open(path, encoding="utf-8") as fh:
+            text = fh.read().strip()
+        if text:
+            yield BatchItem(name, path, text)
+    elif suffix == ".wav":
+        yield BatchItem(name, path, _read_sidecar(path), audio=path)
+
+
+def discover(paths: list[str]) -> list[BatchItem]:
+    """Every turn in the given files and directories, in a stable order."""
+    items: list[BatchItem] = []
+    for root in paths:
+        if os.path.isdir(root):
+            for dirpath, dirnames, filenames in os.walk(root):
+                dirnames.sort()
+                for filename in sorted(filenames):
+                    if os.path.splitext(filename)[1].lower() in _TEXT_SUFFIXES:
+                        path = os.path.join(dirpath, filename)
+                        items.extend(_items_from_file(path, os.path.relpath(path, root)))
+        else:
+            items.extend(_items_from_file(root, os.path.basename(root)))
+    return items
+
+
+# ---------------------------------------------------------------------------
+# Checkpointed output
+# ---------------------------------------------------------------------------
+
+
+def load_checkpoint(path: str) -> set[str]:
+    """Ids already answered in `path` (failed turns are retried)."""
+    done: set[str] = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as fh:
+        for raw in fh:
+            try:
+                record = json.loads(raw)
+            except ValueError:
+                continue  # line cut short by an interrupted run
+            if record.get("status") == "ok":
+                done.add(record["id"])
+    return done
+
+
+class ResultWriter:
+    """Append-only JSONL sink, flushed per record so a crash loses at most one line."""
+
+    def __init__(self, path: str) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Start on a fresh line if the last run died mid-write
+        torn = False
+        if os.path.exists(path) and os.path.getsize(path):
+            with open(path, "rb") as fh:
+                fh.seek(-1, os.SEEK_END)
+                torn = fh.read(1) != b"\n"
+        self._fh = open(path, "a", encoding="utf-8")
+        if torn:
+            self._fh.write("\n")
+
+    def write(self, record: dict) -> None:
+        self._fh.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        self._fh.flush()
+
+    def close(self) -> None:
+        self._fh.close()
+
+
+# ---------------------------------------------------------------------------
+# Retry with backoff
+# ---------------------------------------------------------------------------
+
+
+def _retry_after(exc: Exception) -> float | None:
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except ValueError:
+        pass  # an HTTP date; fall back to our own backoff
+    return None
+
+
+def _retryable(exc: Exception) -> bool:
+    # Stage timeouts and open breakers too: a later attempt may find the model healthy again
+    return is_backend_failure(exc)
+
+
+@dataclass
+class BatchStats:
+    done: int = 0
+    failed: int = 0
+    skipped: int = 0
+    retries: int = 0
+    rate_limited: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+
+
+class Backoff:
+    """Exponential backoff with full jitter, plus a shared pause after a 429."""
+
+    def __init__(self, base_s: float = BATCH_BACKOFF_S, max_s: float = BATCH_MAX_BACKOFF_S) -> None:
+        self.base_s = base_s
+        self.max_s = max_s
+        self._paused_until = 0.0
+
+    async def wait_turn(self) -> None:
+        delay = self._paused_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def delay(self, attempt: int, exc: Exception) -> float:
+        hinted = _retry_after(exc)
+        delay = hinted if hinted is not None else random.uniform(0, min(self.max_s, self.base_s * 2**attempt))
+        if isinstance(exc, RateLimitError):
+            # Everyone waits: hammering a rate-limited API only extends the limit
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        return delay
+
+
+# ---------------------------------------------------------------------------
+# Coaching one turn
+# ---------------------------------------------------------------------------
+
+
+async def transcribe(path: str) -> str:
+    client = configure_model_client()
+    with open(path, "rb") as fh:
+        result = await client.audio.transcriptions.create(model=BATCH_STT_MODEL, file=fh)
+    return result.text
+
+
+async def coach(item: BatchItem) -> dict:
+    """Transcribe (if needed), triage and get the specialist's feedback for one turn."""
+    with telemetry.turn("batch", sample=True, item=item.id) as trace:
+        text = item.text
+        if text is None:
+            with trace.span("stt"):
+                text = await transcribe(item.audio)
+        with trace.span("triage"):
+            turn = await speculative_router.run(
+                text,
+                lambda key, tier: asyncio.create_task(
+                    # A batch retries a failed turn rather than record a degraded reply
+                    run_cached(key, model_router.agent(key, tier), text, degrade=False)
+                ),
+            )
+        triage = turn.triage
+        trace.set(agent=triage.selected_agent, model=model_router.model(triage.selected_agent, turn.tier))
+        with trace.span("specialist", agent=triage.selected_agent):
+            result = await turn.handle
+        tokens = trace.attrs.get("tokens", {})
+    return {
+        "transcript": text,
+        "agent": triage.selected_agent,
+        "confidence": triage.confidence,
+        "reasoning": triage.reasoning,
+        "feedback": str(result.final_output),
+        "tokens": {
+            "input": sum(t["input"] for t in tokens.values()),
+            "output": sum(t["output"] for t in tokens.values()),
+        },
+    }
+
+
+async def worker(
+    queue: asyncio.Queue, writer: ResultWriter, backoff: Backoff, stats: BatchStats,
+    latencies: list[float], max_attempts: int,
+) -> None:
+    while True:
+        item: BatchItem | None = await queue.get()
+        if item is None:
+            return
+        t0 = time.perf_counter()
+        record = {"id": item.id, "source": item.source, "speaker": item.speaker}
+        for attempt in range(max_attempts):
+            await backoff.wait_turn()
+            try:
+                record.update(await coach(item), status="ok")
+                record.pop("error", None)
+                break
+            except Exception as exc:  # noqa: BLE001
+                record.update(status="error", error=f"{type(exc).__name__}: {exc}")
+                if not _retryable(exc) or attempt == max_attempts - 1:
+                    break
+                stats.retries += 1
+                stats.rate_limited += isinstance(exc, RateLimitError)
+                await asyncio.sleep(backoff.delay(attempt, exc))
+        record["attempts"] = attempt + 1
+        record["latency_s"] = round(time.perf_counter() - t0, 3)
+        writer.write(record)
+
+        if record["status"] == "ok":
+            stats.done += 1
+            stats.input_tokens += record["tokens"]["input"]
+            stats.output_tokens += record["tokens"]["output"]
+            latencies.append(record["latency_s"])
+        else:
+            stats.failed += 1
+            print(f"✗ {item.id}: {record['error']}", file=sys.stderr)
+        finished = stats.done + stats.failed
+        if finished % 25 == 0:
+            print(f"… {finished} turns finished ({stats.failed} failed)", file=sys.stderr)
+
+
+async def run_batch(
+    items: list[BatchItem], output: str, concurrency: int, max_attempts: int
+) -> tuple[BatchStats, list[float]]:
+    stats = BatchStats()
+    done = load_checkpoint(output)
+    pending = [item for item in items if item.id not in done]
+    stats.skipped = len(items) - len(pending)
+
+    writer = ResultWriter(output)
+    backoff = Backoff()
+    latencies: list[float] = []
+    # Bounded: the producer never runs far ahead of the workers
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+    workers = [
+        asyncio.create_task(worker(queue, writer, backoff, stats, latencies, max_attempts))
+        for _ in range(concurrency)
+    ]
+    try:
+        for item in pending:
+            await queue.put(item)
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+    finally:
+        for task in workers:
+            task.cancel()
+        writer.close()
+    return stats, latencies
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Batch coaching over transcripts and recordings.")
+    parser.add_argument("inputs", nargs="+", help="JSON dialogues, JSONL, .txt/.wav files or directories")
+    parser.add_argument("-o", "--output", default="batch_feedback.jsonl", help="results JSONL (also the checkpoint)")
+    parser.add_argument("-c", "--concurrency", type=int, default=BATCH_CONCURRENCY)
+    parser.add_argument("--max-attempts", type=int, default=BATCH_MAX_ATTEMPTS)
+    args = parser.parse_args()
+
+    items = discover(args.inputs)
+    if not items:
+        print("No turns found in the given inputs.", file=sys.stderr)
+        return 1
+    ids = [item.id for item in items]
+    if len(set(ids)) != len(ids):
+        print("Duplicate turn ids in the inputs; resuming needs them unique.", file=sys.stderr)
+        return 1
+
+    # Retries are ours, so a 429's Retry-After pauses every worker once
+    configure_model_client(max_retries=0)
+    t0 = time.perf_counter()
+    stats, latencies = asyncio.run(run_batch(items, args.output, args.concurrency, args.max_attempts))
+    wall = time.perf_counter() - t0
+
+    print(f"\n{stats.done} turns coached, {stats.failed} failed, {stats.skipped} already done "
+          f"(of {len(items)}) in {wall:.1f}s → {args.output}")
+    if stats.done:
+        print(f"Throughput: {stats.done / wall:.2f} turns/s with {args.concurrency} workers")
+        print(f"Tokens per turn: {stats.input_tokens / stats.done:.0f} in, "
+              f"{stats.output_tokens / stats.done:.0f} out (cached replies count 0)")
+        print(f"Latency per turn: p50 {np.percentile(latencies, 50):.2f}s, "
+              f"p95 {np.percentile(latencies, 95):.2f}s")
+    print(f"Retries: {stats.retries} ({stats.rate_limited} rate-limited)")
+    print(f"Triage: {speculative_router.stats}; {response_cache.stats}")
+    print(f"Models: {model_router.stats}")
+    print(f"Resilience: {resilience.stats}")
+    print(f"Prompt cache:\n{prompt_cache_stats.report()}")
+    return 0 if not stats.failed else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
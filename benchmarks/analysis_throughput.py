@@ -0,0 +1,77 @@
+"""Throughput benchmark for the streaming acoustic analysis.
+
+A synthetic voice (glottal pulse train with gliding pitch, syllable-rate
+loudness envelope and pauses) is fed to `StreamingAnalyzer` in 50 ms chunks on
+a single core. The script reports per-chunk latency and the real-time factor,
+checks the pitch track against the known f0, and exits non-zero if analysis is
+not comfortably faster than real time.
+
+Usage:
+    python benchmarks/analysis_throughput.py [--seconds 60] [--max-rtf 0.1]
+"""
+
+import os
+
+# One core: keep NumPy's BLAS / FFT backends from spreading out
+for var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+    os.environ.setdefault(var, "1")
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio.analysis import StreamingAnalyzer  # noqa: E402
+from benchmarks.synthetic_speech import SAMPLE_RATE, synthetic_voice  # noqa: E402
+
+CHUNK_LENGTH_S = 0.05
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=60.0)
+    parser.add_argument("--max-rtf", type=float, default=0.1, help="CPU seconds per audio second")
+    args = parser.parse_args()
+
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, {min(os.sched_getaffinity(0))})
+
+    samples, true_f0 = synthetic_voice(args.seconds, np.random.default_rng(0))
+    chunk = int(SAMPLE_RATE * CHUNK_LENGTH_S)
+    analyzer = StreamingAnalyzer(SAMPLE_RATE, max_utterance_s=args.seconds + 1)
+
+    timings = []
+    for start in range(0, len(samples) - chunk + 1, chunk):
+        t0 = time.perf_counter()
+        analyzer.process(samples[start:start + chunk].reshape(-1, 1))
+        timings.append(time.perf_counter() - t0)
+    track = analyzer._f0[: analyzer._frames].copy()
+    t0 = time.perf_counter()
+    summary = analyzer.finish()
+    finish_s = time.perf_counter() - t0
+
+    # Pitch error in cents on frames both tracks call voiced
+    hop = int(SAMPLE_RATE * 0.01)
+    reference = true_f0[: len(track) * hop : hop]
+    both = (track > 0) & (reference > 0)
+    cents = np.abs(1200 * np.log2(track[both] / reference[both]))
+
+    timings_ms = np.array(timings) * 1000
+    rtf = analyzer.stats.real_time_factor
+    print(f"chunks: {len(timings)} × {CHUNK_LENGTH_S * 1000:.0f} ms")
+    print(f"per chunk: p50 {np.percentile(timings_ms, 50):.3f} ms, p99 {np.percentile(timings_ms, 99):.3f} ms")
+    print(f"summary of {args.seconds:.0f}s utterance: {finish_s * 1000:.1f} ms")
+    print(f"real-time factor: {rtf:.4f} ({1 / rtf:.0f}× faster than real time)")
+    print(f"pitch: median error {np.median(cents):.1f} cents on {both.mean():.0%} of frames")
+    print(f"summary: {summary}")
+
+    ok = rtf <= args.max_rtf
+    print(f"{'✅' if ok else '❌'} RTF {rtf:.4f} (budget {args.max_rtf})")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+"""Fault drill for deadlines, hedging, circuit breakers and degraded answers.
+
+Coaching turns (triage → specialist, as in `batch_main`) run against the local
+OpenAI stub with faults injected, in three phases:
+
+1. **Stalls**: a share of model requests hang for `--stall` seconds. The same
+   turns run with hedging off and then on, and the turn latency percentiles
+   are compared.
+2. **Partial outage**: every request to the fastest tier fails. Turns move up
+   a tier, and once the breaker opens they skip the failing model without
+   waiting on it.
+3. **Full outage**: every model fails. Once the breakers are open, turns get
+   the coaches' degraded local answers straight away.
+
+The script exits non-zero if hedging does not cut the p99 turn latency under
+stalls, or if a degraded answer takes longer than `--max-degraded-ms` once the
+breakers are open.
+
+Usage:
+    python benchmarks/fault_drill.py [--turns 200] [--stall-rate 0.05] [--stall 4]
+"""
+
+import os
+import sys
+import tempfile
+
+# Start from an empty reply cache so every turn reaches the models
+os.environ["RESPONSE_CACHE_PATH"] = os.path.join(tempfile.mkdtemp(), "response_cache.sqlite")
+os.environ.setdefault("OPENAI_API_KEY", "sk-stub")
+
+import argparse
+import asyncio
+import logging
+import time
+
+import numpy as np
+from agents import set_tracing_disabled
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stub_server import StubConfig, StubServer, last_user_text  # noqa: E402
+from custom_agents.registry import SPECIALISTS, load_model_tiers  # noqa: E402
+from custom_agents.triage_agent import match_keywords  # noqa: E402
+from workflows.concurrency import configure_model_client  # noqa: E402
+from workflows.model_router import model_router  # noqa: E402
+from workflows.resilience import resilience  # noqa: E402
+from workflows.response_cache import run_cached  # noqa: E402
+from workflows.speculative import speculative_router  # noqa: E402
+
+QUESTIONS = (
+    "How can I reduce my accent when pronouncing 'th'?",
+    "Tips for conquering stage fright during presentations?",
+    "How do I improve my vocal projection without straining?",
+    "Give me a tongue twister to practise Spanish rolled r sounds",
+    "How should I structure a five minute keynote?",
+    "My voice gets hoarse after long meetings, what can I do?",
+)
+
+
+async def coach(text: str) -> tuple[float, bool]:
+    """One turn; returns its latency and whether the reply was degraded."""
+    t0 = time.perf_counter()
+    turn = await speculative_router.run(
+        text,
+        lambda key, tier: asyncio.create_task(run_cached(key, model_router.agent(key, tier), text)),
+    )
+    result = await turn.handle
+    return time.perf_counter() - t0, getattr(result, "degraded", False)
+
+
+async def run_turns(phase: str, turns: int, concurrency: int) -> list[tuple[float, bool]]:
+    queue: asyncio.Queue[str] = asyncio.Queue()
+    for i in range(turns):
+        queue.put_nowait(f"{QUESTIONS[i % len(QUESTIONS)]} ({phase} turn {i})")
+    results: list[tuple[float, bool]] = []
+
+    async def worker() -> None:
+        while not queue.empty():
+            results.append(await coach(queue.get_nowait()))
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return results
+
+
+def report(name: str, results: list[tuple[float, bool]]) -> dict[str, float]:
+    ms = np.array([latency for latency, _ in results]) * 1000
+    degraded = sum(flag for _, flag in results)
+    p = {q: float(np.percentile(ms, q)) for q in (50, 95, 99)}
+    print(
+        f"{name:24}: {len(results)} turns, p50 {p[50]:.0f} / p95 {p[95]:.0f} / p99 {p[99]:.0f} / "
+        f"max {ms.max():.0f} ms, {degraded} degraded"
+    )
+    print(f"{'':24}  {resilience.stats}; {model_router.stats}")
+    return p
+
+
+async def drill(args: argparse.Namespace, config: StubConfig) -> tuple[dict, dict]:
+    fastest = {load_model_tiers(name)[0][0] for name in ("triage_agent", *SPECIALISTS)}
+    every_model = {model for name in ("triage_agent", *SPECIALISTS) for model in load_model_tiers(name)[0]}
+
+    # 1. Stalls, hedging off then on (each after a warm-up giving every agent HEDGE_MIN_SAMPLES runs)
+    stalls = {}
+    for hedge in (False, True):
+        resilience.reset()
+        resilience.hedge = hedge
+        config.stall_rate = 0.0
+        await run_turns(f"warm-up {hedge}", 120, args.concurrency)
+        config.stall_rate = args.stall_rate
+        name = f"stalls, hedging {'on' if hedge else 'off'}"
+        stalls[hedge] = report(name, await run_turns(name, args.turns, args.concurrency))
+    config.stall_rate = 0.0
+
+    # 2. The fastest tier is down: turns move up a tier, then skip it once its breaker opens
+    resilience.reset()
+    config.failing_models = fastest
+    report(f"outage of {', '.join(sorted(fastest))}", await run_turns("partial", args.turns, args.concurrency))
+
+    # 3. Every model is down: degraded local answers
+    resilience.reset()
+    config.failing_models = every_model
+    await run_turns("full warm-up", 20, args.concurrency)  # opens the breakers
+    degraded = report("outage of every model", await run_turns("full", args.turns, args.concurrency))
+    return stalls, degraded
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.2, help="model time to first token")
+    parser.add_argument("--tokens-per-s", type=float, default=200.0)
+    parser.add_argument("--stall-rate", type=float, default=0.05)
+    parser.add_argument("--stall", type=float, default=4.0, help="seconds a stalled request hangs")
+    parser.add_argument("--max-degraded-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    config = StubConfig(args.latency, args.tokens_per_s, reply_tokens=40, stall_s=args.stall)
+    server = StubServer(config, structured=lambda body, schema: match_keywords(last_user_text(body))).start()
+    configure_model_client(base_url=server.base_url, api_key="stub", max_retries=0)
+    set_tracing_disabled(True)
+    # Every injected failure would otherwise be logged by the Agents SDK
+    logging.getLogger("openai.agents").setLevel(logging.CRITICAL)
+    try:
+        stalls, degraded = asyncio.run(drill(args, config))
+    finally:
+        server.stop()
+    print(f"stub: {server.requests} requests, {server.failed} failed, {server.stalled} stalled")
+
+    hedged_ok = stalls[True][99] < stalls[False][99]
+    degraded_ok = degraded[99] <= args.max_degraded_ms
+    print(
+        f"{'✅' if hedged_ok else '❌'} hedging p99 {stalls[True][99]:.0f} ms vs "
+        f"{stalls[False][99]:.0f} ms without"
+    )
+    print(
+        f"{'✅' if degraded_ok else '❌'} degraded answers p99 {degraded[99]:.1f} ms "
+        f"(budget {args.max_degraded_ms} ms)"
+    )
+    return 0 if hedged_ok and degraded_ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
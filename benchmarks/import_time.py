@@ -0,0 +1,99 @@
+"""Cold-start benchmark for the entry points.
+
+Each entry point is imported in a fresh interpreter after its unavoidable
+third-party dependencies, so only the project's own import cost is measured.
+The script exits non-zero if that cost exceeds its budget or if a non-UI entry
+point pulls in a forbidden module (e.g. Gradio).
+
+Usage:
+    python benchmarks/import_time.py [entry ...] [--runs 3] [--scale 1.0]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# entry point → (pre-imported dependencies, budget in seconds, forbidden modules)
+ENTRY_POINTS = {
+    "multiagent_main": (["agents", "numpy", "yaml", "dotenv"], 0.15, ["gradio"]),
+    "realtime_main": (
+        ["agents", "agents.voice", "numpy", "textual.app", "textual.widgets", "dotenv"],
+        0.2,
+        ["gradio"],
+    ),
+    "app": (["agents", "gradio", "numpy", "yaml", "dotenv"], 0.6, []),
+}
+
+_CHILD = """
+import json, sys, time
+for dep in {deps!r}:
+    __import__(dep)
+print("--- entry ---", file=sys.stderr, flush=True)
+start = time.perf_counter()
+import {entry}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "modules": sorted(sys.modules)}}))
+"""
+
+
+def measure(entry: str, deps: list[str]) -> tuple[float, list[str], list[tuple[int, str]]]:
+    env = {**os.environ, "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "sk-benchmark")}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _CHILD.format(deps=deps, entry=entry)],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    # -X importtime lines after the marker belong to the entry point itself
+    own = proc.stderr.split("--- entry ---", 1)[1]
+    breakdown = []
+    for line in own.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line.split("|")
+            if cumulative.strip().isdigit():
+                breakdown.append((int(cumulative), name.strip()))
+    return result["seconds"], result["modules"], sorted(breakdown, reverse=True)[:5]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("entries", nargs="*", default=list(ENTRY_POINTS))
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every budget")
+    args = parser.parse_args()
+
+    failed = False
+    for entry in args.entries:
+        deps, budget, forbidden = ENTRY_POINTS[entry]
+        budget *= args.scale
+        try:
+            runs = [measure(entry, deps) for _ in range(args.runs)]
+        except RuntimeError as exc:
+            print(f"❌ {entry}: import failed ({exc})")
+            failed = True
+            continue
+
+        seconds, modules, breakdown = min(runs)
+        leaked = [m for m in forbidden if m in modules]
+        ok = seconds <= budget and not leaked
+        failed |= not ok
+        print(f"{'✅' if ok else '❌'} {entry}: {seconds * 1000:.0f} ms (budget {budget * 1000:.0f} ms)")
+        if leaked:
+            print(f"   forbidden imports: {', '.join(leaked)}")
+        if not ok:
+            for micros, name in breakdown:
+                print(f"   {micros / 1000:8.1f} ms  {name}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+"""Load test for the Gradio chat handler's concurrency limits.
+
+Simulated users arrive over a ramp and each holds a short conversation with
+`app.coach_chat`, exactly as Gradio would call it (one session per user). The
+agents talk to the local OpenAI-compatible stub (`benchmarks/stub_server.py`)
+through the shared pooled client, so the run needs no network.
+
+Reports turn latency, how many turns were shed with the busy message, model
+call queueing and the model tiers served, and checks the stub never saw more
+concurrent requests than `--max-calls`. `--model-speed` gives each model tier
+its own stub speed.
+
+Usage:
+    python benchmarks/load_test.py [--users 100] [--turns 3] [--ramp 5]
+"""
+
+import os
+import sys
+import tempfile
+
+# Start from an empty reply cache so every conversation reaches the models
+os.environ["RESPONSE_CACHE_PATH"] = os.path.join(tempfile.mkdtemp(), "response_cache.sqlite")
+os.environ.setdefault("OPENAI_API_KEY", "sk-stub")
+
+import argparse
+import asyncio
+import random
+import time
+from types import SimpleNamespace
+
+import numpy as np
+from agents import set_tracing_disabled
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+from benchmarks.stub_server import StubConfig, StubServer, last_user_text, parse_model_speeds  # noqa: E402
+from custom_agents.triage_agent import match_keywords  # noqa: E402
+from workflows.concurrency import BUSY_MESSAGE, configure_model_client, model_calls  # noqa: E402
+from workflows.memory import conversation_memory  # noqa: E402
+from workflows.model_router import model_router  # noqa: E402
+from workflows.prompt_cache import prompt_cache_stats  # noqa: E402
+
+QUESTIONS = (
+    "How can I reduce my accent when pronouncing 'th'?",
+    "Tips for conquering stage fright during presentations?",
+    "How do I improve my vocal projection without straining?",
+    "Give me a tongue twister to practise Spanish rolled r sounds",
+    "How should I structure a five minute keynote?",
+    "My voice gets hoarse after long meetings, what can I do?",
+)
+
+
+async def converse(user: int, turns: int, start_at: float, results: list[tuple[str, float]]) -> None:
+    await asyncio.sleep(max(0.0, start_at - time.perf_counter()))
+    request = SimpleNamespace(session_hash=f"load-{user}")
+    history: list[dict] = []
+    rng = random.Random(user)
+    for turn in range(turns):
+        message = f"{rng.choice(QUESTIONS)} (user {user}, turn {turn})"
+        t0 = time.perf_counter()
+        last = None
+        try:
+            async for update in app.coach_chat(message, history, request):
+                last = update
+        except Exception as exc:  # noqa: BLE001
+            results.append((f"error: {type(exc).__name__}: {exc}", time.perf_counter() - t0))
+            return
+        elapsed = time.perf_counter() - t0
+        reply = last[-1] if isinstance(last, list) else last
+        if reply.content == BUSY_MESSAGE:
+            results.append(("busy", elapsed))
+            return
+        results.append(("ok", elapsed))
+        history += [
+            {"role": "user", "content": message},
+            {"role": "assistant", "content": reply.content, "metadata": None},
+        ]
+        await asyncio.sleep(rng.uniform(0.2, 1.0))  # reading / typing
+
+
+async def run(args: argparse.Namespace, server: StubServer) -> list[tuple[str, float]]:
+    configure_model_client(base_url=server.base_url, api_key="stub", max_retries=0)
+    set_tracing_disabled(True)
+    results: list[tuple[str, float]] = []
+    t0 = time.perf_counter()
+    await asyncio.gather(*(
+        converse(user, args.turns, t0 + args.ramp * user / max(1, args.users), results)
+        for user in range(args.users)
+    ))
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--turns", type=int, default=3, help="messages per user")
+    parser.add_argument("--ramp", type=float, default=5.0, help="seconds over which users arrive")
+    parser.add_argument("--latency", type=float, default=StubConfig.latency_s, help="model time to first token")
+    parser.add_argument("--tokens-per-s", type=float, default=StubConfig.tokens_per_s)
+    parser.add_argument("--max-calls", type=int, default=model_calls.max_calls)
+    parser.add_argument("--max-calls-per-user", type=int, default=model_calls.max_calls_per_user)
+    parser.add_argument("--max-turns", type=int, default=model_calls.max_turns)
+    parser.add_argument(
+        "--model-speed", action="append", default=[], metavar="MODEL=LATENCY:TOKENS_PER_S",
+        help="per-model stub speed, e.g. gpt-4.1=1.2:40 (repeatable)",
+    )
+    args = parser.parse_args()
+
+    model_calls.max_calls = args.max_calls
+    model_calls.max_calls_per_user = args.max_calls_per_user
+    model_calls.max_turns = args.max_turns
+
+    server = StubServer(
+        StubConfig(args.latency, args.tokens_per_s, model_speeds=parse_model_speeds(args.model_speed)),
+        structured=lambda body, schema: match_keywords(last_user_text(body)),
+    ).start()
+    t0 = time.perf_counter()
+    try:
+        results = asyncio.run(run(args, server))
+    finally:
+        server.stop()
+    wall = time.perf_counter() - t0
+
+    ok = [s for status, s in results if status == "ok"]
+    busy = [s for status, s in results if status == "busy"]
+    errors = [status for status, _ in results if status.startswith("error")]
+    print(f"{args.users} users × {args.turns} turns in {wall:.1f}s: "
+          f"{len(ok)} answered ({len(ok) / wall:.1f}/s), {len(busy)} shed, {len(errors)} errors")
+    if ok:
+        ms = np.array(ok) * 1000
+        print(f"turn latency: p50 {np.percentile(ms, 50):.0f} ms, p95 {np.percentile(ms, 95):.0f} ms, "
+              f"p99 {np.percentile(ms, 99):.0f} ms")
+    if busy:
+        print(f"busy reply after: max {max(busy) * 1000:.1f} ms")
+    print(f"limiter: {model_calls.stats}")
+    print(f"memory: {conversation_memory.stats}")
+    print(f"models: {model_router.stats}")
+    print(f"{prompt_cache_stats}")
+    print(f"stub: {server.requests} requests, peak {server.peak_in_flight} concurrent "
+          f"(limit {args.max_calls})")
+    for error in sorted(set(errors))[:5]:
+        print(f"  {error}")
+
+    within = server.peak_in_flight <= args.max_calls
+    print(f"{'✅' if within and not errors else '❌'} concurrency limit "
+          f"{'held' if within else 'exceeded'}")
+    return 0 if within and not errors else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
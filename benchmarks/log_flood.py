@@ -0,0 +1,124 @@
+"""Headless Textual benchmark of the conversation log under an event flood.
+
+A minimal app with the realtime app's log and level meter is driven by a
+Textual pilot (no terminal needed). Bursts of pipeline lifecycle lines and
+coach replies are written to the log while a 50 ms ticker, which stands in for
+the mic / audio callbacks sharing the event loop, measures how late it wakes.
+The same flood is then replayed against a plain unbounded `RichLog` for
+comparison. The script reports ticker lag, frame time, lines kept in memory
+and lines spilled, and exits non-zero if the p99 ticker lag with
+`ConversationLog` exceeds the budget.
+
+Usage:
+    python benchmarks/log_flood.py [--events 20000] [--max-lag-ms 50]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+from textual.app import App, ComposeResult
+from textual.widgets import RichLog
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ui.conversation_log import ConversationLog, LevelMeter  # noqa: E402
+
+TICK_S = 0.05
+BURST = 50
+REPLY = (
+    "[bold green]Voice Coach:[/] Try five minutes of lip trills before you start, then read the "
+    "opening paragraph aloud twice, slowing down at each full stop and breathing low."
+)
+
+
+class FloodApp(App[None]):
+    def __init__(self, bounded: bool, spill_path: str) -> None:
+        super().__init__()
+        self.bounded = bounded
+        self.spill_path = spill_path
+
+    def compose(self) -> ComposeResult:
+        yield LevelMeter(id="level-meter")
+        if self.bounded:
+            yield ConversationLog(id="log", wrap=True, markup=True, spill_path=self.spill_path)
+        else:
+            yield RichLog(id="log", wrap=True, markup=True)
+
+
+async def flood(bounded: bool, events: int, spill_path: str) -> dict:
+    app = FloodApp(bounded, spill_path)
+    lags: list[float] = []
+    async with app.run_test(size=(120, 40)) as pilot:
+        log = app.query_one("#log", RichLog)
+        meter = app.query_one(LevelMeter)
+        stop = asyncio.Event()
+
+        async def ticker() -> None:
+            expected = time.perf_counter() + TICK_S
+            while not stop.is_set():
+                await asyncio.sleep(max(0.0, expected - time.perf_counter()))
+                now = time.perf_counter()
+                lags.append(now - expected)
+                meter.set_level(-30.0 + 10.0 * np.sin(now))
+                expected = max(expected + TICK_S, now)
+
+        tick_task = asyncio.create_task(ticker())
+        t0 = time.perf_counter()
+        for i in range(events):
+            if i % 10 == 9:
+                log.write(REPLY)
+            else:
+                log.write(f"[italic cyan]• Pipeline:[/] {('turn_started', 'turn_ended')[i % 2]}")
+            if i % BURST == BURST - 1:
+                # A burst arrives within one event-loop turn, then the loop runs
+                await asyncio.sleep(0)
+        await pilot.pause(0.2)
+        elapsed = time.perf_counter() - t0
+        stop.set()
+        await tick_task
+        result = {
+            "elapsed_s": elapsed,
+            "lag_p50_ms": float(np.percentile(lags, 50) * 1000),
+            "lag_p99_ms": float(np.percentile(lags, 99) * 1000),
+            "lag_max_ms": float(max(lags) * 1000),
+            "lines_kept": len(log.lines),
+            "stats": getattr(log, "stats", None),
+        }
+    return result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=20_000)
+    parser.add_argument("--max-lag-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        spill_path = os.path.join(root, "transcript.log")
+        results = {}
+        for name, bounded in (("ConversationLog", True), ("RichLog", False)):
+            results[name] = r = asyncio.run(flood(bounded, args.events, spill_path))
+            print(
+                f"{name:15}: {args.events} lines in {r['elapsed_s']:.2f}s, ticker lag "
+                f"p50 {r['lag_p50_ms']:.1f} / p99 {r['lag_p99_ms']:.1f} / max {r['lag_max_ms']:.0f} ms, "
+                f"{r['lines_kept']} lines kept"
+            )
+            if r["stats"] is not None:
+                print(f"{'':15}  {r['stats']}")
+        with open(spill_path, encoding="utf-8") as fh:
+            spilled = sum(1 for _ in fh)
+        print(f"spill file: {spilled} lines")
+
+    p99 = results["ConversationLog"]["lag_p99_ms"]
+    ok = p99 <= args.max_lag_ms
+    print(f"{'✅' if ok else '❌'} p99 ticker lag {p99:.1f} ms (budget {args.max_lag_ms} ms)")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
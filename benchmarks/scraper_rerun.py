@@ -0,0 +1,139 @@
+"""Incremental scraper check against fixture pages on a local HTTP server.
+
+The pages in `benchmarks/fixtures/tongue_twister` (an index and one page per
+language, in the site's markup) are copied to a temporary directory and served
+by `http.server`, which answers `If-Modified-Since` with 304. `scrape` then
+runs three times with the same cache:
+
+1. **Cold**: every page is downloaded and parsed.
+2. **Rerun**: nothing changed, so every request gets 304 Not Modified and
+   nothing is parsed or saved.
+3. **One page edited**: only that page is downloaded and re-parsed, and only
+   its language is updated in the dataset.
+
+Every parse is counted by wrapping the scraper's parsers. The script exits
+non-zero if any run downloads, parses or updates more (or less) than that.
+
+Usage:
+    python benchmarks/scraper_rerun.py [--workers 4]
+"""
+
+import argparse
+import functools
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import data.scrapper as scrapper  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "tongue_twister")
+EDITED_PAGE = "en.htm"
+EDITED_LANGUAGE = "English"
+ADDED_TWISTER = '<p class="TXT"><a class="P">Six slippery snails slid slowly seaward.</a></p>\n'
+
+
+class FixtureHandler(SimpleHTTPRequestHandler):
+    """Static files, with every response status counted."""
+
+    statuses: Counter = Counter()
+
+    def send_response(self, code: int, message: str | None = None) -> None:
+        self.statuses[code] += 1
+        super().send_response(code, message)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+def count_calls(counts: Counter, fn):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        counts[fn.__name__] += 1
+        return fn(*args, **kwargs)
+
+    return wrapper
+
+
+def check(label: str, ok: bool, detail: str) -> bool:
+    print(f"  {'✅' if ok else '❌'} {label}: {detail}")
+    return ok
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    work = tempfile.mkdtemp()
+    site = os.path.join(work, "site")
+    shutil.copytree(FIXTURES, site)
+    # An hour old, so the edited page's new mtime is a later Last-Modified
+    old = time.time() - 3600
+    for name in os.listdir(site):
+        os.utime(os.path.join(site, name), (old, old))
+    n_pages = len(os.listdir(site))
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(FixtureHandler, directory=site))
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{httpd.server_address[1]}"
+
+    parses: Counter = Counter()
+    scrapper.parse_index = count_calls(parses, scrapper.parse_index)
+    scrapper.parse_twisters = count_calls(parses, scrapper.parse_twisters)
+    output = os.path.join(work, "tongue_twisters.json")
+    cache = os.path.join(work, "scrape_cache.sqlite")
+
+    def run(label: str) -> tuple[scrapper.ScrapeStats, bool, Counter, int]:
+        FixtureHandler.statuses.clear()
+        parses.clear()
+        start = time.perf_counter()
+        stats, changed = scrapper.scrape(base_url, output, cache, args.workers)
+        print(f"{label:18}: {stats} in {(time.perf_counter() - start) * 1000:.0f} ms")
+        return stats, changed, Counter(FixtureHandler.statuses), sum(parses.values())
+
+    ok = True
+    try:
+        stats, changed, statuses, parsed = run("cold")
+        ok &= check("downloaded", statuses[200] == n_pages, f"{statuses[200]} of {n_pages} pages")
+        ok &= check("parsed", parsed == n_pages, f"{parsed} pages")
+        ok &= check("saved", changed and len(stats.added) == n_pages - 1, f"{len(stats.added)} languages added")
+
+        stats, changed, statuses, parsed = run("rerun")
+        ok &= check("304 Not Modified", statuses[304] == n_pages, f"{statuses[304]} of {n_pages} pages")
+        ok &= check("parsed", parsed == 0, f"{parsed} pages")
+        ok &= check("saved", not changed, "dataset untouched" if not changed else "dataset rewritten")
+
+        path = os.path.join(site, EDITED_PAGE)
+        with open(path, encoding="utf-8") as fh:
+            html = fh.read()
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write(html.replace("</body>", f"{ADDED_TWISTER}</body>"))
+        stats, changed, statuses, parsed = run(f"{EDITED_PAGE} edited")
+        ok &= check(
+            "downloaded", statuses[200] == 1 and statuses[304] == n_pages - 1,
+            f"{statuses[200]} page, {statuses[304]} answered 304",
+        )
+        ok &= check("parsed", parsed == 1, f"{parsed} page")
+        ok &= check(
+            "saved", changed and stats.updated == [EDITED_LANGUAGE] and not stats.added,
+            f"updated {', '.join(stats.updated) or 'nothing'}",
+        )
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+        shutil.rmtree(work, ignore_errors=True)
+
+    print(f"{'✅' if ok else '❌'} reruns only fetch and parse what changed")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
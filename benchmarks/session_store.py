@@ -0,0 +1,108 @@
+"""Write and query benchmark for the session store.
+
+A temporary store is filled with several users' sessions (synthetic speech per
+turn, measured by `StreamingAnalyzer`), then the script times recording a turn,
+a user's trend query over the last sessions, memory-mapped reads of a turn's
+audio and a compaction pass. It exits non-zero if the p99 trend query is slower
+than the budget, which is what the coaches' `get_progress_trends` tool waits on.
+
+Usage:
+    python benchmarks/session_store.py [--users 10] [--sessions 40] [--max-query-ms 5]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio.analysis import StreamingAnalyzer  # noqa: E402
+from benchmarks.synthetic_speech import SAMPLE_RATE, synthetic_voice  # noqa: E402
+from data.session_store import SessionStore  # noqa: E402
+
+TURN_S = 2.0
+_DAY_S = 86_400.0
+
+
+def percentile_ms(samples: list[float], q: float) -> float:
+    return float(np.percentile(samples, q) * 1000)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--sessions", type=int, default=40, help="sessions per user")
+    parser.add_argument("--turns", type=int, default=10, help="turns per session")
+    parser.add_argument("--last", type=int, default=5, help="sessions per trend query")
+    parser.add_argument("--max-query-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    # A few distinct utterances, measured once and reused across turns
+    utterances = []
+    for _ in range(8):
+        samples, _ = synthetic_voice(TURN_S, rng)
+        analyzer = StreamingAnalyzer(SAMPLE_RATE)
+        analyzer.process(samples)
+        utterances.append((analyzer.finish(), samples))
+
+    with tempfile.TemporaryDirectory() as root:
+        store = SessionStore(root)
+        now = time.time()
+        record_s = []
+        for session in range(args.sessions):
+            for user in range(args.users):
+                recording = store.open_session(f"user{user}", SAMPLE_RATE)
+                # Spread sessions over the past year, oldest first
+                recording.started = now - (args.sessions - session) * 365 * _DAY_S / args.sessions
+                for turn in range(args.turns):
+                    summary, samples = utterances[(session + turn) % len(utterances)]
+                    t0 = time.perf_counter()
+                    recording.record(f"turn {turn}", "voice_coach", summary, samples)
+                    record_s.append(time.perf_counter() - t0)
+        turns = len(record_s)
+        size = sum(
+            os.path.getsize(os.path.join(path, name)) for path, _, names in os.walk(root) for name in names
+        )
+        print(
+            f"{args.users} users × {args.sessions} sessions × {args.turns} turns of {TURN_S:.0f}s "
+            f"= {turns} turns, {size / 1e6:.0f} MB on disk"
+        )
+        print(f"record: p50 {percentile_ms(record_s, 50):.2f} ms, p99 {percentile_ms(record_s, 99):.2f} ms per turn")
+
+        query_s = []
+        for i in range(500):
+            t0 = time.perf_counter()
+            report = store.trends(f"user{i % args.users}", args.last)
+            query_s.append(time.perf_counter() - t0)
+        assert report["available"] and report["sessions"] == min(args.last, args.sessions)
+        p99 = percentile_ms(query_s, 99)
+        print(f"trends over the last {args.last} sessions: p50 {percentile_ms(query_s, 50):.2f} ms, p99 {p99:.2f} ms")
+
+        read_s = []
+        for i in range(200):
+            t0 = time.perf_counter()
+            audio = store.read_audio(1 + i * (turns // 200))
+            float(np.abs(audio).mean())
+            read_s.append(time.perf_counter() - t0)
+        print(f"mmap read of one turn's audio: p50 {percentile_ms(read_s, 50):.2f} ms")
+
+        t0 = time.perf_counter()
+        removed = store.compact(now=now)
+        print(
+            f"compact: {removed['audio_files']} audio files ({removed['audio_bytes'] / 1e6:.0f} MB) and "
+            f"{removed['sessions']} sessions removed in {time.perf_counter() - t0:.2f}s"
+        )
+        store.close()
+
+    ok = p99 <= args.max_query_ms
+    print(f"{'✅' if ok else '❌'} p99 trend query {p99:.2f} ms (budget {args.max_query_ms} ms)")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
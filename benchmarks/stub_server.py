@@ -0,0 +1,483 @@
+"""Local OpenAI-compatible stub for offline benchmarks.
+
+Serves the two endpoints the agents and the voice pipeline call over HTTP:
+
+* `POST /v1/responses`: model replies, streamed (SSE) or not, after a
+  configurable first-token latency and at a configurable token rate, which
+  can differ per model (to exercise model tiering). Requests with a JSON-schema
+  output format get a JSON object from `structured`. Usage reports cached input
+  tokens the way provider prompt caching would: 128-token blocks of a prefix
+  (tools, instructions, input) already seen for the same model and
+  `prompt_cache_key`, once at least `cache_min_tokens` match. Faults can be
+  injected: a share of requests answered with a 500 (`fail_rate`) or held for
+  `stall_s` before the first token (`stall_rate`), and whole models made to
+  fail every request (`failing_models`), as in a provider outage.
+* `POST /v1/audio/speech`: PCM speech (24 kHz int16) whose length follows the
+  input text, produced at a multiple of real time after a first-chunk latency.
+
+Live transcription uses a realtime websocket, so instead of emulating it over
+the wire `StubSTTModel` plugs into `VoicePipeline` directly: it endpoints the
+incoming audio with the app's own VAD and returns scripted transcripts after a
+configurable latency.
+
+Usage (standalone):
+    python benchmarks/stub_server.py [--port 8765] [--latency 0.3] [--tokens-per-s 80]
+        [--fail-rate 0.05] [--stall-rate 0.05 --stall 10] [--fail-model gpt-4.1]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import itertools
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections.abc import AsyncIterator, Callable, Iterable
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+from agents.voice import STTModel, StreamedAudioInput, StreamedTranscriptionSession
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio.vad import SPEECH_END, StreamingVAD  # noqa: E402
+
+TTS_SAMPLE_RATE = 24_000
+SENTENCE_WORDS = 12
+CACHE_BLOCK_TOKENS = 128
+_WORDS = (
+    "keep your breath low and steady then let the phrase ride on the exhale "
+    "open the vowels relax the jaw and land the final consonant clearly"
+).split()
+
+
+@dataclass
+class StubConfig:
+    latency_s: float = 0.3  # time to first token
+    tokens_per_s: float = 80.0
+    reply_tokens: int = 60
+    tts_latency_s: float = 0.15  # time to first audio chunk
+    tts_speed: float = 4.0  # audio produced per wall-clock second
+    chars_per_s: float = 14.0  # speaking rate of the synthesised audio
+    rate_limit_every: int = 0  # answer every Nth request with a 429 (0: never)
+    retry_after_s: float = 0.2
+    cache_min_tokens: int = 1024  # shortest prefix that is served from the prompt cache
+    # model name → (latency_s, tokens_per_s), overriding the two defaults above
+    model_speeds: dict[str, tuple[float, float]] = field(default_factory=dict)
+    fail_rate: float = 0.0  # share of model requests answered with a 500
+    stall_rate: float = 0.0  # share of model requests held for `stall_s` before replying
+    stall_s: float = 10.0
+    failing_models: set[str] = field(default_factory=set)  # models down for every request
+    seed: int = 0
+
+    def speed(self, model: str | None) -> tuple[float, float]:
+        return self.model_speeds.get(model or "", (self.latency_s, self.tokens_per_s))
+
+
+def _fill_schema(schema: dict) -> object:
+    """Smallest value matching a JSON schema (enough for Pydantic outputs)."""
+    kind = schema.get("type")
+    if "enum" in schema:
+        return schema["enum"][0]
+    if kind == "object":
+        return {name: _fill_schema(sub) for name, sub in schema.get("properties", {}).items()}
+    if kind == "array":
+        return []
+    return {"string": "stub", "number": 1.0, "integer": 1, "boolean": True}.get(kind)
+
+
+def last_user_text(body: dict) -> str:
+    items = body.get("input")
+    if isinstance(items, str):
+        return items
+    for item in reversed(items or []):
+        if item.get("role") != "user":
+            continue
+        content = item.get("content")
+        if isinstance(content, str):
+            return content
+        return " ".join(part.get("text", "") for part in content or [])
+    return ""
+
+
+class StubServer:
+    """OpenAI-compatible HTTP stub running on a background thread."""
+
+    def __init__(
+        self,
+        config: StubConfig | None = None,
+        structured: Callable[[dict, dict], dict] | None = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        self.config = config or StubConfig()
+        # (request body, output schema) → JSON object for structured outputs
+        self.structured = structured or (lambda body, schema: _fill_schema(schema))
+        self.requests = 0
+        # Requests being answered right now, and the most seen at once
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.rate_limited = 0
+        self.failed = 0
+        self.stalled = 0
+        self._rng = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        # Hashes of every request prefix seen, in CACHE_BLOCK_TOKENS steps
+        self._prefixes: set[str] = set()
+        self._ids = itertools.count(1)
+        self._httpd = ThreadingHTTPServer((host, port), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    # -------------------- replies --------------------
+
+    def _fault(self, model: str | None) -> str | None:
+        """`"fail"`, `"stall"` or None for a model request, per the fault settings."""
+        config = self.config
+        with self._lock:
+            if model in config.failing_models or self._rng.random() < config.fail_rate:
+                self.failed += 1
+                return "fail"
+            if self._rng.random() < config.stall_rate:
+                self.stalled += 1
+                return "stall"
+        return None
+
+    def _reply_text(self, body: dict) -> str:
+        fmt = (body.get("text") or {}).get("format") or {}
+        if fmt.get("type") == "json_schema":
+            return json.dumps(self.structured(body, fmt.get("schema", {})))
+        words = list(itertools.islice(itertools.cycle(_WORDS), self.config.reply_tokens))
+        sentences = [words[i:i + SENTENCE_WORDS] for i in range(0, len(words), SENTENCE_WORDS)]
+        return " ".join(" ".join(sentence).capitalize() + "." for sentence in sentences)
+
+    def _prompt_tokens(self, body: dict) -> tuple[int, int]:
+        """`(input_tokens, cached_tokens)` of a request, at ~4 characters per token."""
+        rendered = json.dumps(
+            [body.get("tools") or [], body.get("instructions") or "", body.get("input", "")],
+            ensure_ascii=False,
+        )
+        block = 4 * CACHE_BLOCK_TOKENS
+        digest = hashlib.sha256(f"{body.get('model')}\0{body.get('prompt_cache_key')}".encode())
+        matched = 0
+        with self._lock:
+            for start in range(0, len(rendered) - block + 1, block):
+                digest.update(rendered[start:start + block].encode())
+                key = digest.hexdigest()
+                if matched * block == start and key in self._prefixes:
+                    matched += 1
+                else:
+                    self._prefixes.add(key)
+        cached = matched * CACHE_BLOCK_TOKENS
+        return len(rendered) // 4, cached if cached >= self.config.cache_min_tokens else 0
+
+    def _response(self, body: dict, text: str, status: str, prompt: tuple[int, int]) -> dict:
+        n = next(self._ids)
+        output_tokens = len(text.split())
+        input_tokens, cached_tokens = prompt
+        return {
+            "id": f"resp_{n}",
+            "object": "response",
+            "created_at": int(time.time()),
+            "model": body.get("model", "stub"),
+            "status": status,
+            "output": [self._message(n, text, status)] if status == "completed" else [],
+            "parallel_tool_calls": True,
+            "tool_choice": "auto",
+            "tools": [],
+            "usage": {
+                "input_tokens": input_tokens,
+                "input_tokens_details": {"cached_tokens": cached_tokens},
+                "output_tokens": output_tokens,
+                "output_tokens_details": {"reasoning_tokens": 0},
+                "total_tokens": input_tokens + output_tokens,
+            },
+        }
+
+    @staticmethod
+    def _message(n: int, text: str, status: str) -> dict:
+        return {
+            "id": f"msg_{n}",
+            "type": "message",
+            "role": "assistant",
+            "status": status,
+            "content": [{"type": "output_text", "text": text, "annotations": []}] if text else [],
+        }
+
+    def _stream_events(self, body: dict) -> Iterable[tuple[str, dict]]:
+        """Yield `(event, payload)` pairs, sleeping to honour latency and rate."""
+        text = self._reply_text(body)
+        prompt = self._prompt_tokens(body)
+        response = self._response(body, text, "in_progress", prompt)
+        item_id = f"msg_{response['id'][5:]}"
+        latency_s, tokens_per_s = self.config.speed(body.get("model"))
+        yield "response.created", {"response": response}
+        time.sleep(latency_s)
+        yield "response.output_item.added", {
+            "output_index": 0,
+            "item": self._message(int(item_id[4:]), "", "in_progress"),
+        }
+        yield "response.content_part.added", {
+            "item_id": item_id,
+            "output_index": 0,
+            "content_index": 0,
+            "part": {"type": "output_text", "text": "", "annotations": []},
+        }
+        interval = 1.0 / tokens_per_s if tokens_per_s else 0.0
+        for i, token in enumerate(text.split(" ")):
+            if i:
+                time.sleep(interval)
+            yield "response.output_text.delta", {
+                "item_id": item_id,
+                "output_index": 0,
+                "content_index": 0,
+                "delta": token if i == 0 else " " + token,
+                "logprobs": [],
+            }
+        part = {"type": "output_text", "text": text, "annotations": []}
+        common = {"item_id": item_id, "output_index": 0, "content_index": 0}
+        yield "response.output_text.done", {**common, "text": text, "logprobs": []}
+        yield "response.content_part.done", {**common, "part": part}
+        done = self._response(body, text, "completed", prompt)
+        done["id"] = response["id"]
+        done["output"][0]["id"] = item_id
+        yield "response.output_item.done", {"output_index": 0, "item": done["output"][0]}
+        yield "response.completed", {"response": done}
+
+    def _speech(self, text: str) -> Iterable[bytes]:
+        """PCM for `text`: a gliding tone as long as the text takes to say."""
+        seconds = max(0.3, len(text) / self.config.chars_per_s)
+        t = np.arange(int(seconds * TTS_SAMPLE_RATE)) / TTS_SAMPLE_RATE
+        pcm = (0.2 * np.sin(2 * np.pi * (180 + 20 * np.sin(3 * t)) * t) * 32767).astype(np.int16)
+        time.sleep(self.config.tts_latency_s)
+        block = TTS_SAMPLE_RATE // 10
+        for start in range(0, len(pcm), block):
+            if start and self.config.tts_speed:
+                time.sleep(0.1 / self.config.tts_speed)
+            yield pcm[start:start + block].tobytes()
+
+    # -------------------- HTTP --------------------
+
+    def _handler(self) -> type[BaseHTTPRequestHandler]:
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.0"  # close after each reply; no chunking needed
+
+            def log_message(self, *args) -> None:
+                pass
+
+            def do_POST(self) -> None:
+                with stub._lock:
+                    stub.requests += 1
+                    stub.in_flight += 1
+                    stub.peak_in_flight = max(stub.peak_in_flight, stub.in_flight)
+                    every = stub.config.rate_limit_every
+                    limited = bool(every) and stub.requests % every == 0
+                try:
+                    if limited:
+                        stub.rate_limited += 1
+                        self._send_json(
+                            {"error": {"message": "stub: rate limit reached", "type": "requests"}},
+                            429,
+                            {"Retry-After-Ms": str(int(stub.config.retry_after_s * 1000))},
+                        )
+                        return
+                    self._post()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # the client cancelled the run (e.g. a discarded speculative start)
+                finally:
+                    with stub._lock:
+                        stub.in_flight -= 1
+
+            def _post(self) -> None:
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                if self.path.endswith("/responses"):
+                    fault = stub._fault(body.get("model"))
+                    if fault == "fail":
+                        self._send_json(
+                            {"error": {"message": "stub: injected server error", "type": "server_error"}}, 500
+                        )
+                        return
+                    if fault == "stall":
+                        time.sleep(stub.config.stall_s)
+                    if body.get("stream"):
+                        self._send_headers("text/event-stream")
+                        for seq, (event, payload) in enumerate(stub._stream_events(body)):
+                            data = json.dumps({"type": event, "sequence_number": seq, **payload})
+                            self.wfile.write(f"event: {event}\ndata: {data}\n\n".encode())
+                            self.wfile.flush()
+                    else:
+                        events = list(stub._stream_events(body))
+                        self._send_json(events[-1][1]["response"])
+                elif self.path.endswith("/audio/speech"):
+                    self._send_headers("application/octet-stream")
+                    for chunk in stub._speech(body.get("input", "")):
+                        self.wfile.write(chunk)
+                        self.wfile.flush()
+                else:
+                    self._send_json({"error": {"message": f"stub: no route for {self.path}"}}, 404)
+
+            def _send_headers(self, content_type: str, code: int = 200) -> None:
+                self.send_response(code)
+                self.send_header("Content-Type", content_type)
+                self.end_headers()
+
+            def _send_json(self, payload: dict, code: int = 200, headers: dict | None = None) -> None:
+                data = json.dumps(payload).encode()
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+
+# ---------------------------------------------------------------------------
+# Speech-to-text stub (plugs into VoicePipeline directly)
+# ---------------------------------------------------------------------------
+
+class StubTranscriptionSession(StreamedTranscriptionSession):
+    """Endpoint incoming audio with the app's VAD and emit scripted transcripts."""
+
+    def __init__(
+        self,
+        audio: StreamedAudioInput,
+        transcripts: Iterable[str],
+        latency_s: float,
+        sample_rate: int,
+        chunk_length_s: float,
+        on_speech_end: Callable[[], None] | None,
+    ) -> None:
+        self._audio = audio
+        self._transcripts = iter(transcripts)
+        self._latency_s = latency_s
+        self._on_speech_end = on_speech_end
+        self._vad = StreamingVAD(sample_rate, chunk_length_s)
+
+    async def transcribe_turns(self) -> AsyncIterator[str]:
+        while (chunk := await self._audio.queue.get()) is not None:
+            _, event = self._vad.process(chunk)
+            if event != SPEECH_END:
+                continue
+            if self._on_speech_end is not None:
+                self._on_speech_end()
+            await asyncio.sleep(self._latency_s)
+            yield next(self._transcripts, "")
+
+    async def close(self) -> None:
+        pass
+
+
+class StubSTTModel(STTModel):
+    """Scripted speech-to-text: transcript N is returned for the Nth utterance."""
+
+    def __init__(
+        self,
+        transcripts: Iterable[str],
+        latency_s: float = 0.2,
+        sample_rate: int = 24_000,
+        chunk_length_s: float = 0.05,
+        on_speech_end: Callable[[], None] | None = None,
+    ) -> None:
+        self.transcripts = transcripts
+        self.latency_s = latency_s
+        self.sample_rate = sample_rate
+        self.chunk_length_s = chunk_length_s
+        self.on_speech_end = on_speech_end
+
+    @property
+    def model_name(self) -> str:
+        return "stub-stt"
+
+    async def transcribe(self, input, settings, trace_include_sensitive_data, trace_include_sensitive_audio_data):
+        await asyncio.sleep(self.latency_s)
+        return next(iter(self.transcripts), "")
+
+    async def create_session(self, input, settings, trace_include_sensitive_data, trace_include_sensitive_audio_data):
+        return StubTranscriptionSession(
+            input, self.transcripts, self.latency_s, self.sample_rate, self.chunk_length_s, self.on_speech_end
+        )
+
+
+def parse_model_speeds(specs: Iterable[str]) -> dict[str, tuple[float, float]]:
+    """`["gpt-4.1=1.2:40", ...]` → `{"gpt-4.1": (1.2, 40.0)}`."""
+    speeds = {}
+    for spec in specs:
+        model, _, speed = spec.partition("=")
+        latency, _, rate = speed.partition(":")
+        speeds[model.strip()] = (float(latency), float(rate or StubConfig.tokens_per_s))
+    return speeds
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=StubConfig.latency_s, help="seconds to first token")
+    parser.add_argument("--tokens-per-s", type=float, default=StubConfig.tokens_per_s)
+    parser.add_argument("--reply-tokens", type=int, default=StubConfig.reply_tokens)
+    parser.add_argument("--tts-latency", type=float, default=StubConfig.tts_latency_s)
+    parser.add_argument("--rate-limit-every", type=int, default=0, help="send a 429 every N requests")
+    parser.add_argument(
+        "--model-speed", action="append", default=[], metavar="MODEL=LATENCY:TOKENS_PER_S",
+        help="per-model speed, e.g. gpt-4.1=1.2:40 (repeatable)",
+    )
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="share of model requests answered with a 500")
+    parser.add_argument("--stall-rate", type=float, default=0.0, help="share of model requests that stall")
+    parser.add_argument("--stall", type=float, default=StubConfig.stall_s, help="seconds a stalled request hangs")
+    parser.add_argument(
+        "--fail-model", action="append", default=[], metavar="MODEL",
+        help="model whose every request fails, as in an outage (repeatable)",
+    )
+    args = parser.parse_args()
+
+    config = StubConfig(
+        args.latency, args.tokens_per_s, args.reply_tokens, args.tts_latency,
+        rate_limit_every=args.rate_limit_every,
+        model_speeds=parse_model_speeds(args.model_speed),
+        fail_rate=args.fail_rate,
+        stall_rate=args.stall_rate,
+        stall_s=args.stall,
+        failing_models=set(args.fail_model),
+    )
+    from custom_agents.triage_agent import match_keywords
+
+    def structured(body: dict, schema: dict) -> object:
+        # Route triage like `select_agent` would, so the apps can run against the stub
+        if "selected_agent" in schema.get("properties", {}):
+            return match_keywords(last_user_text(body))
+        return _fill_schema(schema)
+
+    server = StubServer(config, structured, host=args.host, port=args.port)
+    print(f"Stub OpenAI API on {server.base_url} (Ctrl-C to stop)")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
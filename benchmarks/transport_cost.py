@@ -0,0 +1,104 @@
+"""CPU and bandwidth benchmark for the upstream audio transport.
+
+Synthetic speech is sent through `AudioTransport` (resample → encode → decode
+→ resample back) in 50 ms chunks on a single core, for each wire rate and
+codec. The script reports the wire bandwidth, CPU time per second of audio,
+added delay and the speech-band SNR of the round trip, and exits non-zero if
+the configured transport costs more CPU than the budget.
+
+Usage:
+    python benchmarks/transport_cost.py [--seconds 60] [--max-cpu-ms 10]
+"""
+
+import os
+
+# One core: keep NumPy's BLAS / FFT backends from spreading out
+for var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+    os.environ.setdefault(var, "1")
+
+import argparse
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio.transport import AUDIO_TRANSPORT_CODEC, AUDIO_TRANSPORT_RATE, AudioTransport  # noqa: E402
+from benchmarks.synthetic_speech import SAMPLE_RATE, synthetic_voice  # noqa: E402
+
+CHUNK_LENGTH_S = 0.05
+# Band the SNR is measured in (what transcription relies on)
+SPEECH_BAND_HZ = (80.0, 6000.0)
+CONFIGS = (
+    (24_000, "pcm16"),
+    (24_000, "mulaw"),
+    (16_000, "pcm16"),
+    (16_000, "mulaw"),
+)
+
+
+def band(samples: np.ndarray, advance_s: float = 0.0) -> np.ndarray:
+    """Speech-band part of `samples`, shifted earlier by a (fractional) delay."""
+    spectrum = np.fft.rfft(samples)
+    freqs = np.fft.rfftfreq(len(samples), 1 / SAMPLE_RATE)
+    spectrum[(freqs < SPEECH_BAND_HZ[0]) | (freqs > SPEECH_BAND_HZ[1])] = 0
+    spectrum *= np.exp(2j * np.pi * freqs * advance_s)
+    return np.fft.irfft(spectrum, len(samples))
+
+
+def speech_snr_db(reference: np.ndarray, received: np.ndarray, delay_s: float) -> float:
+    """SNR of the round trip within the speech band, after removing the delay."""
+    ref = band(reference.astype(np.float64))
+    out = band(received.astype(np.float64), delay_s)
+    # Skip the edges, where the circular shift wraps around
+    edge = int(0.1 * SAMPLE_RATE)
+    noise = (out - ref)[edge:-edge]
+    ref = ref[edge:-edge]
+    return float(10 * np.log10(np.sum(ref ** 2) / max(np.sum(noise ** 2), 1e-9)))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=60.0)
+    parser.add_argument("--max-cpu-ms", type=float, default=10.0,
+                        help="CPU ms per audio second for the configured transport")
+    args = parser.parse_args()
+
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, {min(os.sched_getaffinity(0))})
+
+    samples, _ = synthetic_voice(args.seconds, np.random.default_rng(0))
+    chunk = int(SAMPLE_RATE * CHUNK_LENGTH_S)
+    chunks = [samples[i:i + chunk].reshape(-1, 1) for i in range(0, len(samples) - chunk + 1, chunk)]
+    raw_rate = SAMPLE_RATE * 2 / 1000
+
+    print(f"{args.seconds:.0f}s of speech in {len(chunks)} × {CHUNK_LENGTH_S * 1000:.0f} ms chunks "
+          f"(raw PCM {raw_rate:.0f} KB/s)")
+    configured_cpu_ms = None
+    for rate, codec in CONFIGS:
+        transport = AudioTransport(SAMPLE_RATE, rate, codec, session=f"bench-{rate}-{codec}")
+        received = np.concatenate([transport.relay(c) for c in chunks]).ravel()
+        stats = transport.stats
+        cpu_ms = stats.cpu_per_audio_s * 1000
+        snr = speech_snr_db(samples[: len(received)], received, transport.delay_s)
+        configured = (rate, codec) == (AUDIO_TRANSPORT_RATE, AUDIO_TRANSPORT_CODEC)
+        if configured:
+            configured_cpu_ms = cpu_ms
+        print(
+            f"{'→' if configured else ' '} {rate // 1000} kHz {codec:5}: "
+            f"{stats.wire_bytes / stats.audio_s / 1000:5.1f} KB/s ({stats.ratio:4.0%}), "
+            f"CPU {cpu_ms:5.2f} ms/s (encode {stats.encode_s / stats.audio_s * 1000:.2f}, "
+            f"decode {stats.decode_s / stats.audio_s * 1000:.2f}), "
+            f"delay {transport.delay_s * 1000:.1f} ms, speech-band SNR {snr:.1f} dB"
+        )
+
+    if configured_cpu_ms is None:
+        print(f"configured transport ({AUDIO_TRANSPORT_RATE} Hz, {AUDIO_TRANSPORT_CODEC}) not benchmarked")
+        return 0
+    ok = configured_cpu_ms <= args.max_cpu_ms
+    print(f"{'✅' if ok else '❌'} {configured_cpu_ms:.2f} ms CPU per audio second (budget {args.max_cpu_ms} ms)")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
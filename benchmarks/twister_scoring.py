@@ -0,0 +1,135 @@
+"""Benchmark of local pronunciation scoring over the whole twister corpus.
+
+Every entry of `tongue_twisters.json` (all languages) gets a simulated
+transcription of a spoken attempt. Words are dropped, misheard (one letter
+swapped for another of the same language) or padded with a filler, at the
+given rates. Each attempt is scored with `score_attempt`. The script reports
+the time per attempt overall and by entry length, and how often the scorer
+finds exactly as many errors as were injected. Alignment is minimum-edit, so
+it can only find fewer. A few hand-written attempts with a known best
+alignment (e.g. "peppers" heard as "pepper please" is a near miss plus an
+inserted word) are checked first. It exits non-zero if one of them is marked
+differently or the p99 time per attempt exceeds the budget.
+
+Usage:
+    python benchmarks/twister_scoring.py [--error-rate 0.1] [--max-ms 5]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from custom_agents.pronunciation import score_attempt, tokenize  # noqa: E402
+from data.twister_store import TWISTERS_PATH  # noqa: E402
+
+FILLER = "um"
+LENGTH_BUCKETS = (10, 25, 50, 100, 200)
+# (target, transcription, expected highlighted target)
+CASES = (
+    (
+        "Peter Piper picked a peck of pickled peppers",
+        "Peter Piper picked a peck of pickled pepper please",
+        "Peter Piper picked a peck of pickled [peppers→pepper] [+please]",
+    ),
+    (
+        "She sells seashells by the seashore",
+        "She sells sea shells by the seashore",
+        "She sells [+sea] [seashells→shells] by the seashore",
+    ),
+)
+
+
+def simulate(
+    text: str, alphabet: list[str], error_rate: float, insert_rate: float, rng: np.random.Generator
+) -> tuple[str, int]:
+    """A transcription of `text` with injected errors, and how many were injected."""
+    words, injected = [], 0
+    for word, _, _ in tokenize(text):
+        roll = rng.random()
+        if roll < error_rate / 2:
+            injected += 1  # dropped
+        elif roll < error_rate:
+            i = int(rng.integers(len(word)))
+            swapped = [c for c in alphabet if c != word[i]]
+            words.append(word[:i] + swapped[int(rng.integers(len(swapped)))] + word[i + 1:])
+            injected += 1
+        else:
+            words.append(word)
+        if rng.random() < insert_rate:
+            words.append(FILLER)
+            injected += 1
+    return " ".join(words), injected
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--error-rate", type=float, default=0.1, help="share of words dropped or misheard")
+    parser.add_argument("--insert-rate", type=float, default=0.03, help="fillers per word")
+    parser.add_argument("--wpm", type=float, default=150.0, help="speaking rate of the simulated attempts")
+    parser.add_argument("--max-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    with open(TWISTERS_PATH, encoding="utf-8") as fh:
+        db = json.load(fh)
+    rng = np.random.default_rng(0)
+    score_attempt("warm up", "warm up")  # builds the tokenizer
+
+    cases_ok = True
+    for target, attempt, expected in CASES:
+        highlighted = score_attempt(target, attempt)["highlighted"]
+        if highlighted != expected:
+            cases_ok = False
+            print(f"❌ {attempt!r}: {highlighted!r}, expected {expected!r}")
+    print(f"{'✅' if cases_ok else '❌'} {len(CASES)} known alignments")
+
+    times, lengths, exact, found, injected_total = [], [], 0, 0, 0
+    for language, twisters in db.items():
+        # Letters seen in the language's twisters, to mishear words with
+        alphabet = sorted({c for text in twisters for word, _, _ in tokenize(text) for c in word if c.isalpha()})
+        for text in twisters:
+            attempt, injected = simulate(text, alphabet, args.error_rate, args.insert_rate, rng)
+            n_words = len(tokenize(text))
+            t0 = time.perf_counter()
+            result = score_attempt(text, attempt, n_words / args.wpm * 60)
+            elapsed = time.perf_counter() - t0
+            if not result["available"]:
+                continue  # nothing to compare against (punctuation only)
+            times.append(elapsed)
+            errors = sum(result["words"][k] for k in ("substituted", "dropped", "inserted"))
+            lengths.append(n_words)
+            exact += errors == injected
+            found += errors
+            injected_total += injected
+
+    ms = np.array(times) * 1000
+    lengths_arr = np.array(lengths)
+    print(
+        f"{len(times)} twisters in {len(db)} languages, {lengths_arr.sum()} words "
+        f"(longest {lengths_arr.max()}), scored in {ms.sum() / 1000:.2f}s"
+    )
+    print(f"per attempt: p50 {np.percentile(ms, 50):.3f} ms, p99 {np.percentile(ms, 99):.3f} ms, max {ms.max():.2f} ms")
+    lower = 0
+    for upper in (*LENGTH_BUCKETS, lengths_arr.max()):
+        in_bucket = (lengths_arr > lower) & (lengths_arr <= upper)
+        if in_bucket.any():
+            print(f"  {lower + 1:>4}–{upper:<4} words: {in_bucket.sum():5} twisters, mean {ms[in_bucket].mean():.3f} ms")
+        lower = upper
+    print(
+        f"errors: {injected_total} injected, {found} found; exact count on "
+        f"{exact / len(lengths):.1%} of attempts"
+    )
+
+    p99 = float(np.percentile(ms, 99))
+    ok = p99 <= args.max_ms
+    print(f"{'✅' if ok else '❌'} p99 {p99:.3f} ms per attempt (budget {args.max_ms} ms)")
+    return 0 if ok and cases_ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,320 @@
+"""Offline end-to-end latency benchmark for the voice pipeline.
+
+User turns (WAV files, or synthetic speech for the user lines of
+`data/mock_dialogue.json`) are fed into `StreamedAudioInput` in 50 ms chunks
+at real-time or accelerated pace. The agents and TTS talk to a local
+OpenAI-compatible stub (`benchmarks/stub_server.py`) and transcription is
+scripted, so the run needs no mic, speakers or network.
+
+Each turn is timed stage by stage:
+
+    end of speech → transcript → triage → specialist first token → first audio out
+
+Results are appended to a local JSONL history (not committed) and compared
+with the committed baseline for the same configuration, or with the previous
+local run when there is none; `--max-regression` turns a slowdown into a
+non-zero exit. After an intended change in latency, `--update-baseline`
+replaces the configuration's baseline record, to be committed with the change.
+
+Usage:
+    python benchmarks/voice_replay.py [--turns 4] [--speed 1] [--update-baseline] [wav ...]
+"""
+
+import os
+import sys
+import tempfile
+
+# Start from an empty reply cache so every turn takes the cold path
+os.environ["RESPONSE_CACHE_PATH"] = os.path.join(tempfile.mkdtemp(), "response_cache.sqlite")
+os.environ.setdefault("OPENAI_API_KEY", "sk-stub")
+
+import argparse
+import asyncio
+import json
+import subprocess
+import time
+import wave
+from dataclasses import dataclass, field
+
+import numpy as np
+from openai import AsyncOpenAI
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from agents import set_default_openai_client, set_tracing_disabled  # noqa: E402
+from agents.voice import (  # noqa: E402
+    OpenAITTSModel,
+    StreamedAudioInput,
+    TTSModelSettings,
+    VoicePipeline,
+    VoicePipelineConfig,
+    VoiceWorkflowBase,
+    VoiceWorkflowHelper,
+)
+
+from benchmarks.stub_server import StubConfig, StubServer, StubSTTModel, last_user_text  # noqa: E402
+from benchmarks.synthetic_speech import SAMPLE_RATE, silence, utterance  # noqa: E402
+from custom_agents.triage_agent import match_keywords  # noqa: E402
+from workflows.model_router import model_router  # noqa: E402
+from workflows.response_cache import response_cache, run_streamed_cached  # noqa: E402
+from workflows.speculative import speculative_router  # noqa: E402
+
+CHUNK_LENGTH_S = 0.05
+STAGES = ("stt", "triage", "specialist", "tts", "total")
+RESULTS_PATH = os.path.join(ROOT, "benchmarks", "results", "voice_replay.jsonl")
+BASELINE_PATH = os.path.join(ROOT, "benchmarks", "results", "voice_replay_baseline.jsonl")
+
+
+@dataclass
+class Turn:
+    transcript: str
+    audio: np.ndarray
+    speech_end: float = 0.0
+    transcribed: float = 0.0
+    triaged: float = 0.0
+    first_token: float = 0.0
+    first_audio: float = 0.0
+    agent: str = ""
+    fast_path: bool = False
+    # Set once the reply has been fully synthesised
+    done: asyncio.Event = field(default_factory=asyncio.Event)
+
+    def stages(self) -> dict[str, float]:
+        """Stage durations in seconds (each measured from the previous stage)."""
+        return {
+            "stt": self.transcribed - self.speech_end,
+            "triage": self.triaged - self.transcribed,
+            "specialist": self.first_token - self.triaged,
+            "tts": self.first_audio - self.first_token,
+            "total": self.first_audio - self.speech_end,
+        }
+
+
+class ReplayWorkflow(VoiceWorkflowBase):
+    """Triage, then speak the specialist's streamed reply, timing each step."""
+
+    def __init__(self, turns: list[Turn]) -> None:
+        self.turns = turns
+        self.index = -1
+
+    async def run(self, transcription: str):
+        self.index += 1
+        turn = self.turns[self.index]
+        turn.transcribed = time.perf_counter()
+        fast_hits = speculative_router.classifier.stats.fast_hits
+        routed = await speculative_router.run(
+            transcription,
+            lambda key, tier: run_streamed_cached(key, model_router.agent(key, tier), transcription),
+            cancel=lambda run: run.cancel(),
+        )
+        turn.triaged = time.perf_counter()
+        turn.agent = routed.triage.selected_agent
+        turn.fast_path = speculative_router.classifier.stats.fast_hits > fast_hits
+        async for chunk in VoiceWorkflowHelper.stream_text_from(routed.handle):
+            if not turn.first_token:
+                turn.first_token = time.perf_counter()
+            yield chunk
+
+
+def triage_responder(body: dict, schema: dict) -> dict:
+    """Structured reply for the triage agent, routed like `select_agent` would."""
+    return match_keywords(last_user_text(body))
+
+
+def load_turns(wavs: list[str], limit: int, rng: np.random.Generator) -> list[Turn]:
+    if wavs:
+        turns = []
+        for path in wavs[:limit]:
+            with wave.open(path, "rb") as wav:
+                if wav.getframerate() != SAMPLE_RATE or wav.getsampwidth() != 2 or wav.getnchannels() != 1:
+                    raise SystemExit(f"{path}: expected 16-bit mono audio at {SAMPLE_RATE} Hz")
+                audio = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+            sidecar = os.path.splitext(path)[0] + ".txt"
+            transcript = open(sidecar).read().strip() if os.path.exists(sidecar) else os.path.basename(path)
+            turns.append(Turn(transcript, audio))
+        return turns
+    with open(os.path.join(ROOT, "data", "mock_dialogue.json")) as fh:
+        lines = [line["text"] for line in json.load(fh)["dialogue"] if line["speaker"] != "Coach"]
+    return [Turn(text, utterance(text, rng)) for text in lines[:limit]]
+
+
+async def feed(audio_input: StreamedAudioInput, turns: list[Turn], speed: float, rng: np.random.Generator,
+               timeout_s: float) -> None:
+    """Speak each turn, then keep the mic open (noise only) until the reply is over."""
+    chunk = int(SAMPLE_RATE * CHUNK_LENGTH_S)
+    period = CHUNK_LENGTH_S / speed if speed else 0.0
+    next_at = time.perf_counter()
+
+    async def send(samples: np.ndarray) -> None:
+        nonlocal next_at
+        for start in range(0, len(samples) - chunk + 1, chunk):
+            await audio_input.add_audio(samples[start:start + chunk].reshape(-1, 1))
+            next_at += period
+            await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+
+    for turn in turns:
+        await send(silence(0.3, rng))
+        await send(turn.audio)
+        turn.speech_end = time.perf_counter()
+        deadline = turn.speech_end + timeout_s
+        while not turn.done.is_set() and time.perf_counter() < deadline:
+            await send(silence(CHUNK_LENGTH_S * 4, rng))
+        next_at = time.perf_counter()
+    await audio_input.add_audio(None)
+
+
+async def replay(turns: list[Turn], config: StubConfig, stt_latency_s: float, speed: float,
+                 timeout_s: float, tts_settings: TTSModelSettings) -> None:
+    server = StubServer(config, structured=triage_responder).start()
+    client = AsyncOpenAI(base_url=server.base_url, api_key="stub", max_retries=0)
+    set_default_openai_client(client, use_for_tracing=False)
+    set_tracing_disabled(True)
+
+    audio_input = StreamedAudioInput()
+    pipeline = VoicePipeline(
+        workflow=ReplayWorkflow(turns),
+        stt_model=StubSTTModel([t.transcript for t in turns], stt_latency_s, SAMPLE_RATE, CHUNK_LENGTH_S),
+        tts_model=OpenAITTSModel("gpt-4o-mini-tts", client),
+        config=VoicePipelineConfig(tts_settings=tts_settings),
+    )
+    rng = np.random.default_rng(1)
+    feeder = asyncio.create_task(feed(audio_input, turns, speed, rng, timeout_s))
+    try:
+        result = await pipeline.run(audio_input)
+        current = 0
+        async for event in result.stream():
+            if event.type == "voice_stream_event_audio" and current < len(turns):
+                if not turns[current].first_audio:
+                    turns[current].first_audio = time.perf_counter()
+            elif event.type == "voice_stream_event_lifecycle" and event.event == "turn_ended":
+                if current < len(turns):
+                    turns[current].done.set()
+                current += 1
+            elif event.type == "voice_stream_event_error":
+                raise RuntimeError(event.error)
+    finally:
+        feeder.cancel()
+        server.stop()
+
+
+def percentiles(values: list[float]) -> dict[str, float]:
+    ms = np.array(values) * 1000
+    return {"p50": round(float(np.percentile(ms, 50)), 1), "p95": round(float(np.percentile(ms, 95)), 1)}
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def save_baseline(path: str, record: dict) -> None:
+    """Replace the baseline record of `record`'s configuration (one line per configuration)."""
+    kept = []
+    if os.path.exists(path):
+        with open(path) as fh:
+            kept = [line for line in fh if line.strip() and json.loads(line).get("config") != record["config"]]
+    with open(path, "w") as fh:
+        fh.writelines(kept)
+        fh.write(json.dumps(record) + "\n")
+
+
+def previous_result(path: str, config: dict) -> dict | None:
+    if not os.path.exists(path):
+        return None
+    last = None
+    with open(path) as fh:
+        for line in fh:
+            record = json.loads(line)
+            if record.get("config") == config:
+                last = record
+    return last
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("wavs", nargs="*", help="24 kHz mono WAVs, transcript in a sidecar .txt")
+    parser.add_argument("--turns", type=int, default=4)
+    parser.add_argument("--speed", type=float, default=1.0, help="feed pace (× real time, 0 = no pacing)")
+    parser.add_argument("--latency", type=float, default=StubConfig.latency_s, help="model time to first token")
+    parser.add_argument("--tokens-per-s", type=float, default=StubConfig.tokens_per_s)
+    parser.add_argument("--tts-latency", type=float, default=StubConfig.tts_latency_s)
+    parser.add_argument("--stt-latency", type=float, default=0.2)
+    parser.add_argument("--tts-buffer", type=int, default=TTSModelSettings.buffer_size,
+                        help="1 KiB TTS chunks the pipeline buffers before emitting audio")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-turn limit in seconds")
+    parser.add_argument("--results", default=RESULTS_PATH, help="local history of runs")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="committed reference runs")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="make this run the baseline of its configuration")
+    parser.add_argument("--max-regression", type=float, default=None,
+                        help="fail if total p50 is this fraction slower than the baseline")
+    args = parser.parse_args()
+
+    turns = load_turns(args.wavs, args.turns, np.random.default_rng(0))
+    config = StubConfig(args.latency, args.tokens_per_s, tts_latency_s=args.tts_latency)
+    tts_settings = TTSModelSettings(buffer_size=args.tts_buffer)
+    asyncio.run(replay(turns, config, args.stt_latency, args.speed, args.timeout, tts_settings))
+
+    timed = [t for t in turns if t.first_audio]
+    print(f"{len(timed)}/{len(turns)} turns produced audio "
+          f"({sum(t.fast_path for t in timed)} routed by the fast path)")
+    for i, turn in enumerate(timed, 1):
+        parts = ", ".join(f"{name} {value * 1000:.0f}" for name, value in turn.stages().items())
+        print(f"  turn {i} → {turn.agent}: {parts} ms")
+    if not timed:
+        return 1
+
+    summary = {name: percentiles([t.stages()[name] for t in timed]) for name in STAGES}
+    run_config = {
+        "source": "wav" if args.wavs else "mock_dialogue",
+        "turns": len(turns),
+        "speed": args.speed,
+        "latency": args.latency,
+        "tokens_per_s": args.tokens_per_s,
+        "tts_latency": args.tts_latency,
+        "stt_latency": args.stt_latency,
+        "tts_buffer": args.tts_buffer,
+    }
+    previous = previous_result(args.baseline, run_config)
+    reference = "baseline"
+    if previous is None:
+        previous, reference = previous_result(args.results, run_config), "previous run"
+    for name in STAGES:
+        line = f"{name:>10}: p50 {summary[name]['p50']:7.1f} ms, p95 {summary[name]['p95']:7.1f} ms"
+        if previous:
+            before = previous["stages"][name]["p50"]
+            line += f"  ({reference} {before:.1f} ms)"
+        print(line)
+    print(f"cache: {response_cache.stats}")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.results)), exist_ok=True)
+    with open(args.results, "a") as fh:
+        record = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": git_commit(),
+            "config": run_config,
+            "completed": len(timed),
+            "stages": summary,
+        }
+        fh.write(json.dumps(record) + "\n")
+    if args.update_baseline and len(timed) == len(turns):
+        save_baseline(args.baseline, record)
+        print(f"baseline updated: {os.path.relpath(args.baseline, ROOT)}")
+
+    if len(timed) < len(turns):
+        return 1
+    if previous and args.max_regression is not None:
+        before, now = previous["stages"]["total"]["p50"], summary["total"]["p50"]
+        if now > before * (1 + args.max_regression):
+            print(f"❌ total p50 regressed against the {reference}: {before:.1f} → {now:.1f} ms")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
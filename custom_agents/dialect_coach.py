@@ -1,9 +1,15 @@
-import json
 from pydantic import BaseModel
 from agents import Agent, function_tool
-from typing import List, Callable
-import yaml
-from gradio import ChatMessage
+from typing import List
+from functools import cache
+
+from audio.analysis import utterance_log
+from custom_agents.pronunciation import score_attempt
+from custom_agents.registry import load_prompt
+from data.twister_index import TwisterIndex, load_index
+from data.twister_store import twister_store
+from workflows.prompt_cache import cache_friendly
+from workflows.telemetry import traced_tool
 
 
 class TwisterResponse(BaseModel):
@@ -14,14 +20,9 @@ class TwisterResponse(BaseModel):
     human_readable_response: str
 
 
-with open("data/tongue_twisters.json", encoding="utf-8") as f:
-    TW_DB = json.load(f)
-
-
-@function_tool
-def get_twisters(language: str, improvements: str) -> dict:
-    """Return 3 tongue twisters and a reason for choosing them, given a language and improvement goal."""
-    tws = TW_DB.get(language, [])
+def twister_suggestions(language: str, improvements: str) -> dict:
+    """Plain lookup behind `get_twisters`, callable outside the tool runtime."""
+    tws = twister_store.get(language)
     if not tws:
         return {
             "language": language,
@@ -29,8 +30,17 @@ def get_twisters(language: str, improvements: str) -> dict:
             "twisters": [],
             "reason": f"No tongue twisters found for {language}.",
         }
-    selected = tws[:6]
-    reason = f"I selected these {language} tongue twisters because they help with: {improvements}."
+    # Ranked lookup in the precomputed phonetic index; first six if no sound matched
+    positions = load_index().rank(language, improvements, k=6)
+    selected = [tws[i] for i in positions] if positions else tws[:6]
+    drills = TwisterIndex.describe(improvements) if positions else []
+    if drills:
+        reason = (
+            f"I selected these {language} tongue twisters because they drill "
+            f"{', '.join(drills)}, which helps with: {improvements}."
+        )
+    else:
+        reason = f"I selected these {language} tongue twisters because they help with: {improvements}."
     return {
         "language": language,
         "improvements": improvements,
@@ -39,13 +49,36 @@ def get_twisters(language: str, improvements: str) -> dict:
     }
 
 
-def _load_prompt(fname="prompts/dialect_coach_prompt.yml") -> str:
-    with open(fname, "r") as fh:
-        content = yaml.safe_load(fh)
-        return content["template"], content["model_name"]
+@function_tool
+@traced_tool
+def get_twisters(language: str, improvements: str) -> dict:
+    """Return 3 tongue twisters and a reason for choosing them, given a language and improvement goal."""
+    return twister_suggestions(language, improvements)
 
 
-system_prompt, model_name = _load_prompt()
+@function_tool
+@traced_tool
+def search_twisters(query: str, language: str = "") -> list[dict]:
+    """Full-text search for tongue twisters containing the given words, optionally within one language."""
+    return twister_store.search(query, language or None, limit=6)
+
+
+@function_tool
+@traced_tool
+def score_twister_attempt(twister: str, transcription: str, duration_s: float = 0.0) -> dict:
+    """Score the user's spoken attempt at a tongue twister, without judging it yourself.
+
+    Pass the twister exactly as given to the user and the transcription of
+    what they said, verbatim. Returns word and letter accuracy, the
+    substituted, dropped and inserted words, the twister with those marked,
+    and words per minute. `duration_s` defaults to the length of the user's
+    latest recorded utterance in the realtime voice app.
+    """
+    if duration_s <= 0:
+        latest = utterance_log.latest()
+        duration_s = latest.duration_s if latest is not None else 0.0
+    return score_attempt(twister, transcription, duration_s)
+
 
 # dialect_agent = Agent(
 #     name="DialectCoach",
@@ -55,14 +88,13 @@ system_prompt, model_name = _load_prompt()
 #     output_type=TwisterResponse,
 # )
 # dialect_agent.py  (only the new code is shown)
-from gradio import ChatMessage
-from agents import Agent, function_tool
-
-
 class DialectAgent(Agent):
     async def run(self, user_message: str):
         """Runs the normal Agent logic, then converts the Pydantic
         model to a ChatMessage so Gradio is happy."""
+        # Imported here so non-UI entry points never load Gradio
+        from gradio import ChatMessage
+
         run = await super().run(user_message)
 
         # The model you declared in output_type
@@ -80,10 +112,23 @@ class DialectAgent(Agent):
         return run
 
 
-dialect_agent = DialectAgent(
-    name="DialectCoach",
-    instructions=system_prompt,
-    model=model_name,
-    tools=[get_twisters],
-    # output_type=TwisterResponse,   # keep it – we still parse JSON
-)
+@cache
+def build_agent() -> DialectAgent:
+    system_prompt, model_name = load_prompt("dialect_coach")
+    return cache_friendly(
+        "dialect_coach",
+        DialectAgent(
+            name="DialectCoach",
+            instructions=system_prompt,
+            model=model_name,
+            tools=[get_twisters, search_twisters, score_twister_attempt],
+            # output_type=TwisterResponse,   # keep it – we still parse JSON
+        ),
+    )
+
+
+def __getattr__(name: str):
+    # The agent (and its prompt) is built on first access, not at import
+    if name == "dialect_agent":
+        return build_agent()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,252 @@
+"""Local fast-path triage.
+
+Scores the user message against a small exemplar set with word and character
+n-gram TF-IDF (plus the `select_agent` keyword table) and only falls back to
+the LLM triage agent when the local classifier is not confident enough.
+"""
+
+import os
+import re
+from dataclasses import dataclass
+
+import numpy as np
+
+from custom_agents.triage_agent import (
+    AGENT_KEYWORDS,
+    AGENT_REASONS,
+    AgentResponse,
+    match_keywords,
+)
+from workflows.model_router import model_router
+from workflows.resilience import is_backend_failure, resilience
+from workflows.response_cache import answered_by, response_cache
+
+# Route locally when the calibrated confidence is at or above this value.
+FAST_TRIAGE_THRESHOLD = float(os.getenv("FAST_TRIAGE_THRESHOLD", "0.8"))
+
+# Extra score given to the agent picked by the keyword matcher.
+KEYWORD_WEIGHT = 0.35
+
+EXEMPLARS = {
+    "dialect_coach": [
+        "How can I reduce my accent when pronouncing 'th'?",
+        "Give me tongue twisters to practise my r and l sounds",
+        "I want to sound more like a native British English speaker",
+        "Help me with my Spanish pronunciation",
+        "How do I pronounce vowels in a Southern American dialect?",
+        "My French accent makes people misunderstand me",
+        "Which phonemes should I practise for a German accent?",
+        "I'm an actor preparing a role with an Irish dialect",
+        "How to stop rolling my r's when speaking English",
+        "Tongue twisters for the sh and s sounds",
+        "Neutral accent training for international meetings",
+        "I mispronounce words with silent letters",
+    ],
+    "public_speaking_coach": [
+        "Tips for conquering stage fright during presentations?",
+        "How do I structure a keynote speech?",
+        "Help me prepare my startup pitch for investors",
+        "How can I engage the audience during a talk?",
+        "What body language should I use on stage?",
+        "I get nervous speaking in front of my team",
+        "How do I open a TEDx talk with a strong hook?",
+        "Review my presentation slides and delivery",
+        "How long should the conclusion of my speech be?",
+        "How do I handle questions after a presentation?",
+        "Give me rhetorical devices for a persuasive speech",
+        "How do I keep eye contact with a large audience?",
+    ],
+    "voice_coach": [
+        "How do I improve my vocal projection without straining?",
+        "Breathing exercises for singing long phrases",
+        "My voice gets hoarse after a long day of talking",
+        "How do I warm up my voice before a performance?",
+        "How can I make my voice sound deeper and more resonant?",
+        "Diaphragmatic breathing for better breath control",
+        "How do I extend my vocal range as a singer?",
+        "Exercises to stop my voice from cracking",
+        "How do I keep my vocal cords healthy?",
+        "Lip trills and humming warm-ups",
+        "How can I project my voice in a big hall?",
+        "My voice sounds nasal and thin",
+    ],
+}
+
+_WORD_RE = re.compile(r"[a-z0-9']+")
+_STOPWORDS = frozenset(
+    "a an and are as at be can do for from how i i'm in is it me my of on or "
+    "should so the to what when which with you your".split()
+)
+_TEMPERATURES = np.geomspace(0.02, 1.0, 40)
+
+
+def _features(text: str) -> list[str]:
+    """Word unigrams, word bigrams and in-word character trigrams."""
+    words = [w for w in _WORD_RE.findall(text.lower()) if w not in _STOPWORDS]
+    feats = [f"w:{w}" for w in words]
+    feats += [f"b:{a}_{b}" for a, b in zip(words, words[1:])]
+    for w in words:
+        padded = f" {w} "
+        feats += [f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+    return feats
+
+
+def _softmax(scores: np.ndarray, temperature: float) -> np.ndarray:
+    z = scores / temperature
+    z = z - z.max(axis=-1, keepdims=True)
+    e = np.exp(z)
+    return e / e.sum(axis=-1, keepdims=True)
+
+
+@dataclass
+class FastTriageStats:
+    fast_hits: int = 0
+    llm_fallbacks: int = 0
+
+    @property
+    def total(self) -> int:
+        return self.fast_hits + self.llm_fallbacks
+
+    @property
+    def hit_rate(self) -> float:
+        return self.fast_hits / self.total if self.total else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"fast-path {self.fast_hits}/{self.total} "
+            f"({self.hit_rate:.0%}), LLM fallbacks {self.llm_fallbacks}"
+        )
+
+
+class FastTriage:
+    """TF-IDF nearest-exemplar classifier with a calibrated confidence."""
+
+    def __init__(
+        self,
+        exemplars: dict[str, list[str]] = EXEMPLARS,
+        threshold: float = FAST_TRIAGE_THRESHOLD,
+    ) -> None:
+        self.threshold = threshold
+        self.stats = FastTriageStats()
+        self.agents = list(AGENT_KEYWORDS)
+        self.exemplars = exemplars
+        self.temperature: float | None = None
+
+    def _fit(self) -> None:
+        """Build the TF-IDF matrix and calibrate; runs once, on first use."""
+        docs, labels = [], []
+        for agent_name in self.agents:
+            # The keyword list itself is a (very short) exemplar per agent
+            for text in self.exemplars.get(agent_name, []) + AGENT_KEYWORDS[agent_name]:
+                docs.append(text)
+                labels.append(self.agents.index(agent_name))
+        self._labels = np.asarray(labels)
+
+        doc_feats = [_features(d) for d in docs]
+        self._vocab: dict[str, int] = {}
+        for feats in doc_feats:
+            for f in feats:
+                self._vocab.setdefault(f, len(self._vocab))
+
+        counts = np.zeros((len(docs), len(self._vocab)), dtype=np.float32)
+        for row, feats in enumerate(doc_feats):
+            np.add.at(counts[row], [self._vocab[f] for f in feats], 1.0)
+        df = (counts > 0).sum(axis=0)
+        self._idf = (np.log((1 + len(docs)) / (1 + df)) + 1.0).astype(np.float32)
+        self._matrix = self._normalize(counts * self._idf)
+        self._agent_mask = self._labels[None, :] == np.arange(len(self.agents))[:, None]
+
+        self.temperature = self._calibrate(docs)
+
+    # -------------------- scoring --------------------
+
+    @staticmethod
+    def _normalize(m: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(m, axis=-1, keepdims=True)
+        return m / np.where(norms == 0, 1.0, norms)
+
+    def _vectorize(self, text: str) -> np.ndarray:
+        idx = [self._vocab[f] for f in _features(text) if f in self._vocab]
+        vec = np.bincount(idx, minlength=len(self._vocab)).astype(np.float32)
+        return self._normalize(vec * self._idf)
+
+    def _keyword_scores(self, texts: list[str]) -> np.ndarray:
+        out = np.zeros((len(texts), len(self.agents)), dtype=np.float32)
+        for row, text in enumerate(texts):
+            hit = match_keywords(text)
+            if hit["confidence"] >= 0.9:
+                out[row, self.agents.index(hit["selected_agent"])] = KEYWORD_WEIGHT
+        return out
+
+    def _agent_scores(self, sims: np.ndarray) -> np.ndarray:
+        """Collapse (n, docs) similarities to (n, agents) by best exemplar."""
+        masked = np.where(self._agent_mask[None, :, :], sims[:, None, :], -1.0)
+        return masked.max(axis=-1)
+
+    def _calibrate(self, docs: list[str]) -> float:
+        """Pick the softmax temperature minimising leave-one-out NLL."""
+        sims = self._matrix @ self._matrix.T
+        np.fill_diagonal(sims, -1.0)
+        scores = self._agent_scores(sims) + self._keyword_scores(docs)
+        rows = np.arange(len(docs))
+        nll = [
+            -np.log(_softmax(scores, t)[rows, self._labels] + 1e-9).mean()
+            for t in _TEMPERATURES
+        ]
+        return float(_TEMPERATURES[int(np.argmin(nll))])
+
+    def rank(self, text: str) -> list[tuple[str, float]]:
+        """Return `(agent_name, probability)` pairs, most likely first."""
+        if self.temperature is None:
+            self._fit()
+        sims = (self._matrix @ self._vectorize(text))[None, :]
+        scores = self._agent_scores(sims) + self._keyword_scores([text])
+        probs = _softmax(scores, self.temperature)[0]
+        order = np.argsort(-probs)
+        return [(self.agents[i], float(probs[i])) for i in order]
+
+    def classify(self, text: str) -> AgentResponse:
+        agent_name, confidence = self.rank(text)[0]
+        return AgentResponse(
+            selected_agent=agent_name,
+            confidence=round(confidence, 3),
+            reasoning=f"{AGENT_REASONS[agent_name]} (local classifier)",
+        )
+
+    # -------------------- routing --------------------
+
+    async def llm_triage(self, text: str) -> AgentResponse:
+        triage_agent = model_router.agent("triage_agent")
+        cached = response_cache.get("triage_agent", text, triage_agent.model)
+        if cached is not None:
+            return AgentResponse.model_validate_json(cached)
+        # An unusable pick is re-asked on a stronger model
+        try:
+            result = await model_router.run("triage_agent", triage_agent, text)
+        except Exception as exc:
+            if not is_backend_failure(exc):
+                raise
+            # No triage model reachable: the local pick is still a sensible route
+            resilience.stats.degraded["triage_agent"] += 1
+            local = self.classify(text)
+            local.reasoning += " (triage model unavailable)"
+            return local
+        response_cache.put(
+            "triage_agent",
+            text,
+            result.final_output.model_dump_json(),
+            answered_by(result, triage_agent),
+        )
+        return result.final_output
+
+    async def route(self, text: str) -> AgentResponse:
+        """Route locally when confident, otherwise ask the triage agent."""
+        local = self.classify(text)
+        if local.confidence >= self.threshold:
+            self.stats.fast_hits += 1
+            return local
+        self.stats.llm_fallbacks += 1
+        return await self.llm_triage(text)
+
+
+fast_triage = FastTriage()
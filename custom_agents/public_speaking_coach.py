@@ -1,8 +1,12 @@
-import json
 from pydantic import BaseModel
 from agents import Agent, function_tool
 from typing import List
-import yaml
+from functools import cache
+
+from custom_agents.registry import load_prompt
+from custom_agents.voice_coach import get_progress_trends, get_voice_analysis
+from workflows.prompt_cache import cache_friendly
+from workflows.telemetry import traced_tool
 
 
 class PublicSpeakingResponse(BaseModel):
@@ -15,9 +19,8 @@ class PublicSpeakingResponse(BaseModel):
     human_readable_response: str
 
 
-@function_tool
-def get_speaking_guidance(speech_type: str, goals: List[str]) -> dict:
-    """Return structured guidance for public speaking based on speech type and goals."""
+def speaking_guidance(speech_type: str, goals: List[str]) -> dict:
+    """Plain guidance behind `get_speaking_guidance`, callable outside the tool runtime."""
     # This would typically connect to a database of speaking techniques
     # For now, returning a structured response
     return {
@@ -46,18 +49,31 @@ def get_speaking_guidance(speech_type: str, goals: List[str]) -> dict:
     }
 
 
-def _load_prompt(fname="prompts/public_speaking_coach_prompt.yml") -> str:
-    with open(fname, "r") as fh:
-        content = yaml.safe_load(fh)
-        return content["template"], content["model_name"]
+@function_tool
+@traced_tool
+def get_speaking_guidance(speech_type: str, goals: List[str]) -> dict:
+    """Return structured guidance for public speaking based on speech type and goals."""
+    return speaking_guidance(speech_type, goals)
+
 
+@cache
+def build_agent() -> Agent:
+    system_prompt, model_name = load_prompt("public_speaking_coach")
+    return cache_friendly(
+        "public_speaking_coach",
+        Agent(
+            name="PublicSpeakingCoach",
+            instructions=system_prompt,
+            model=model_name,
+            # tools=[get_speaking_guidance],
+            tools=[get_voice_analysis, get_progress_trends],
+            # output_type=PublicSpeakingResponse,
+        ),
+    )
 
-system_prompt, model_name = _load_prompt()
 
-public_speaking_agent = Agent(
-    name="PublicSpeakingCoach",
-    instructions=system_prompt,
-    model=model_name,
-    # tools=[get_speaking_guidance],
-    # output_type=PublicSpeakingResponse,
-)
+def __getattr__(name: str):
+    # The agent (and its prompt) is built on first access, not at import
+    if name == "public_speaking_agent":
+        return build_agent()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
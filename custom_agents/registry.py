@@ -0,0 +1,101 @@
+"""Shared, lazy registry of the coaching agents.
+
+Agents, their YAML prompts and their data are only loaded the first time an
+agent is requested, so importing an entry point stays cheap and non-UI entry
+points never pull in Gradio.
+"""
+
+import importlib
+import re
+import unicodedata
+from collections.abc import Iterator, Mapping
+from functools import cache
+from typing import Any
+
+import yaml
+
+# Registry key → (module, attribute holding the agent)
+AGENT_MODULES = {
+    "triage_agent": ("custom_agents.triage_agent", "triage_agent"),
+    "dialect_coach": ("custom_agents.dialect_coach", "dialect_agent"),
+    "public_speaking_coach": ("custom_agents.public_speaking_coach", "public_speaking_agent"),
+    "voice_coach": ("custom_agents.voice_coach", "voice_coach_agent"),
+}
+
+PROMPT_FILES = {
+    "triage_agent": "prompts/triage_agent_prompt.yml",
+    "dialect_coach": "prompts/dialect_coach_prompt.yml",
+    "public_speaking_coach": "prompts/public_speaking_coach_prompt.yml",
+    "voice_coach": "prompts/voice_coach_prompt.yml",
+    "memory_summarizer": "prompts/memory_summarizer_prompt.yml",
+}
+
+# Agents the triage step can hand a request to
+SPECIALISTS = ("dialect_coach", "public_speaking_coach", "voice_coach")
+
+
+def canonical_prompt(text: str) -> str:
+    """Byte-stable form of a prompt template.
+
+    Unicode is NFC-normalized, line endings become `\n`, trailing spaces and
+    surrounding blank lines are dropped and blank-line runs collapse to one,
+    so cosmetic edits to a YAML file do not change the request prefix.
+    """
+    text = unicodedata.normalize("NFC", text).replace("\r\n", "\n").replace("\r", "\n")
+    text = "\n".join(line.rstrip() for line in text.split("\n"))
+    return re.sub(r"\n{3,}", "\n\n", text).strip()
+
+
+@cache
+def _load_yaml(agent_name: str) -> dict[str, Any]:
+    with open(PROMPT_FILES[agent_name], "r") as fh:
+        return yaml.safe_load(fh)
+
+
+def load_prompt(agent_name: str) -> tuple[str, str]:
+    """Return `(template, model_name)` from the agent's prompt YAML.
+
+    The template is canonicalized (see `canonical_prompt`).
+    """
+    content = _load_yaml(agent_name)
+    return canonical_prompt(content["template"]), content["model_name"]
+
+
+def load_model_tiers(agent_name: str) -> tuple[tuple[str, ...], float | None]:
+    """Return `(model_tiers, latency_budget_s)` from the agent's prompt YAML.
+
+    Tiers are ordered fastest first; without `model_tiers` the agent has the
+    single tier `model_name`, and without `latency_budget_s` no budget.
+    """
+    content = _load_yaml(agent_name)
+    tiers = tuple(content.get("model_tiers") or (content["model_name"],))
+    budget = content.get("latency_budget_s")
+    return tiers, float(budget) if budget is not None else None
+
+
+def get_agent(agent_name: str) -> Any:
+    """Import the agent's module and build the agent on first use."""
+    module_name, attr = AGENT_MODULES[agent_name]
+    return getattr(importlib.import_module(module_name), attr)
+
+
+class _LazyAgentMap(Mapping):
+    """Read-only `name → agent` mapping that builds agents on access."""
+
+    def __init__(self, names: tuple[str, ...]) -> None:
+        self._names = names
+
+    def __getitem__(self, agent_name: str) -> Any:
+        if agent_name not in self._names:
+            raise KeyError(agent_name)
+        return get_agent(agent_name)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._names)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+
+# Mapping from triage key → specialised agent
+AGENT_MAP: Mapping[str, Any] = _LazyAgentMap(SPECIALISTS)
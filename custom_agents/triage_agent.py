@@ -1,6 +1,10 @@
 from pydantic import BaseModel
-from agents import Agent, Runner, function_tool
-import yaml
+from agents import Agent, function_tool
+from functools import cache
+
+from custom_agents.registry import load_prompt
+from workflows.prompt_cache import cache_friendly
+from workflows.telemetry import traced_tool
 
 
 class AgentResponse(BaseModel):
@@ -9,59 +13,67 @@ class AgentResponse(BaseModel):
     reasoning: str
 
 
+# Keyword table shared by `select_agent` and the local fast-path classifier
+# (see `custom_agents/fast_triage.py`). Order matters: first match wins.
+AGENT_KEYWORDS = {
+    "dialect_coach": ["tongue", "twister", "dialect", "accent", "pronunciation"],
+    "public_speaking_coach": ["speech", "presentation", "pitch", "talk", "speaking"],
+    "voice_coach": ["voice", "vocal", "singing", "breathing"],
+}
+
+AGENT_REASONS = {
+    "dialect_coach": "User is asking about dialect or pronunciation practice",
+    "public_speaking_coach": "User is asking about public speaking or presentations",
+    "voice_coach": "User is asking about voice training or vocal exercises",
+}
+
+DEFAULT_AGENT = "public_speaking_coach"
+
+
+def match_keywords(user_input: str) -> dict:
+    """Plain keyword matcher behind `select_agent`, callable outside the tool runtime."""
+    input_lower = user_input.lower()
+
+    for agent_name, keywords in AGENT_KEYWORDS.items():
+        if any(word in input_lower for word in keywords):
+            return {
+                "selected_agent": agent_name,
+                "confidence": 0.9,
+                "reasoning": AGENT_REASONS[agent_name],
+            }
+    return {
+        "selected_agent": DEFAULT_AGENT,
+        "confidence": 0.5,
+        "reasoning": "Defaulting to public speaking coach as it's the most general-purpose agent",
+    }
+
+
 @function_tool
+@traced_tool
 def select_agent(user_input: str) -> dict:
     """Select the most appropriate agent based on the user's input."""
     # This would typically use a more sophisticated selection mechanism
     # For now, using simple keyword matching
-    input_lower = user_input.lower()
+    return match_keywords(user_input)
+
+
+@cache
+def build_agent() -> Agent:
+    system_prompt, model_name = load_prompt("triage_agent")
+    return cache_friendly(
+        "triage_agent",
+        Agent(
+            name="TriageAgent",
+            instructions=system_prompt,
+            model=model_name,
+            tools=[select_agent],
+            output_type=AgentResponse,
+        ),
+    )
+
 
-    if any(
-        word in input_lower
-        for word in ["tongue", "twister", "dialect", "accent", "pronunciation"]
-    ):
-        return {
-            "selected_agent": "dialect_coach",
-            "confidence": 0.9,
-            "reasoning": "User is asking about dialect or pronunciation practice",
-        }
-    elif any(
-        word in input_lower
-        for word in ["speech", "presentation", "pitch", "talk", "speaking"]
-    ):
-        return {
-            "selected_agent": "public_speaking_coach",
-            "confidence": 0.9,
-            "reasoning": "User is asking about public speaking or presentations",
-        }
-    elif any(
-        word in input_lower for word in ["voice", "vocal", "singing", "breathing"]
-    ):
-        return {
-            "selected_agent": "voice_coach",
-            "confidence": 0.9,
-            "reasoning": "User is asking about voice training or vocal exercises",
-        }
-    else:
-        return {
-            "selected_agent": "public_speaking_coach",
-            "confidence": 0.5,
-            "reasoning": "Defaulting to public speaking coach as it's the most general-purpose agent",
-        }
-
-
-def _load_prompt(fname="prompts/triage_agent_prompt.yml") -> str:
-    with open(fname, "r") as fh:
-        content = yaml.safe_load(fh)
-        return content["template"], content["model_name"]
-
-
-system_prompt, model_name = _load_prompt()
-
-triage_agent = Agent(
-    name="TriageAgent",
-    instructions=system_prompt,
-    model=model_name,
-    tools=[select_agent],
-    output_type=AgentResponse,
-)
+def __getattr__(name: str):
+    # The agent (and its prompt) is built on first access, not at import
+    if name == "triage_agent":
+        return build_agent()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
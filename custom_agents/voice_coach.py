@@ -1,7 +1,13 @@
 from pydantic import BaseModel
 from agents import Agent, function_tool
 from typing import List
-import yaml
+from functools import cache
+
+from audio.analysis import utterance_log
+from custom_agents.registry import load_prompt
+from data.session_store import session_store, session_user
+from workflows.prompt_cache import cache_friendly
+from workflows.telemetry import traced_tool
 
 
 class VoiceCoachResponse(BaseModel):
@@ -14,9 +20,8 @@ class VoiceCoachResponse(BaseModel):
     human_readable_response: str
 
 
-@function_tool
-def get_vocal_exercises(goals: List[str], challenges: List[str]) -> dict:
-    """Return vocal exercises and guidance based on user's goals and challenges."""
+def vocal_exercises(goals: List[str], challenges: List[str]) -> dict:
+    """Plain exercise plan behind `get_vocal_exercises`, callable outside the tool runtime."""
     # This would typically connect to a database of exercises
     # For now, returning a structured response
     return {
@@ -41,18 +46,62 @@ def get_vocal_exercises(goals: List[str], challenges: List[str]) -> dict:
     }
 
 
-def _load_prompt(fname="prompts/voice_coach_prompt.yml") -> str:
-    with open(fname, "r") as fh:
-        content = yaml.safe_load(fh)
-        return content["template"], content["model_name"]
+@function_tool
+@traced_tool
+def get_vocal_exercises(goals: List[str], challenges: List[str]) -> dict:
+    """Return vocal exercises and guidance based on user's goals and challenges."""
+    return vocal_exercises(goals, challenges)
+
+
+@function_tool
+@traced_tool
+def get_voice_analysis() -> dict:
+    """Return acoustic measurements of the user's most recent spoken utterances.
+
+    Includes pitch (mean, range and variability in semitones), loudness and
+    dynamic range, estimated speaking rate, pauses, jitter and shimmer, plus
+    short observations. Only available when the user spoke through the realtime
+    voice app.
+    """
+    return utterance_log.report()
+
+
+@function_tool
+@traced_tool
+def get_progress_trends(last_sessions: int = 5) -> dict:
+    """Return how the user's voice has changed over their last recorded practice sessions.
+
+    Per-session averages of pitch variability and range, speaking rate,
+    loudness and its variation, longest pause, jitter and shimmer, oldest
+    first, with the overall change and whether each is rising, falling or
+    steady. Sessions are recorded by the realtime voice app.
+    """
+    user = session_user()
+    if user is None:
+        return {
+            "available": False,
+            "reason": "Progress is only tracked for sessions spoken through the realtime voice app.",
+        }
+    return session_store.trends(user, last_sessions=last_sessions)
+
 
+@cache
+def build_agent() -> Agent:
+    system_prompt, model_name = load_prompt("voice_coach")
+    return cache_friendly(
+        "voice_coach",
+        Agent(
+            name="VoiceCoach",
+            instructions=system_prompt,
+            model=model_name,
+            tools=[get_vocal_exercises, get_voice_analysis, get_progress_trends],
+            # output_type=VoiceCoachResponse,
+        ),
+    )
 
-system_prompt, model_name = _load_prompt()
 
-voice_coach_agent = Agent(
-    name="VoiceCoach",
-    instructions=system_prompt,
-    model=model_name,
-    tools=[get_vocal_exercises],
-    # output_type=VoiceCoachResponse,
-)
+def __getattr__(name: str):
+    # The agent (and its prompt) is built on first access, not at import
+    if name == "voice_coach_agent":
+        return build_agent()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
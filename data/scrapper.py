@@ -1,75 +1,302 @@
-import requests
-from bs4 import BeautifulSoup
-import re
+"""Incremental tongue-twister scraper.
+
+Fetches the language index and every language page of tongue-twister.net
+concurrently over one pooled `requests.Session`. Each response's ETag /
+Last-Modified (and a digest of the body) is kept in a small SQLite cache, so
+the next run sends conditional requests: pages answered with 304, or with an
+unchanged body, are not re-parsed. Changed pages are merged into
+`tongue_twisters.json`, and only when something changed are the derived
+SQLite store and phonetic index rebuilt.
+
+Usage:
+    python data/scrapper.py [--base-url http://localhost:8000] [--workers 8] [--prune]
+"""
+
+import argparse
+import hashlib
 import json
 import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+
+import requests
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.twister_index import INDEX_PATH, TwisterIndex  # noqa: E402
+from data.twister_store import STORE_PATH, TWISTERS_PATH, convert  # noqa: E402
+
+BASE_URL = os.getenv("SCRAPER_BASE_URL", "https://www.tongue-twister.net")
+CACHE_PATH = os.getenv("SCRAPER_CACHE_PATH", "data/scrape_cache.sqlite")
+WORKERS = int(os.getenv("SCRAPER_WORKERS", "8"))
+TIMEOUT_S = float(os.getenv("SCRAPER_TIMEOUT_S", "20"))
+
 
-BASE_URL = "https://www.tongue-twister.net"
+# ---------------------------------------------------------------------------
+# Parsing
+# ---------------------------------------------------------------------------
 
 
-def fetch_index():
-    resp = requests.get(BASE_URL)
-    resp.encoding = resp.apparent_encoding
-    html = resp.content.decode("utf-8", "ignore")
-    soup = BeautifulSoup(html, "html.parser", from_encoding="utf-8")
+def _soup(content: bytes) -> BeautifulSoup:
+    html = content.decode("utf-8", "ignore")
+    return BeautifulSoup(html, "html.parser")
+
+
+def parse_index(content: bytes) -> dict[str, str]:
+    """Language code → name, from links like `#cpf` on the index page."""
     langs = {}
-    # Looks for links with href like "#cpf"
-    for a in soup.select("a[href^='#']"):
+    for a in _soup(content).select("a[href^='#']"):
         code = a["href"].lstrip("#")
         name = a.text.strip()
-        langs[code] = name
+        if code and name:
+            langs[code] = name
     return langs
 
 
-def fetch_twisters(code):
-    url = f"{BASE_URL}/{code}.htm"
-    resp = requests.get(url)
-    resp.encoding = resp.apparent_encoding
-    html = resp.content.decode("utf-8", "ignore")
-    soup = BeautifulSoup(html, "html.parser", from_encoding="utf-8")
-
+def parse_twisters(content: bytes) -> list[str]:
     twisters = []
-    for p in soup.select("p.TXT"):
+    for p in _soup(content).select("p.TXT"):
         # Inside TXT, often the real text is in <a class="P"> or plain text
         a_tag = p.find("a", class_="P")
-        if a_tag:
-            text = a_tag.get_text(strip=True)
-        else:
-            text = p.get_text(strip=True)
-
+        text = a_tag.get_text(strip=True) if a_tag else p.get_text(strip=True)
         if text:
             twisters.append(text)
-
     return twisters
 
 
-def main():
-    langs = fetch_index()
-    result = {}
+# ---------------------------------------------------------------------------
+# Conditional fetching
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class CacheEntry:
+    etag: str | None = None
+    last_modified: str | None = None
+    digest: str | None = None
+    # Parsed result of the page, JSON-encoded
+    parsed: str | None = None
+
+
+@dataclass
+class Fetched:
+    url: str
+    status: str  # "not_modified", "unchanged", "changed" or "failed"
+    entry: CacheEntry
+    content: bytes = b""
+    error: str = ""
+
+
+class ResponseCache:
+    """Validators and last parse of every fetched URL."""
+
+    def __init__(self, path: str = CACHE_PATH) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS pages (url TEXT PRIMARY KEY, etag TEXT, "
+            "last_modified TEXT, digest TEXT, parsed TEXT, fetched REAL NOT NULL)"
+        )
 
-    for code, name in langs.items():
-        print(f"Fetching {name} ({code})")
-        try:
-            tw = fetch_twisters(code)
-            if tw:
-                result[name] = tw
-            else:
-                print(f"⚠️ No twisters found for {name}")
-        except Exception as e:
-            print(f"❌ Error fetching {code}: {e}")
+    def get(self, url: str) -> CacheEntry:
+        row = self._db.execute(
+            "SELECT etag, last_modified, digest, parsed FROM pages WHERE url = ?", (url,)
+        ).fetchone()
+        return CacheEntry(*row) if row else CacheEntry()
 
-    sorted_result = dict(
-        sorted(result.items(), key=lambda item: len(item[1]), reverse=True)
+    def put(self, url: str, entry: CacheEntry) -> None:
+        with self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?)",
+                (url, entry.etag, entry.last_modified, entry.digest, entry.parsed, time.time()),
+            )
+
+    def close(self) -> None:
+        self._db.close()
+
+
+def make_session(workers: int) -> requests.Session:
+    """Keep-alive session sized for the worker pool, retrying transient failures."""
+    session = requests.Session()
+    retry = Retry(total=3, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504))
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = "openai-vocal-coach-scraper/1.0"
+    return session
+
+
+def fetch(session: requests.Session, url: str, cached: CacheEntry) -> Fetched:
+    """GET `url` with the cached validators; classify the outcome."""
+    headers = {}
+    if cached.etag:
+        headers["If-None-Match"] = cached.etag
+    if cached.last_modified:
+        headers["If-Modified-Since"] = cached.last_modified
+    try:
+        resp = session.get(url, headers=headers, timeout=TIMEOUT_S)
+        if resp.status_code == 304 and cached.parsed is not None:
+            return Fetched(url, "not_modified", cached)
+        resp.raise_for_status()
+    except requests.RequestException as exc:
+        return Fetched(url, "failed", cached, error=str(exc))
+
+    entry = CacheEntry(
+        resp.headers.get("ETag"),
+        resp.headers.get("Last-Modified"),
+        hashlib.sha256(resp.content).hexdigest(),
+        cached.parsed,
     )
+    # No validators on the server side still avoids a re-parse of identical bodies
+    status = "unchanged" if entry.digest == cached.digest and cached.parsed is not None else "changed"
+    return Fetched(url, status, entry, resp.content)
+
+
+# ---------------------------------------------------------------------------
+# Incremental run
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class ScrapeStats:
+    pages: int = 0
+    not_modified: int = 0
+    unchanged: int = 0
+    changed: int = 0
+    failed: int = 0
+    bytes: int = 0
+    added: list[str] = field(default_factory=list)
+    updated: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+
+    def record(self, fetched: Fetched) -> None:
+        self.pages += 1
+        self.bytes += len(fetched.content)
+        setattr(self, fetched.status, getattr(self, fetched.status) + 1)
+
+    def __str__(self) -> str:
+        return (
+            f"{self.pages} pages: {self.not_modified} not modified, {self.unchanged} unchanged, "
+            f"{self.changed} re-parsed, {self.failed} failed ({self.bytes / 1024:.0f} KiB downloaded)"
+        )
+
+
+def load_dataset(path: str) -> dict[str, list[str]]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def save_dataset(dataset: dict[str, list[str]], path: str) -> None:
+    ordered = dict(sorted(dataset.items(), key=lambda item: len(item[1]), reverse=True))
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as fh:
+        json.dump(ordered, fh, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def rebuild_derived(source: str = TWISTERS_PATH) -> None:
+    """Regenerate the SQLite store and the phonetic index from the dataset."""
+    count = convert(source, STORE_PATH)
+    print(f"✅ Stored {count} twisters → {STORE_PATH}")
+    with open(source, encoding="utf-8") as fh:
+        dataset = json.load(fh)
+    with open(source, "rb") as fh:
+        digest = hashlib.sha256(fh.read()).hexdigest()
+    TwisterIndex.build(dataset, digest).save(INDEX_PATH)
+    print(f"✅ Rebuilt phonetic index → {INDEX_PATH}")
+
+
+def scrape(
+    base_url: str = BASE_URL,
+    output: str = TWISTERS_PATH,
+    cache_path: str = CACHE_PATH,
+    workers: int = WORKERS,
+    prune: bool = False,
+) -> tuple[ScrapeStats, bool]:
+    """Update `output` from the site; returns the stats and whether it changed."""
+    base_url = base_url.rstrip("/")
+    stats = ScrapeStats()
+    cache = ResponseCache(cache_path)
+    session = make_session(workers)
+    try:
+        index_url = f"{base_url}/"
+        index = fetch(session, index_url, cache.get(index_url))
+        stats.record(index)
+        if index.status == "failed":
+            raise RuntimeError(f"could not fetch the language index: {index.error}")
+        if index.status == "changed":
+            index.entry.parsed = json.dumps(parse_index(index.content), ensure_ascii=False)
+        cache.put(index_url, index.entry)
+        langs: dict[str, str] = json.loads(index.entry.parsed)
+
+        dataset = load_dataset(output)
+        pages = {f"{base_url}/{code}.htm": name for code, name in langs.items()}
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(fetch, session, url, cache.get(url)): (url, name) for url, name in pages.items()
+            }
+            for future in as_completed(futures):
+                url, name = futures[future]
+                fetched = future.result()
+                stats.record(fetched)
+                if fetched.status == "failed":
+                    print(f"❌ Error fetching {name} ({url}): {fetched.error}")
+                    continue  # keep whatever the dataset already has
+                if fetched.status == "changed":
+                    fetched.entry.parsed = json.dumps(parse_twisters(fetched.content), ensure_ascii=False)
+                cache.put(url, fetched.entry)
+
+                twisters = json.loads(fetched.entry.parsed)
+                if not twisters:
+                    print(f"⚠️ No twisters found for {name}")
+                elif dataset.get(name) != twisters:
+                    (stats.updated if name in dataset else stats.added).append(name)
+                    dataset[name] = twisters
+
+        if prune:
+            for name in set(dataset) - set(langs.values()):
+                del dataset[name]
+                stats.removed.append(name)
+    finally:
+        session.close()
+        cache.close()
+
+    changed = bool(stats.added or stats.updated or stats.removed)
+    if changed:
+        save_dataset(dataset, output)
+    return stats, changed
 
-    # Define output file path
-    output_file = os.path.join(os.getcwd(), "data/tongue_twisters.json")
 
-    # Save to JSON
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(sorted_result, f, ensure_ascii=False, indent=2)
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Incrementally scrape tongue twisters.")
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--output", default=TWISTERS_PATH)
+    parser.add_argument("--cache", default=CACHE_PATH, help="SQLite file with ETags / Last-Modified")
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--prune", action="store_true", help="drop languages no longer on the site")
+    parser.add_argument("--no-rebuild", action="store_true", help="skip rebuilding the store and index")
+    args = parser.parse_args()
 
-    print(f"✅ Saved JSON file to {output_file}")
+    start = time.perf_counter()
+    stats, changed = scrape(args.base_url, args.output, args.cache, args.workers, args.prune)
+    print(f"{stats} in {time.perf_counter() - start:.2f}s")
+    if not changed:
+        print("✅ Dataset already up to date")
+        return
+    for label, names in (("added", stats.added), ("updated", stats.updated), ("removed", stats.removed)):
+        if names:
+            print(f"  {label}: {', '.join(sorted(names))}")
+    print(f"✅ Saved JSON file to {args.output}")
+    if not args.no_rebuild and os.path.abspath(args.output) == os.path.abspath(TWISTERS_PATH):
+        rebuild_derived(args.output)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,397 @@
+"""Append-only store of coaching sessions, for progress tracking.
+
+Every spoken turn of a realtime session is recorded in two places under
+`SESSION_STORE_DIR`:
+
+* its audio is appended to the session's own raw int16 file
+  (`audio/<user>/<session>.pcm`), one contiguous chunk per turn, so any turn
+  can be read back as a memory-mapped array without loading the rest;
+* its transcript, selected agent, audio offset and the `UtteranceSummary`
+  metrics (one column each) go into `sessions.sqlite`, indexed by user and
+  time.
+
+Trend queries (`trends`, behind the coaches' `get_progress_trends` tool) are a
+single aggregate over the metric columns of the user's last sessions and never
+touch the audio. The tool reports on `session_user()`, which each entry point
+sets for its own turns; where it is unset (e.g. the Gradio app, whose visitors
+are not recorded) no one's trends are shared. The realtime app's log view also spills the session's text
+log to `transcripts/<user>/`. `compact` is the retention job: it deletes
+session audio older than `SESSION_AUDIO_RETENTION_DAYS`, and whole sessions
+and transcripts older than `SESSION_METRICS_RETENTION_DAYS`.
+
+Usage:
+    python data/session_store.py trends [--user NAME] [--last 5]
+    python data/session_store.py compact
+"""
+
+import argparse
+import contextvars
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from dataclasses import dataclass, fields
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio.analysis import UtteranceSummary  # noqa: E402
+
+SESSION_STORE_DIR = os.getenv("SESSION_STORE_DIR", "data/sessions")
+# Whose progress this process records and reports
+SESSION_USER = os.getenv("SESSION_USER", "local")
+# SESSION_RECORD_AUDIO=0 keeps transcripts and metrics but no audio
+SESSION_RECORD_AUDIO = os.getenv("SESSION_RECORD_AUDIO", "1") == "1"
+SESSION_AUDIO_RETENTION_DAYS = float(os.getenv("SESSION_AUDIO_RETENTION_DAYS", "30"))
+SESSION_METRICS_RETENTION_DAYS = float(os.getenv("SESSION_METRICS_RETENTION_DAYS", "365"))
+
+# Speaker whose trends the coaches' tools report in this context (and tasks it starts)
+_user: contextvars.ContextVar[str | None] = contextvars.ContextVar("session_user", default=None)
+
+# Numeric `UtteranceSummary` fields, stored one column each
+METRICS = tuple(f.name for f in fields(UtteranceSummary) if f.name != "observations")
+# Metrics summarised by `trends`, with how the coaches should read them
+TREND_METRICS = {
+    "pitch_std_st": "pitch variability in semitones (lower is steadier)",
+    "pitch_range_st": "pitch range in semitones (wider is more expressive)",
+    "words_per_min": "estimated speaking rate",
+    "mean_level_db": "loudness in dBFS",
+    "dynamic_range_db": "loudness variation in dB",
+    "max_pause_s": "longest pause in seconds",
+    "jitter_pct": "pitch jitter in percent (lower is steadier)",
+    "shimmer_pct": "loudness shimmer in percent (lower is steadier)",
+}
+# Turns with less voiced speech are kept but left out of trends
+MIN_VOICED_S = 0.5
+# Relative change (per session, over the window) below which a trend is steady
+_STEADY = 0.02
+_DAY_S = 86_400.0
+_USER_RE = re.compile(r"[^\w.-]")
+
+
+@dataclass
+class StoreStats:
+    turns: int = 0
+    audio_bytes: int = 0
+    queries: int = 0
+    query_s: float = 0.0
+
+    def __str__(self) -> str:
+        mean_ms = self.query_s / self.queries * 1000 if self.queries else 0.0
+        return (
+            f"{self.turns} turns recorded ({self.audio_bytes / 1e6:.1f} MB audio), "
+            f"{self.queries} trend queries ({mean_ms:.1f} ms mean)"
+        )
+
+
+def _slope(values: list[float]) -> float:
+    """Least-squares change per session."""
+    if len(values) < 2:
+        return 0.0
+    x = np.arange(len(values), dtype=np.float64)
+    return float(np.polyfit(x, np.asarray(values, dtype=np.float64), 1)[0])
+
+
+def set_session_user(user: str | None) -> None:
+    """Report `user`'s progress to the coaches for turns run from this context on."""
+    _user.set(user)
+
+
+def session_user() -> str | None:
+    return _user.get()
+
+
+class SessionStore:
+    """Append-only sessions, turns and per-turn audio of every user."""
+
+    def __init__(self, root: str = SESSION_STORE_DIR, record_audio: bool = SESSION_RECORD_AUDIO) -> None:
+        self.root = root
+        self.record_audio = record_audio
+        self.stats = StoreStats()
+        self._lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+
+    # -------------------- storage --------------------
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            os.makedirs(self.root, exist_ok=True)
+            self._db = sqlite3.connect(
+                os.path.join(self.root, "sessions.sqlite"), check_same_thread=False
+            )
+            metric_columns = ",\n".join(f"{name} REAL" for name in METRICS)
+            self._db.executescript(
+                f"""
+                PRAGMA journal_mode=WAL;
+                PRAGMA synchronous=NORMAL;
+                CREATE TABLE IF NOT EXISTS sessions (
+                    id INTEGER PRIMARY KEY,
+                    user TEXT NOT NULL,
+                    started REAL NOT NULL,
+                    sample_rate INTEGER NOT NULL,
+                    audio_path TEXT
+                );
+                CREATE INDEX IF NOT EXISTS sessions_user ON sessions(user, started);
+                CREATE TABLE IF NOT EXISTS turns (
+                    id INTEGER PRIMARY KEY,
+                    session_id INTEGER NOT NULL REFERENCES sessions(id),
+                    user TEXT NOT NULL,
+                    ts REAL NOT NULL,
+                    transcript TEXT,
+                    agent TEXT,
+                    audio_offset INTEGER,
+                    audio_frames INTEGER,
+                    {metric_columns}
+                );
+                CREATE INDEX IF NOT EXISTS turns_session ON turns(session_id);
+                CREATE INDEX IF NOT EXISTS turns_user ON turns(user, ts);
+                """
+            )
+        return self._db
+
+    def _audio_path(self, user: str, session_id: int) -> str:
+        return os.path.join("audio", _USER_RE.sub("_", user), f"{session_id:08d}.pcm")
+
+    # -------------------- writing --------------------
+
+    def open_session(self, user: str = SESSION_USER, sample_rate: int = 24_000) -> "RecordingSession":
+        """A session that is created in the store when its first turn is recorded."""
+        return RecordingSession(self, user, sample_rate)
+
+    def _create_session(self, user: str, sample_rate: int, started: float) -> int:
+        db = self._conn()
+        with self._lock, db:
+            cursor = db.execute(
+                "INSERT INTO sessions (user, started, sample_rate) VALUES (?, ?, ?)",
+                (user, started, sample_rate),
+            )
+            session_id = cursor.lastrowid
+            if self.record_audio:
+                db.execute(
+                    "UPDATE sessions SET audio_path = ? WHERE id = ?",
+                    (self._audio_path(user, session_id), session_id),
+                )
+        return session_id
+
+    def _append_turn(
+        self,
+        session_id: int,
+        user: str,
+        transcript: str,
+        agent: str | None,
+        summary: UtteranceSummary | None,
+        audio: np.ndarray | None,
+    ) -> int:
+        db = self._conn()
+        offset = frames = None
+        with self._lock:
+            if audio is not None and self.record_audio:
+                (relative,) = db.execute(
+                    "SELECT audio_path FROM sessions WHERE id = ?", (session_id,)
+                ).fetchone()
+                path = os.path.join(self.root, relative)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                samples = np.ascontiguousarray(audio, dtype="<i2").ravel()
+                with open(path, "ab") as fh:
+                    offset = fh.tell() // 2
+                    fh.write(samples.tobytes())
+                frames = len(samples)
+                self.stats.audio_bytes += samples.nbytes
+            metrics = [getattr(summary, name) if summary is not None else None for name in METRICS]
+            with db:
+                cursor = db.execute(
+                    f"INSERT INTO turns (session_id, user, ts, transcript, agent, audio_offset, "
+                    f"audio_frames, {', '.join(METRICS)}) VALUES ({', '.join('?' * (7 + len(METRICS)))})",
+                    [session_id, user, time.time(), transcript, agent, offset, frames, *metrics],
+                )
+            self.stats.turns += 1
+        return cursor.lastrowid
+
+    # -------------------- reading --------------------
+
+    def read_audio(self, turn_id: int) -> np.ndarray | None:
+        """A turn's int16 audio, memory-mapped (None once compacted away)."""
+        row = self._conn().execute(
+            "SELECT s.audio_path, t.audio_offset, t.audio_frames FROM turns t "
+            "JOIN sessions s ON s.id = t.session_id WHERE t.id = ?",
+            (turn_id,),
+        ).fetchone()
+        if row is None or row[0] is None or row[1] is None or not row[2]:
+            return None
+        path, offset, frames = row
+        return np.memmap(os.path.join(self.root, path), dtype="<i2", mode="r", offset=offset * 2, shape=(frames,))
+
+    def trends(self, user: str = SESSION_USER, last_sessions: int = 5) -> dict:
+        """Per-session averages of the trend metrics over a user's last sessions."""
+        t0 = time.perf_counter()
+        averages = ", ".join(f"AVG(t.{name})" for name in TREND_METRICS)
+        rows = self._conn().execute(
+            f"""
+            SELECT s.started, COUNT(t.id), {averages}
+            FROM (SELECT id, started FROM sessions WHERE user = ? ORDER BY started DESC LIMIT ?) s
+            JOIN turns t ON t.session_id = s.id
+            WHERE t.voiced_s >= ?
+            GROUP BY s.id
+            ORDER BY s.started
+            """,
+            (user, max(1, last_sessions), MIN_VOICED_S),
+        ).fetchall()
+        self.stats.queries += 1
+        self.stats.query_s += time.perf_counter() - t0
+        if not rows:
+            return {
+                "available": False,
+                "reason": "No recorded spoken sessions yet: progress builds up as the user "
+                "practises through the realtime voice app.",
+            }
+
+        metrics = {}
+        for column, (name, meaning) in enumerate(TREND_METRICS.items(), start=2):
+            values = [row[column] for row in rows if row[column] is not None]
+            if not values:
+                continue
+            slope = _slope(values)
+            scale = max(abs(float(np.mean(values))), 1e-6)
+            direction = "steady" if abs(slope) / scale < _STEADY else ("rising" if slope > 0 else "falling")
+            metrics[name] = {
+                "meaning": meaning,
+                "per_session": [round(v, 2) for v in values],
+                "change": round(values[-1] - values[0], 2),
+                "trend": direction,
+            }
+        return {
+            "available": True,
+            "sessions": len(rows),
+            "turns": sum(row[1] for row in rows),
+            "first_session": time.strftime("%Y-%m-%d", time.localtime(rows[0][0])),
+            "last_session": time.strftime("%Y-%m-%d", time.localtime(rows[-1][0])),
+            "metrics": metrics,
+        }
+
+    # -------------------- retention --------------------
+
+    def compact(
+        self,
+        audio_days: float = SESSION_AUDIO_RETENTION_DAYS,
+        metrics_days: float = SESSION_METRICS_RETENTION_DAYS,
+        now: float | None = None,
+    ) -> dict:
+        """Drop expired audio, then expired sessions; returns what was removed."""
+        now = time.time() if now is None else now
+        db = self._conn()
+        removed = {"audio_files": 0, "audio_bytes": 0, "sessions": 0, "turns": 0, "transcripts": 0}
+        with self._lock:
+            expired_audio = db.execute(
+                "SELECT id, audio_path FROM sessions WHERE audio_path IS NOT NULL AND started < ?",
+                (now - audio_days * _DAY_S,),
+            ).fetchall()
+            for _, relative in expired_audio:
+                path = os.path.join(self.root, relative)
+                if os.path.exists(path):
+                    removed["audio_bytes"] += os.path.getsize(path)
+                    os.remove(path)
+                    removed["audio_files"] += 1
+            expired = [
+                session_id
+                for (session_id,) in db.execute(
+                    "SELECT id FROM sessions WHERE started < ?", (now - metrics_days * _DAY_S,)
+                )
+            ]
+            with db:
+                db.executemany(
+                    "UPDATE turns SET audio_offset = NULL, audio_frames = NULL WHERE session_id = ?",
+                    [(session_id,) for session_id, _ in expired_audio],
+                )
+                db.executemany(
+                    "UPDATE sessions SET audio_path = NULL WHERE id = ?",
+                    [(session_id,) for session_id, _ in expired_audio],
+                )
+                for session_id in expired:
+                    removed["turns"] += db.execute(
+                        "DELETE FROM turns WHERE session_id = ?", (session_id,)
+                    ).rowcount
+                    db.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+                removed["sessions"] = len(expired)
+            if removed["turns"]:
+                db.execute("VACUUM")
+        for path, _, names in os.walk(os.path.join(self.root, "transcripts")):
+            for name in names:
+                transcript = os.path.join(path, name)
+                if os.path.getmtime(transcript) < now - metrics_days * _DAY_S:
+                    os.remove(transcript)
+                    removed["transcripts"] += 1
+        return removed
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+class RecordingSession:
+    """One app run's turns; the session row is written with the first turn."""
+
+    def __init__(self, store: SessionStore, user: str, sample_rate: int) -> None:
+        self.store = store
+        self.user = user
+        self.sample_rate = sample_rate
+        self.started = time.time()
+        self.session_id: int | None = None
+        self.turns = 0
+        # Plain-text log of the session, written by the realtime app's log view
+        self.transcript_path = os.path.join(
+            store.root,
+            "transcripts",
+            _USER_RE.sub("_", user),
+            time.strftime("%Y%m%d-%H%M%S", time.localtime(self.started)) + ".log",
+        )
+
+    def record(
+        self,
+        transcript: str,
+        agent: str | None = None,
+        summary: UtteranceSummary | None = None,
+        audio: np.ndarray | None = None,
+    ) -> int:
+        """Append one turn; returns its id. Blocking, so run it off the event loop."""
+        if self.session_id is None:
+            self.session_id = self.store._create_session(self.user, self.sample_rate, self.started)
+        self.turns += 1
+        return self.store._append_turn(self.session_id, self.user, transcript, agent, summary, audio)
+
+
+session_store = SessionStore()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Session store maintenance")
+    commands = parser.add_subparsers(dest="command", required=True)
+    trends = commands.add_parser("trends", help="print a user's progress trends as JSON")
+    trends.add_argument("--user", default=SESSION_USER)
+    trends.add_argument("--last", type=int, default=5, help="sessions to summarise")
+    compact = commands.add_parser("compact", help="apply the retention policy")
+    compact.add_argument("--audio-days", type=float, default=SESSION_AUDIO_RETENTION_DAYS)
+    compact.add_argument("--metrics-days", type=float, default=SESSION_METRICS_RETENTION_DAYS)
+    args = parser.parse_args()
+
+    if args.command == "trends":
+        report = session_store.trends(args.user, args.last)
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+        print(f"({session_store.stats})", file=sys.stderr)
+        return 0
+    start = time.perf_counter()
+    removed = session_store.compact(args.audio_days, args.metrics_days)
+    print(
+        f"✅ Removed {removed['audio_files']} audio files ({removed['audio_bytes'] / 1e6:.1f} MB), "
+        f"{removed['sessions']} sessions, {removed['turns']} turns and {removed['transcripts']} transcripts "
+        f"({time.perf_counter() - start:.2f}s) → {SESSION_STORE_DIR}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,223 @@
+"""Phonetic feature index over `tongue_twisters.json`.
+
+Each twister is described by the sounds it drills (digraphs, r/l alternation,
+sibilant density, plosive clusters, alliteration runs) plus a difficulty score.
+The matrix is precomputed into a compact `.npz` file so `get_twisters` can run
+a ranked lookup for the requested improvement without touching the JSON.
+
+Rebuild with:
+    python data/twister_index.py
+"""
+
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+TWISTERS_PATH = "data/tongue_twisters.json"
+INDEX_PATH = "data/tongue_twisters.index.npz"
+
+FEATURES = (
+    "th",
+    "sh",
+    "ch",
+    "wh",
+    "ph",
+    "ng",
+    "r_l",
+    "v_w",
+    "sibilant",
+    "plosive_cluster",
+    "alliteration",
+    "difficulty",
+)
+
+_WORD_RE = re.compile(r"[^\W\d_]+")
+_LIQUID_RE = re.compile(r"[rlрл]")
+_LABIAL_RE = re.compile(r"[vwв]")
+_SIBILANT_RE = re.compile(r"sh|ch|[szcxßšžçśźсзшщжчц]")
+_PLOSIVE_CLUSTER_RE = re.compile(r"[pbtdkgqпбтдкг]{2,}")
+
+
+def _letters(*letters: str) -> str:
+    """Regex for letters written on their own ("r", 'th'), not in contractions."""
+    return "|".join(rf"(?<!\w')\b{c}\b" for c in letters)
+
+
+# Improvement wording → features it should favour (negative = penalise)
+_QUERY_TERMS = [
+    (re.compile(_letters("th") + r"|\btheta\b|\beth\b|dental fricative"), {"th": 1.0}),
+    (re.compile(_letters("sh") + r"|\besh\b|postalveolar"), {"sh": 1.0, "sibilant": 0.3}),
+    (re.compile(_letters("ch") + "|affricate"), {"ch": 1.0}),
+    (re.compile(_letters("wh")), {"wh": 1.0}),
+    (re.compile(_letters("ph", "f")), {"ph": 1.0}),
+    (re.compile(_letters("ng") + "|nasal"), {"ng": 1.0}),
+    (re.compile(_letters("r", "l", "rl") + "|liquid|rolling|roll|trill"), {"r_l": 1.0}),
+    (re.compile(_letters("v", "w")), {"v_w": 1.0}),
+    (re.compile(_letters("s", "z") + "|sibilant|lisp|hiss"), {"sibilant": 1.0}),
+    (
+        re.compile("plosive|stop consonant|cluster|" + _letters("p", "b", "t", "d", "k", "g")),
+        {"plosive_cluster": 1.0},
+    ),
+    (re.compile(r"alliterat|fluen|speed|fast|rhythm|tempo"), {"alliteration": 1.0}),
+    (re.compile(r"advanced|hard|difficult|challeng"), {"difficulty": 1.0}),
+    (re.compile(r"beginner|easy|simple|short"), {"difficulty": -1.0}),
+]
+
+
+def twister_features(text: str) -> np.ndarray:
+    """Raw (unscaled) feature vector for one twister."""
+    lower = text.lower()
+    words = _WORD_RE.findall(lower)
+    n_words = max(len(words), 1)
+    letters = max(sum(len(w) for w in words), 1)
+
+    liquids = _LIQUID_RE.findall(lower)
+    labials = _LABIAL_RE.findall(lower)
+
+    longest_run, run = 1, 1
+    for prev, word in zip(words, words[1:]):
+        run = run + 1 if word[0] == prev[0] else 1
+        longest_run = max(longest_run, run)
+
+    raw = {
+        "th": lower.count("th") / n_words,
+        "sh": lower.count("sh") / n_words,
+        "ch": lower.count("ch") / n_words,
+        "wh": lower.count("wh") / n_words,
+        "ph": lower.count("ph") / n_words,
+        "ng": lower.count("ng") / n_words,
+        "r_l": sum(a != b for a, b in zip(liquids, liquids[1:])) / n_words,
+        "v_w": sum(a != b for a, b in zip(labials, labials[1:])) / n_words,
+        "sibilant": len(_SIBILANT_RE.findall(lower)) / letters,
+        "plosive_cluster": len(_PLOSIVE_CLUSTER_RE.findall(lower)) / n_words,
+        "alliteration": longest_run if len(words) > 1 else 0,
+        "difficulty": np.log1p(len(words)) + letters / n_words / 4,
+    }
+    return np.array([raw[name] for name in FEATURES], dtype=np.float32)
+
+
+def query_weights(improvements: str) -> np.ndarray | None:
+    """Map a free-text improvement goal to a feature weight vector."""
+    text = improvements.lower()
+    weights = np.zeros(len(FEATURES), dtype=np.float32)
+    for pattern, terms in _QUERY_TERMS:
+        if pattern.search(text):
+            for name, w in terms.items():
+                weights[FEATURES.index(name)] += w
+    return weights if weights.any() else None
+
+
+def _digest(path: str) -> str:
+    with open(path, "rb") as fh:
+        return hashlib.sha256(fh.read()).hexdigest()
+
+
+class TwisterIndex:
+    """Feature matrix for every twister, sliced per language by offsets."""
+
+    def __init__(
+        self,
+        languages: list[str],
+        offsets: np.ndarray,
+        features: np.ndarray,
+        source_digest: str = "",
+    ) -> None:
+        self.languages = languages
+        self.offsets = offsets
+        self.features = features
+        self.source_digest = source_digest
+        self._slices = {
+            lang: (int(offsets[i]), int(offsets[i + 1])) for i, lang in enumerate(languages)
+        }
+
+    @classmethod
+    def build(cls, db: dict[str, list[str]], source_digest: str = "") -> "TwisterIndex":
+        languages = list(db)
+        offsets = np.cumsum([0] + [len(db[lang]) for lang in languages]).astype(np.int32)
+        raw = np.stack([twister_features(t) for lang in languages for t in db[lang]])
+        # Scale each column by its 95th percentile so weights are comparable
+        scale = np.percentile(raw, 95, axis=0)
+        scaled = np.clip(raw / np.where(scale == 0, 1.0, scale), 0.0, 2.0)
+        return cls(languages, offsets, scaled.astype(np.float16), source_digest)
+
+    def save(self, path: str = INDEX_PATH) -> None:
+        np.savez_compressed(
+            path,
+            languages=np.array(self.languages),
+            offsets=self.offsets,
+            features=self.features,
+            source_digest=np.array(self.source_digest),
+        )
+
+    @classmethod
+    def load(cls, path: str = INDEX_PATH) -> "TwisterIndex":
+        with np.load(path) as npz:
+            return cls(
+                npz["languages"].tolist(),
+                npz["offsets"],
+                npz["features"].astype(np.float32),
+                str(npz["source_digest"]),
+            )
+
+    def rank(self, language: str, improvements: str, k: int = 6) -> list[int] | None:
+        """Positions (within the language's list) of the best k twisters.
+
+        Returns None when the language is unknown or the goal names no sound
+        feature, so callers can fall back to their default selection.
+        """
+        weights = query_weights(improvements)
+        bounds = self._slices.get(language)
+        if weights is None or bounds is None or bounds[0] == bounds[1]:
+            return None
+        scores = self.features[bounds[0]:bounds[1]] @ weights
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        return top[np.argsort(-scores[top])].tolist()
+
+    @staticmethod
+    def describe(improvements: str) -> list[str]:
+        weights = query_weights(improvements)
+        if weights is None:
+            return []
+        return [name.replace("_", "/") for name, w in zip(FEATURES, weights) if w > 0]
+
+
+_index: TwisterIndex | None = None
+
+
+def load_index(path: str = INDEX_PATH, source: str = TWISTERS_PATH) -> TwisterIndex:
+    """Load the precomputed index, rebuilding it if the dataset has changed."""
+    global _index
+    if _index is None:
+        digest = _digest(source)
+        index = TwisterIndex.load(path) if os.path.exists(path) else None
+        if index is None or index.source_digest != digest:
+            with open(source, encoding="utf-8") as fh:
+                index = TwisterIndex.build(json.load(fh), digest)
+            try:
+                index.save(path)
+            except OSError:
+                pass  # read-only checkout: keep the in-memory index
+        _index = index
+    return _index
+
+
+def main() -> None:
+    source = sys.argv[1] if len(sys.argv) > 1 else TWISTERS_PATH
+    start = time.perf_counter()
+    with open(source, encoding="utf-8") as fh:
+        index = TwisterIndex.build(json.load(fh), _digest(source))
+    index.save(INDEX_PATH)
+    print(
+        f"✅ Indexed {len(index.features)} twisters in {len(index.languages)} languages "
+        f"({time.perf_counter() - start:.2f}s) → {INDEX_PATH}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""SQLite-backed tongue-twister store, loaded one language at a time.
+
+`tongue_twisters.json` is converted once into `tongue_twisters.sqlite` (a plain
+table keyed by language + an FTS5 index for full-text search). Workers then
+only read the languages they are asked for, keeping a few hot ones in memory.
+
+Rebuild with:
+    python data/twister_store.py
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+from collections import OrderedDict
+
+TWISTERS_PATH = "data/tongue_twisters.json"
+STORE_PATH = "data/tongue_twisters.sqlite"
+# Languages kept in memory per process
+HOT_LANGUAGES = int(os.getenv("TWISTER_HOT_LANGUAGES", "4"))
+
+
+def _digest(path: str) -> str:
+    with open(path, "rb") as fh:
+        return hashlib.sha256(fh.read()).hexdigest()
+
+
+def convert(source: str = TWISTERS_PATH, path: str = STORE_PATH) -> int:
+    """Convert the JSON dataset into the SQLite store; returns the row count."""
+    with open(source, encoding="utf-8") as fh:
+        db = json.load(fh)
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.executescript(
+            """
+            CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            CREATE TABLE languages (
+                name TEXT PRIMARY KEY, rank INTEGER NOT NULL, count INTEGER NOT NULL
+            );
+            CREATE TABLE twisters (
+                language TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                text TEXT NOT NULL,
+                PRIMARY KEY (language, position)
+            ) WITHOUT ROWID;
+            CREATE VIRTUAL TABLE twisters_fts USING fts5(
+                text, language UNINDEXED, position UNINDEXED,
+                tokenize = 'unicode61 remove_diacritics 2'
+            );
+            """
+        )
+        rows = [(lang, i, text) for lang, tws in db.items() for i, text in enumerate(tws)]
+        with conn:
+            conn.execute("INSERT INTO meta VALUES ('source_digest', ?)", (_digest(source),))
+            conn.executemany(
+                "INSERT INTO languages VALUES (?, ?, ?)",
+                [(lang, rank, len(tws)) for rank, (lang, tws) in enumerate(db.items())],
+            )
+            conn.executemany("INSERT INTO twisters VALUES (?, ?, ?)", rows)
+            conn.executemany(
+                "INSERT INTO twisters_fts (language, position, text) VALUES (?, ?, ?)", rows
+            )
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+    os.replace(tmp_path, path)
+    return len(rows)
+
+
+class TwisterStore:
+    """Per-language lazy access to the twister dataset with a small LRU."""
+
+    def __init__(
+        self,
+        path: str = STORE_PATH,
+        source: str = TWISTERS_PATH,
+        hot_languages: int = HOT_LANGUAGES,
+    ) -> None:
+        self.path = path
+        self.source = source
+        self.hot_languages = hot_languages
+        self._hot: OrderedDict[str, list[str]] = OrderedDict()
+        self._db: sqlite3.Connection | None = None
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            if not self._is_current():
+                convert(self.source, self.path)
+            self._db = sqlite3.connect(
+                f"file:{self.path}?mode=ro", uri=True, check_same_thread=False
+            )
+        return self._db
+
+    def _is_current(self) -> bool:
+        if not os.path.exists(self.path):
+            return False
+        if not os.path.exists(self.source):
+            return True
+        with sqlite3.connect(f"file:{self.path}?mode=ro", uri=True) as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'source_digest'").fetchone()
+        return row is not None and row[0] == _digest(self.source)
+
+    def reload(self) -> None:
+        """Drop cached languages and reopen the store (after a re-conversion)."""
+        if self._db is not None:
+            self._db.close()
+        self._db = None
+        self._hot.clear()
+
+    def languages(self) -> list[str]:
+        rows = self._conn().execute("SELECT name FROM languages ORDER BY rank")
+        return [name for (name,) in rows]
+
+    def get(self, language: str) -> list[str]:
+        """All twisters for one language, in dataset order ([] if unknown)."""
+        if language in self._hot:
+            self._hot.move_to_end(language)
+            return self._hot[language]
+        rows = self._conn().execute(
+            "SELECT text FROM twisters WHERE language = ? ORDER BY position", (language,)
+        )
+        twisters = [text for (text,) in rows]
+        if twisters:
+            self._hot[language] = twisters
+            while len(self._hot) > self.hot_languages:
+                self._hot.popitem(last=False)
+        return twisters
+
+    def search(self, query: str, language: str | None = None, limit: int = 10) -> list[dict]:
+        """Full-text search across twisters, best matches first."""
+        # Quote every term so user text can't be parsed as FTS5 syntax
+        match = " ".join('"' + term.replace('"', '""') + '"' for term in query.split())
+        if not match:
+            return []
+        sql = "SELECT language, position, text FROM twisters_fts WHERE twisters_fts MATCH ?"
+        params: list = [match]
+        if language:
+            sql += " AND language = ?"
+            params.append(language)
+        sql += " ORDER BY bm25(twisters_fts) LIMIT ?"
+        params.append(limit)
+        return [
+            {"language": lang, "position": pos, "text": text}
+            for lang, pos, text in self._conn().execute(sql, params)
+        ]
+
+
+twister_store = TwisterStore()
+
+
+def main() -> None:
+    source = sys.argv[1] if len(sys.argv) > 1 else TWISTERS_PATH
+    start = time.perf_counter()
+    count = convert(source, STORE_PATH)
+    print(f"✅ Stored {count} twisters ({time.perf_counter() - start:.2f}s) → {STORE_PATH}")
+
+
+if __name__ == "__main__":
+    main()
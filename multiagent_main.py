@@ -1,22 +1,24 @@
 import asyncio
-from agents import Agent, Runner, function_tool
 from dotenv import load_dotenv
 
 load_dotenv()
 
-from custom_agents.dialect_coach import dialect_agent
-from custom_agents.public_speaking_coach import public_speaking_agent
-from custom_agents.voice_coach import voice_coach_agent
-from custom_agents.triage_agent import triage_agent
-
-AGENT_MAP = {
-    "dialect_coach": dialect_agent,
-    "public_speaking_coach": public_speaking_agent,
-    "voice_coach": voice_coach_agent,
-}
+from custom_agents.fast_triage import fast_triage
+from data.session_store import SESSION_USER, set_session_user
+from workflows.concurrency import configure_model_client
+from workflows.model_router import model_router
+from workflows.prompt_cache import prompt_cache_stats
+from workflows.resilience import resilience
+from workflows.response_cache import response_cache, run_cached
+from workflows.speculative import speculative_router
+from workflows.telemetry import telemetry
 
 
 async def main():
+    telemetry.start_exporters()
+    configure_model_client()
+    # The local speaker, whose progress the realtime app records
+    set_session_user(SESSION_USER)
     print("Welcome to the Multi-Agent Coaching System!")
     print("You can ask about dialect training, public speaking, or voice coaching.")
     print("Type 'exit' to quit.")
@@ -24,18 +26,38 @@ async def main():
         user_input = input("\nYou: ").strip()
 
         if user_input.lower() == "exit":
+            print(f"Triage: {fast_triage.stats}; {speculative_router.stats}")
+            print(f"Responses: {response_cache.stats}")
+            print(f"Models: {model_router.stats}")
+            print(f"Resilience: {resilience.stats}")
+            print(f"Prompt cache:\n{prompt_cache_stats.report()}")
+            print(f"Latency: {telemetry.stats}")
             print("Goodbye!")
             break
 
-        triage_result = await Runner.run(triage_agent, user_input)
-        selected_agent_name = triage_result.final_output.selected_agent
-        selected_agent = AGENT_MAP[selected_agent_name]
+        with telemetry.turn("cli") as trace:
+            with trace.span("triage"):
+                turn = await speculative_router.run(
+                    user_input,
+                    lambda key, tier, user_input=user_input: asyncio.create_task(
+                        run_cached(key, model_router.agent(key, tier), user_input)
+                    ),
+                )
+            triage = turn.triage
+            selected_agent_name = triage.selected_agent
+            trace.set(
+                agent=selected_agent_name,
+                confidence=triage.confidence,
+                speculated=turn.speculated,
+                model=model_router.model(selected_agent_name, turn.tier),
+            )
 
-        print(f"\nSelected agent: {selected_agent_name}")
-        print(f"Reasoning: {triage_result.final_output.reasoning}")
+            print(f"\nSelected agent: {selected_agent_name}")
+            print(f"Reasoning: {triage.reasoning}")
 
-        # Now run the selected agent with the user's input
-        result = await Runner.run(selected_agent, user_input)
+            # The selected agent was started during (or right after) triage
+            with trace.span("specialist", agent=selected_agent_name):
+                result = await turn.handle
 
         print(f"\nResponse: {result.final_output}")
 
@@ -8,6 +8,9 @@ triage agent to pick the right specialist coach, streams the chosen coach’s
 response back as synthesised audio, and shows the full conversation in a Rich
 log panel.
 
+Speaking while the coach is talking interrupts it (barge-in): playback stops,
+the reply's agent runs are cancelled and the next turn starts right away.
+
 Controls:
   K   Toggle microphone recording on/off
   Q   Quit the application
@@ -17,15 +20,17 @@ keys or settings your speech and agent services need.
 """
 
 import asyncio
-from typing import TYPE_CHECKING
+import functools
+from collections import deque
+import os
+import time
 
 import numpy as np
-import sounddevice as sd
 from textual import events
 from textual.app import App, ComposeResult
 from textual.containers import Container
 from textual.reactive import reactive
-from textual.widgets import RichLog, Static
+from textual.widgets import Static
 from dotenv import load_dotenv
 
 # ---------------------------------------------------------------------------
@@ -36,17 +41,33 @@ load_dotenv()
 # ---------------------------------------------------------------------------
 # Your existing agents
 # ---------------------------------------------------------------------------
-from agents import Runner  # type: ignore
-from custom_agents.dialect_coach import dialect_agent  # type: ignore
-from custom_agents.public_speaking_coach import public_speaking_agent  # type: ignore
-from custom_agents.voice_coach import voice_coach_agent  # type: ignore
-from custom_agents.triage_agent import triage_agent  # type: ignore
+from custom_agents.fast_triage import fast_triage  # type: ignore
+from workflows.model_router import model_router  # type: ignore
+from workflows.prompt_cache import prompt_cache_stats  # type: ignore
+from workflows.resilience import resilience  # type: ignore
+from workflows.response_cache import response_cache, run_cached  # type: ignore
+from workflows.speculative import speculative_router  # type: ignore
+from workflows.concurrency import configure_model_client  # type: ignore
+from workflows.telemetry import telemetry  # type: ignore
 
 # ---------------------------------------------------------------------------
 # Voice pipeline pieces
 # ---------------------------------------------------------------------------
-from agents.voice import StreamedAudioInput, VoicePipeline  # type: ignore
+from agents.voice import (  # type: ignore
+    STTModelSettings,
+    StreamedAudioInput,
+    VoicePipeline,
+    VoicePipelineConfig,
+)
+from workflows.barge_in import BargeIn  # type: ignore
 from workflows.my_workflow import MyWorkflow  # type: ignore
+from audio.analysis import StreamingAnalyzer, utterance_log  # type: ignore
+from audio.capture import MicCapture, WavReplayStream  # type: ignore
+from audio.playback import AudioPlayer  # type: ignore
+from audio.transport import AUDIO_TRANSPORT, AudioTransport  # type: ignore
+from audio.vad import SPEECH_END, SPEECH_START, StreamingVAD  # type: ignore
+from data.session_store import session_store, set_session_user  # type: ignore
+from ui.conversation_log import METER_FLOOR_DB, ConversationLog, LevelMeter  # type: ignore
 
 # ---------------------------------------------------------------------------
 # Audio constants
@@ -55,13 +76,10 @@ CHUNK_LENGTH_S = 0.05  # 50 ms
 SAMPLE_RATE = 24_000
 FORMAT = np.int16
 CHANNELS = 1
-
-# Mapping from triage key → specialised agent
-AGENT_MAP = {
-    "dialect_coach": dialect_agent,
-    "public_speaking_coach": public_speaking_agent,
-    "voice_coach": voice_coach_agent,
-}
+# Replay a 24 kHz mono WAV instead of the microphone (no audio hardware needed)
+MIC_REPLAY_WAV = os.getenv("MIC_REPLAY_WAV", "")
+# Longest wait from the end of an utterance to its transcript; older utterances are not matched
+TRANSCRIPT_MATCH_S = float(os.getenv("TRANSCRIPT_MATCH_S", "5"))
 
 # =============================================================================
 #                               UI widgets
@@ -71,13 +89,19 @@ class Header(Static):
     session_id: reactive[str] = reactive("")
 
     def render(self) -> str:  # type: ignore[override]
-        return "🎙  Speak to your Multi-Agent Coach   (K = record, Q = quit)"
+        return "🎙  Speak to your Multi-Agent Coach   (K = record, H = hands-free, Q = quit)"
 
 
 class AudioStatusIndicator(Static):
     is_recording: reactive[bool] = reactive(False)
+    hands_free: reactive[bool] = reactive(False)
+    is_speaking: reactive[bool] = reactive(False)
 
     def render(self) -> str:  # type: ignore[override]
+        if self.is_speaking:
+            return "🗣  Speech detected…"
+        if self.hands_free:
+            return "🟢 Hands-free: listening (H to stop)"
         return "🔴 Recording… (K to stop)" if self.is_recording else "⚪ Idle. Press K to record"
 
 
@@ -93,6 +117,7 @@ class CoachingApp(App[None]):
     Container { border: double rgb(91,164,91); }
     #bottom-pane { width: 100%; height: 90%; border: round rgb(205,133,63); padding: 1; }
     #status-indicator { height: 3; content-align: center middle; background: #2a2b36; }
+    #level-meter { height: 1; content-align: center middle; background: #2a2b36; }
     Static { color: white; }
     """
 
@@ -101,18 +126,54 @@ class CoachingApp(App[None]):
 
         # Mic input stream + audio out
         self._audio_input = StreamedAudioInput()
-        self.audio_player = sd.OutputStream(
-            samplerate=SAMPLE_RATE,
-            channels=CHANNELS,
-            dtype=FORMAT,
-        )
+        self.audio_player = AudioPlayer(SAMPLE_RATE, CHANNELS, FORMAT)
+        # Speech during a reply cuts playback and cancels the reply's runs
+        self.barge_in = BargeIn(self.audio_player)
+        self._drop_reply_audio = False
+        # Trace of the turn being spoken (a no-op one until the first transcript)
+        self._trace = telemetry.current()
+        self._bursts_at_turn_start = 0
 
         # Event used by key-toggle to gate sending mic chunks
         self.should_send_audio = asyncio.Event()
 
+        stream_factory = None
+        if MIC_REPLAY_WAV:
+            stream_factory = functools.partial(WavReplayStream, MIC_REPLAY_WAV, loop=True)
+        # Only speech (plus pre-roll / hangover padding) is sent upstream
+        self.vad = StreamingVAD(SAMPLE_RATE, CHUNK_LENGTH_S)
+        # Pitch / loudness / pacing of each utterance, read by the coaches' tools
+        self.analyzer = StreamingAnalyzer(SAMPLE_RATE)
+        # With AUDIO_TRANSPORT=1 speech goes upstream resampled and compressed, and is decoded for STT
+        self.transport = AudioTransport(SAMPLE_RATE) if AUDIO_TRANSPORT else None
+        # Each turn's audio, transcript, coach and measurements, for progress trends
+        self.recording = session_store.open_session(sample_rate=SAMPLE_RATE)
+        # Set before the event loop starts, so every turn's tools report this speaker
+        set_session_user(self.recording.user)
+        self._utterance_parts: list[np.ndarray] = []
+        # (end time, summary, audio) of finished utterances waiting for their transcript
+        self._untranscribed: deque[tuple] = deque(maxlen=4)
+        # Capture level, as measured by the VAD for every chunk
+        self.level_meter = LevelMeter(id="level-meter")
+        self.mic = MicCapture(
+            self._on_mic_chunk,
+            SAMPLE_RATE,
+            CHUNK_LENGTH_S,
+            channels=CHANNELS,
+            dtype=FORMAT,
+            stream_factory=stream_factory,
+            gate=self.should_send_audio,
+        )
+
         # Voice pipeline = STT → callback → TTS
+        self.workflow = MyWorkflow(
+            secret_word="dog", on_start=self._start_coach_turn, barge_in=self.barge_in
+        )
         self.pipeline = VoicePipeline(
-            workflow=MyWorkflow(secret_word="dog", on_start=self._on_transcription)
+            workflow=self.workflow,
+            config=VoicePipelineConfig(
+                stt_settings=STTModelSettings(turn_detection=self.vad.server_turn_detection())
+            ),
         )
 
     # -------------------- UI layout --------------------
@@ -121,63 +182,155 @@ class CoachingApp(App[None]):
         with Container():
             yield Header(id="header")
             yield AudioStatusIndicator(id="status-indicator")
-            yield RichLog(id="bottom-pane", wrap=True, highlight=True, markup=True)
+            yield self.level_meter
+            # Capped and batched: older lines go to the session transcript file
+            yield ConversationLog(
+                id="bottom-pane",
+                wrap=True,
+                highlight=True,
+                markup=True,
+                spill_path=self.recording.transcript_path,
+            )
 
     async def on_mount(self) -> None:  # type: ignore[override]
+        telemetry.start_exporters()
+        configure_model_client()
         self.run_worker(self._start_voice_pipeline())
         self.run_worker(self._capture_mic_audio())
+        # Retention: drop expired session audio and metrics in the background
+        self.run_worker(asyncio.to_thread(session_store.compact))
 
     # ==================================================
     # Worker: Capture microphone audio
     # ==================================================
 
     async def _capture_mic_audio(self) -> None:
-        read_size = int(SAMPLE_RATE * CHUNK_LENGTH_S)
-        stream = sd.InputStream(
-            channels=CHANNELS,
-            samplerate=SAMPLE_RATE,
-            dtype=FORMAT,
-        )
-        stream.start()
-
-        status = self.query_one(AudioStatusIndicator)
-
+        # Callback-driven: PortAudio fills a ring buffer and wakes us per chunk
         try:
-            while True:
-                if not self.should_send_audio.is_set():
-                    status.is_recording = False
-                    await asyncio.sleep(0.05)
-                    continue
-
-                status.is_recording = True
-
-                if stream.read_available < read_size:
-                    await asyncio.sleep(0.0)
-                    continue
-
-                data, _ = stream.read(read_size)
-                await self._audio_input.add_audio(data)
+            await self.mic.run()
         except asyncio.CancelledError:
             pass
         finally:
-            stream.stop(); stream.close(); status.is_recording = False
+            self.query_one(AudioStatusIndicator).is_recording = False
+
+    async def _on_mic_chunk(self, chunk: np.ndarray) -> None:
+        forward, event = self.vad.process(chunk)
+        self.level_meter.set_level(self.vad.level_db)
+        # The analysis and recording get every chunk of the utterance, pauses
+        # included; only what goes upstream is gated by the VAD
+        if event == SPEECH_START:
+            heard = forward
+        else:
+            heard = [chunk] if self.vad.in_speech or event == SPEECH_END else []
+        for part in heard:
+            self.analyzer.process(part)
+            self._utterance_parts.append(part)
+        for part in forward:
+            await self._send_upstream(part)
+        if event is None:
+            return
+        status = self.query_one(AudioStatusIndicator)
+        status.is_speaking = event == SPEECH_START
+        if event == SPEECH_START:
+            self._barge_in()
+        if event == SPEECH_END:
+            # Trailing silence for the server-side turn detection to commit the turn
+            for part in self.vad.closing_silence((self.mic.chunk_frames, CHANNELS)):
+                await self._send_upstream(part)
+            self.query_one("#bottom-pane", ConversationLog).write(f"[dim]• VAD: {self.vad.stats}[/]")
+            self._finish_analysis()
+
+    async def _send_upstream(self, part: np.ndarray) -> None:
+        if self.transport is not None:
+            part = self.transport.relay(part)
+        await self._audio_input.add_audio(part)
+
+    def _finish_analysis(self) -> None:
+        summary = self.analyzer.finish()
+        audio = np.concatenate(self._utterance_parts) if self._utterance_parts else None
+        self._utterance_parts = []
+        self._untranscribed.append((time.perf_counter(), summary, audio))
+        if summary is None:
+            return
+        utterance_log.add(summary)
+        self.query_one("#bottom-pane", ConversationLog).write(
+            f"[dim]• Voice: {summary} ({', '.join(summary.observations)}; {self.analyzer.stats})[/]"
+        )
+
+    def _take_utterance(self, received: float) -> tuple:
+        """`(summary, audio)` of the utterance a transcript received at `received` is for.
+
+        That is the oldest one that ended before the transcript arrived. Ones
+        that ended more than `TRANSCRIPT_MATCH_S` earlier are dropped: the
+        server dropped or merged their turn, and they must not be paired with
+        every later transcript in their place.
+        """
+        while self._untranscribed and self._untranscribed[0][0] <= received:
+            ended, summary, audio = self._untranscribed.popleft()
+            if received - ended <= TRANSCRIPT_MATCH_S:
+                return summary, audio
+        return None, None
+
+    def _barge_in(self) -> None:
+        heard = self.barge_in.interrupt()
+        if heard is None:
+            return
+        # Audio still synthesising for the cut reply is dropped until the next turn
+        self._drop_reply_audio = True
+        self._trace.set(interrupted=True, heard=round(heard, 3))
+        self.workflow.truncate_reply(heard)
+        self.query_one("#bottom-pane", ConversationLog).write(
+            f"[dim]• Barge-in after {heard:.0%} of the reply: {self.barge_in.stats}[/]"
+        )
+
+    async def _close_utterance(self) -> None:
+        """Pad and end a turn cut short by switching the mic off."""
+        parts = self.vad.end_utterance((self.mic.chunk_frames, CHANNELS))
+        for part in parts:
+            self._utterance_parts.append(part)
+            await self._send_upstream(part)
+        if parts:
+            self._finish_analysis()
+        self.query_one(AudioStatusIndicator).is_speaking = False
 
     # ==================================================
     # Worker: Listen to pipeline events (audio + lifecycle)
     # ==================================================
 
     async def _start_voice_pipeline(self) -> None:
-        bottom_pane = self.query_one("#bottom-pane", RichLog)
+        bottom_pane = self.query_one("#bottom-pane", ConversationLog)
         try:
             self.audio_player.start()
             pipeline_result = await self.pipeline.run(self._audio_input)
             async for event in pipeline_result.stream():
                 if event.type == "voice_stream_event_audio":
                     # Fix: event.data is a NumPy array – checking its truth value directly is ambiguous
+                    if self._drop_reply_audio:
+                        continue
                     if event.data is not None and getattr(event.data, "size", 0):
+                        if "first_audio" not in self._trace.marks:
+                            self._trace.mark("first_audio", record=False)
+                            first_token = self._trace.marks.get("first_token")
+                            if first_token is not None:
+                                self._trace.record("tts", time.perf_counter() - first_token, first_token)
+                        # Only queues the samples; the output callback plays them
                         self.audio_player.write(event.data)
                 elif event.type == "voice_stream_event_lifecycle":
                     bottom_pane.write(f"[italic cyan]• Pipeline:[/] {event.event}")
+                    if event.event == "turn_started":
+                        self._drop_reply_audio = False
+                        self._bursts_at_turn_start = self.audio_player.stats.bursts
+                    elif event.event == "turn_ended":
+                        self.audio_player.end_burst()
+                        stats = self.audio_player.stats
+                        if stats.bursts > self._bursts_at_turn_start:
+                            # Queued → first sample at the DAC for this reply
+                            self._trace.record("playback", stats.last_latency_s)
+                        self._trace.end()
+                        bottom_pane.write(
+                            f"[dim]• Playback: {stats}; interruption-to-silence "
+                            f"{stats.last_cut_s * 1000:.0f} ms (mean {stats.mean_cut_s * 1000:.0f} ms)[/]"
+                        )
         except Exception as exc:  # noqa: BLE001
             bottom_pane.write(f"[red]Voice pipeline error:[/] {exc}")
         finally:
@@ -187,20 +340,44 @@ class CoachingApp(App[None]):
     # Callback: Finalised transcription ready
     # ==================================================
 
+    def _start_coach_turn(self, transcription: str) -> None:
+        # Becomes the current turn of the pipeline task, so the spoken reply is traced too
+        self._trace = telemetry.start_turn("realtime")
+        # Runs alongside the spoken reply; a barge-in cancels it with the reply
+        self.barge_in.track(asyncio.create_task(self._on_transcription(transcription)))
+
     async def _on_transcription(self, transcription: str) -> None:
-        bottom_pane = self.query_one("#bottom-pane", RichLog)
+        received = time.perf_counter()
+        bottom_pane = self.query_one("#bottom-pane", ConversationLog)
         bottom_pane.write(f"[bold yellow]You:[/] {transcription}")
 
-        # 1️⃣  Triage → pick coach
-        triage_result = await Runner.run(triage_agent, transcription)
-        agent_key = triage_result.final_output.selected_agent
+        # 1️⃣  Triage → pick coach (likely coach starts speculatively meanwhile)
+        with telemetry.span("triage"):
+            turn = await speculative_router.run(
+                transcription,
+                lambda key, tier: asyncio.create_task(
+                    run_cached(key, model_router.agent(key, tier), transcription)
+                ),
+            )
+        triage = turn.triage
+        agent_key = triage.selected_agent
+        telemetry.current().set(
+            agent=agent_key,
+            confidence=triage.confidence,
+            speculated=turn.speculated,
+            model=model_router.model(agent_key, turn.tier),
+        )
         bottom_pane.write(
-            f"[italic cyan]• Triage selected:[/] {agent_key} — {triage_result.final_output.reasoning}"
+            f"[italic cyan]• Triage selected:[/] {agent_key} — {triage.reasoning} "
+            f"[dim]({fast_triage.stats}; {speculative_router.stats}; {response_cache.stats}; "
+            f"{model_router.stats}; {prompt_cache_stats}; {resilience.stats})[/]"
         )
+        summary, audio = self._take_utterance(received)
+        await asyncio.to_thread(self.recording.record, transcription, agent_key, summary, audio)
 
         # 2️⃣  Get coach reply
-        agent = AGENT_MAP[agent_key]
-        agent_result = await Runner.run(agent, transcription)
+        with telemetry.span("specialist", agent=agent_key):
+            agent_result = await turn.handle
         assistant_reply = agent_result.final_output
         bottom_pane.write(f"[bold green]{agent_key.replace('_', ' ').title()}:[/] {assistant_reply}")
 
@@ -218,10 +395,34 @@ class CoachingApp(App[None]):
             self.exit(); return
         if event.key == "k":
             # Toggle mic recording
+            status = self.query_one(AudioStatusIndicator)
             if self.should_send_audio.is_set():
                 self.should_send_audio.clear()
+                self.level_meter.set_level(METER_FLOOR_DB)
+                await self._close_utterance()
+                upstream = f"; upstream {self.transport.stats}" if self.transport is not None else ""
+                log = self.query_one("#bottom-pane", ConversationLog)
+                log.write(
+                    f"[dim]• Mic: {self.mic.stats}{upstream}; sessions {session_store.stats}; "
+                    f"log {log.stats}[/]"
+                )
             else:
+                self.mic.discard()
                 self.should_send_audio.set()
+            status.is_recording = self.should_send_audio.is_set()
+        if event.key == "h":
+            # Hands-free: keep the mic open and let the VAD end each turn
+            status = self.query_one(AudioStatusIndicator)
+            status.hands_free = not status.hands_free
+            if status.hands_free:
+                self.mic.discard()
+                self.should_send_audio.set()
+            else:
+                self.should_send_audio.clear()
+                self.level_meter.set_level(METER_FLOOR_DB)
+                await self._close_utterance()
+                self.query_one("#bottom-pane", ConversationLog).write(f"[dim]• VAD: {self.vad.stats}[/]")
+            status.is_recording = self.should_send_audio.is_set()
 
 
 # ---------------------------------------------------------------------------
@@ -0,0 +1,230 @@
+"""Bounded, frame-rate-limited conversation log and input level meter.
+
+`ConversationLog` is a drop-in `RichLog` whose `write` only queues the line.
+A timer renders whatever is queued `LOG_REFRESH_HZ` times per second, so a
+burst of pipeline events costs one layout pass instead of one per event, and
+runs of identical lines within a frame (e.g. repeated lifecycle events) are
+folded into one line with a count. A frame renders for at most about 8 ms and
+leaves the rest for the next one, so the audio callbacks sharing the event loop
+are never held up for long. At most `LOG_MAX_LINES` entries are kept.
+Older entries are appended, as plain text, to a spill file (the session's
+transcript), and lines that would already be off the end of the log when their
+frame comes are spilled without being rendered. Lines reach the spill file in
+the order they were written.
+
+`LevelMeter` shows the capture level that the VAD has already measured for
+each chunk, so the meter adds no per-chunk work. It repaints on the same
+frame clock.
+"""
+
+import os
+import re
+import time
+from collections import deque
+from dataclasses import dataclass
+
+from rich.text import Text
+from textual.widgets import RichLog, Static
+
+# Entries kept in the log view; older ones go to the spill file
+LOG_MAX_LINES = int(os.getenv("LOG_MAX_LINES", "500"))
+# Log and meter repaints per second
+LOG_REFRESH_HZ = float(os.getenv("LOG_REFRESH_HZ", "15"))
+
+METER_FLOOR_DB = -60.0
+METER_WIDTH = 24
+# Peak-hold fall per frame, in dB
+_PEAK_DECAY_DB = 1.5
+# Rendering time per frame; what does not fit waits for the next frame
+_FRAME_BUDGET_S = 0.008
+# Console markup tags such as [dim], [/] or [bold yellow]
+_MARKUP_RE = re.compile(r"\[/?[a-z#@][^\[\]]*\]|\[/\]")
+
+
+@dataclass
+class LogStats:
+    queued: int = 0
+    rendered: int = 0
+    folded: int = 0  # identical consecutive lines merged into a counted one
+    spilled: int = 0
+    frames: int = 0
+    frame_s: float = 0.0
+    max_frame_s: float = 0.0
+
+    @property
+    def mean_frame_s(self) -> float:
+        return self.frame_s / self.frames if self.frames else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.queued} lines in {self.frames} frames ({self.folded} folded, "
+            f"{self.spilled} spilled), frame {self.mean_frame_s * 1000:.1f} ms mean / "
+            f"{self.max_frame_s * 1000:.1f} ms max"
+        )
+
+
+def _plain(content: object) -> str:
+    if isinstance(content, Text):
+        return content.plain
+    if isinstance(content, str):
+        # A regex rather than the markup parser: spilling must stay cheap under a flood
+        return _MARKUP_RE.sub("", content)
+    return str(content)
+
+
+class ConversationLog(RichLog):
+    """`RichLog` with a capped history, spill-to-file and batched rendering."""
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = LOG_MAX_LINES,
+        refresh_hz: float = LOG_REFRESH_HZ,
+        spill_path: str | None = None,
+        **kwargs,
+    ) -> None:
+        # Wrapped entries take a few lines each; the entry cap is the real bound
+        super().__init__(max_lines=max_entries * 4, **kwargs)
+        self.max_entries = max_entries
+        self.refresh_hz = refresh_hz
+        self.spill_path = spill_path
+        self.stats = LogStats()
+        self._pending: list[object] = []
+        # Folded entries still to render, after a frame ran out of time
+        self._carry: list[list] = []
+        # Entries on screen, oldest first: [content, repeat count]
+        self._entries: deque[list] = deque()
+        self._spill: list[str] = []
+
+    def on_mount(self) -> None:
+        self.set_interval(1 / self.refresh_hz, self.flush)
+
+    def write(self, content: object, *args, **kwargs) -> "ConversationLog":  # type: ignore[override]
+        """Queue `content` for the next frame."""
+        self._pending.append(content)
+        self.stats.queued += 1
+        if len(self._pending) >= 2 * self.max_entries:
+            # A flood: the older half could never be seen, so the writer spills it
+            # now, after the entries on screen and carried over, which are older still
+            self._spill_shown()
+            self._spill.extend(self._spill_line(entry) for entry in self._carry)
+            self._carry = []
+            self._spill.extend(self._spill_line([item, 1]) for item in self._pending[: self.max_entries])
+            del self._pending[: self.max_entries]
+        return self
+
+    def flush(self) -> None:
+        """Render everything queued since the last frame."""
+        if not self._pending and not self._carry:
+            if self._spill:
+                self._write_spill()
+            return
+        t0 = time.perf_counter()
+        pending, self._pending = self._pending, []
+
+        # Fold runs of identical lines within the frame
+        batch: list[list] = self._carry
+        for content in pending:
+            if batch and isinstance(content, str) and content == batch[-1][0]:
+                batch[-1][1] += 1
+                self.stats.folded += 1
+            else:
+                batch.append([content, 1])
+
+        # Entries that would scroll out before being seen go straight to the spill file,
+        # after the ones on screen (all of which this batch pushes out)
+        overflow = len(batch) - self.max_entries
+        if overflow > 0:
+            self._spill_shown()
+            self._spill.extend(self._spill_line(entry) for entry in batch[:overflow])
+            batch = batch[overflow:]
+
+        rendered = 0
+        for entry in batch:
+            if rendered and time.perf_counter() - t0 > _FRAME_BUDGET_S:
+                break
+            if len(self._entries) >= self.max_entries:
+                self._spill.append(self._spill_line(self._entries.popleft()))
+            content, count = entry
+            if count > 1:
+                content = f"{content} [dim](×{count})[/]" if isinstance(content, str) else content
+            super().write(content, scroll_end=False)
+            self._entries.append(entry)
+            rendered += 1
+        # Over budget: the rest is rendered first next frame
+        self._carry = batch[rendered:]
+        self.stats.rendered += rendered
+        if self.auto_scroll:
+            self.scroll_end(animate=False, immediate=False, x_axis=False)
+        if self._spill:
+            self._write_spill()
+
+        elapsed = time.perf_counter() - t0
+        self.stats.frames += 1
+        self.stats.frame_s += elapsed
+        self.stats.max_frame_s = max(self.stats.max_frame_s, elapsed)
+
+    def _spill_shown(self) -> None:
+        # They stay on screen until scrolled out, but are no longer tracked for spilling
+        self._spill.extend(self._spill_line(entry) for entry in self._entries)
+        self._entries.clear()
+
+    def _spill_line(self, entry: list) -> str:
+        content, count = entry
+        return _plain(content) + (f" (×{count})" if count > 1 else "")
+
+    def _write_spill(self) -> None:
+        self.stats.spilled += len(self._spill)
+        if self.spill_path:
+            os.makedirs(os.path.dirname(self.spill_path) or ".", exist_ok=True)
+            with open(self.spill_path, "a", encoding="utf-8") as fh:
+                fh.write("\n".join(self._spill) + "\n")
+        self._spill.clear()
+
+    def on_unmount(self) -> None:
+        # Keep the whole transcript: what is on screen or still queued goes to the file too
+        self._spill_shown()
+        self._spill.extend(self._spill_line(entry) for entry in self._carry)
+        self._spill.extend(self._spill_line([item, 1]) for item in self._pending)
+        self._carry, self._pending = [], []
+        if self._spill:
+            self._write_spill()
+
+
+class LevelMeter(Static):
+    """Input level bar with peak hold, repainted at the log's frame rate."""
+
+    def __init__(self, refresh_hz: float = LOG_REFRESH_HZ, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.refresh_hz = refresh_hz
+        self.level_db = METER_FLOOR_DB
+        self._peak_db = METER_FLOOR_DB
+        self._shown: tuple[int, int] | None = None
+
+    def on_mount(self) -> None:
+        self.set_interval(1 / self.refresh_hz, self._tick)
+
+    def set_level(self, level_db: float) -> None:
+        """Latest chunk level in dBFS; cheap enough to call for every chunk."""
+        self.level_db = level_db
+        if level_db > self._peak_db:
+            self._peak_db = level_db
+
+    def _cells(self, level_db: float) -> int:
+        fraction = (min(max(level_db, METER_FLOOR_DB), 0.0) - METER_FLOOR_DB) / -METER_FLOOR_DB
+        return round(fraction * METER_WIDTH)
+
+    def _tick(self) -> None:
+        shown = (self._cells(self.level_db), self._cells(self._peak_db))
+        self._peak_db = max(self.level_db, self._peak_db - _PEAK_DECAY_DB)
+        if shown != self._shown:
+            # Only repaint when the bar actually changes
+            self._shown = shown
+            self.refresh()
+
+    def render(self) -> str:  # type: ignore[override]
+        level, peak = self._shown or (0, 0)
+        cells = ["█"] * level + ["░"] * (METER_WIDTH - level)
+        if peak > level:
+            cells[peak - 1] = "▏"
+        return f"🎚  {''.join(cells)} {max(self.level_db, METER_FLOOR_DB):4.0f} dBFS"
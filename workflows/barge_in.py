@@ -0,0 +1,123 @@
+"""Barge-in: stop the current reply as soon as the user starts speaking.
+
+Everything working on the reply in progress (streamed runs, coach tasks) is
+registered with `BargeIn.track`. When the VAD detects speech during a reply,
+`BargeIn.interrupt` flushes the audio player and cancels every tracked run, so
+the next turn is not held up by a monologue nobody is listening to. It reports
+how much of the reply's audio was heard, so the conversation history can keep
+just that part of the assistant's text.
+
+Cancelled runs never report usage, so the output tokens they would still have
+generated are estimated from the replies that did complete.
+"""
+
+import os
+from dataclasses import dataclass, field
+from typing import Any
+
+# Set to 0 to let replies always play to the end.
+BARGE_IN = os.getenv("BARGE_IN", "1") == "1"
+
+# Estimates used until a reply has completed
+_DEFAULT_REPLY_TOKENS = 150.0
+_DEFAULT_TOKENS_PER_CHAR = 0.25
+
+INTERRUPTED_MARKER = " … [interrupted by the user]"
+
+
+@dataclass
+class BargeInStats:
+    interruptions: int = 0
+    cancelled_runs: int = 0
+    tokens_saved: int = 0
+    replies: int = 0
+    reply_tokens: int = 0
+    reply_chars: int = 0
+
+    @property
+    def mean_reply_tokens(self) -> float:
+        return self.reply_tokens / self.replies if self.replies else _DEFAULT_REPLY_TOKENS
+
+    @property
+    def tokens_per_char(self) -> float:
+        return self.reply_tokens / self.reply_chars if self.reply_chars else _DEFAULT_TOKENS_PER_CHAR
+
+    def __str__(self) -> str:
+        return (
+            f"{self.interruptions} interruptions, {self.cancelled_runs} runs cancelled, "
+            f"~{self.tokens_saved} output tokens saved"
+        )
+
+
+@dataclass
+class _Tracked:
+    handle: Any
+    # Text generated so far, appended to by the owner while the run streams
+    text: list[str] = field(default_factory=list)
+
+
+def _is_done(handle: Any) -> bool:
+    # `asyncio.Task` and `RunResultStreaming` expose completion differently
+    if hasattr(handle, "done"):
+        return handle.done()
+    return bool(getattr(handle, "is_complete", False))
+
+
+class BargeIn:
+    """Cancel the audio and agent work of the reply in progress."""
+
+    def __init__(self, player: Any, enabled: bool = BARGE_IN) -> None:
+        self.player = player
+        self.enabled = enabled
+        self.stats = BargeInStats()
+        self._tracked: dict[int, _Tracked] = {}
+
+    def track(self, handle: Any, text: list[str] | None = None) -> Any:
+        """Register a task or streamed run belonging to the current reply."""
+        self._tracked[id(handle)] = _Tracked(handle, text if text is not None else [])
+        if hasattr(handle, "add_done_callback"):
+            handle.add_done_callback(self.untrack)
+        return handle
+
+    def untrack(self, handle: Any) -> None:
+        self._tracked.pop(id(handle), None)
+
+    def record_reply(self, output_tokens: int, text: str) -> None:
+        """Feed a completed reply into the tokens-saved estimate."""
+        if output_tokens and text:
+            self.stats.replies += 1
+            self.stats.reply_tokens += output_tokens
+            self.stats.reply_chars += len(text)
+
+    @property
+    def active(self) -> bool:
+        return self.player.is_playing or any(not _is_done(t.handle) for t in self._tracked.values())
+
+    def interrupt(self) -> float | None:
+        """Flush playback and cancel tracked runs.
+
+        Returns the fraction of the reply's queued audio that was played, or
+        None when there was nothing to interrupt.
+        """
+        if not self.enabled or not self.active:
+            return None
+        self.stats.interruptions += 1
+        heard = self.player.burst_progress
+        self.player.flush()
+        for tracked in list(self._tracked.values()):
+            if _is_done(tracked.handle):
+                continue
+            generated = len("".join(tracked.text)) * self.stats.tokens_per_char
+            self.stats.tokens_saved += round(max(0.0, self.stats.mean_reply_tokens - generated))
+            self.stats.cancelled_runs += 1
+            tracked.handle.cancel()
+        self._tracked.clear()
+        return heard
+
+
+def truncate_text(text: str, heard: float) -> str:
+    """Keep roughly the `heard` fraction of `text`, cut at a word boundary and marked."""
+    kept = text[: round(len(text) * min(1.0, heard))]
+    if len(kept) < len(text) and not text[len(kept)].isspace():
+        kept = kept.rsplit(" ", 1)[0] if " " in kept else ""
+    return kept.rstrip() + INTERRUPTED_MARKER
@@ -0,0 +1,270 @@
+"""Shared model client, concurrency limits and admission control.
+
+All agent runs go through one `AsyncOpenAI` client with a pooled, keep-alive
+HTTP transport (`configure_model_client()` installs it as the Agents SDK
+default). Every model request made through it (triage, specialists,
+summaries, speech) takes a slot from `model_calls` first: at most
+`MODEL_MAX_CALLS` in flight overall and `MODEL_MAX_CALLS_PER_USER` per
+session, served in arrival order. The slot is held until the response (or
+its event stream) is closed.
+
+Turns enter through `model_calls.admit(user)`. Once `ADMISSION_MAX_TURNS`
+turns are in progress (answered or waiting for a slot) new ones are turned
+away at once with `BUSY_MESSAGE`, rather than queueing until they time out.
+Slot wait times, in-flight calls, queue depth and shed turns are exported
+through the telemetry `/metrics` endpoint.
+"""
+
+import asyncio
+import contextvars
+import os
+import time
+from collections import deque
+from collections.abc import AsyncIterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterator
+
+import httpx2
+from agents import set_default_openai_client
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+from workflows.telemetry import telemetry
+
+# Model requests in flight across all sessions / for one session
+MODEL_MAX_CALLS = int(os.getenv("MODEL_MAX_CALLS", "16"))
+MODEL_MAX_CALLS_PER_USER = int(os.getenv("MODEL_MAX_CALLS_PER_USER", "2"))
+# Turns in progress beyond which new turns get the busy message
+ADMISSION_MAX_TURNS = int(os.getenv("ADMISSION_MAX_TURNS", "48"))
+# HTTP connection pool of the shared client
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", str(MODEL_MAX_CALLS + 4)))
+OPENAI_KEEPALIVE_S = float(os.getenv("OPENAI_KEEPALIVE_S", "60"))
+OPENAI_TIMEOUT_S = float(os.getenv("OPENAI_TIMEOUT_S", "60"))
+
+BUSY_MESSAGE = (
+    "⏳ All coaches are busy with other people right now. "
+    "Please try again in a few seconds."
+)
+
+_PREFIX = "vocal_coach"
+_user: contextvars.ContextVar[str | None] = contextvars.ContextVar("concurrency_user", default=None)
+
+
+class ServerBusy(Exception):
+    """The admission queue is full; the turn was not started."""
+
+
+@dataclass
+class ConcurrencyStats:
+    calls: int = 0
+    waited_calls: int = 0
+    total_wait_s: float = 0.0
+    max_wait_s: float = 0.0
+    peak_in_flight: int = 0
+    peak_waiting: int = 0
+    admitted: int = 0
+    shed: int = 0
+
+    @property
+    def mean_wait_s(self) -> float:
+        return self.total_wait_s / self.calls if self.calls else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.calls} model calls ({self.waited_calls} queued, mean wait "
+            f"{self.mean_wait_s * 1000:.0f} ms, max {self.max_wait_s * 1000:.0f} ms), "
+            f"peak {self.peak_in_flight} in flight / {self.peak_waiting} waiting, "
+            f"turns admitted {self.admitted}, shed {self.shed}"
+        )
+
+
+class CallLimiter:
+    """Global and per-user limits on in-flight model calls, FIFO among eligible waiters."""
+
+    def __init__(
+        self,
+        max_calls: int = MODEL_MAX_CALLS,
+        max_calls_per_user: int = MODEL_MAX_CALLS_PER_USER,
+        max_turns: int = ADMISSION_MAX_TURNS,
+    ) -> None:
+        self.max_calls = max_calls
+        self.max_calls_per_user = max_calls_per_user
+        self.max_turns = max_turns
+        self.stats = ConcurrencyStats()
+        self.in_flight = 0
+        self.active_turns = 0
+        self._per_user: dict[str, int] = {}
+        self._waiters: deque[tuple[str | None, asyncio.Future]] = deque()
+        telemetry.stats.collectors.append(self.prometheus)
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    # -------------------- admission --------------------
+
+    @contextmanager
+    def admit(self, user: str) -> Iterator[None]:
+        """Run a turn for `user`, or raise `ServerBusy` when too many are in progress."""
+        if self.active_turns >= self.max_turns:
+            self.stats.shed += 1
+            raise ServerBusy(BUSY_MESSAGE)
+        self.active_turns += 1
+        self.stats.admitted += 1
+        # Model calls made from this turn (and tasks it starts) count against `user`
+        _user.set(user)
+        try:
+            yield
+        finally:
+            self.active_turns -= 1
+
+    # -------------------- call slots --------------------
+
+    def _eligible(self, user: str | None) -> bool:
+        if self.in_flight >= self.max_calls:
+            return False
+        return user is None or self._per_user.get(user, 0) < self.max_calls_per_user
+
+    def _take(self, user: str | None) -> None:
+        self.in_flight += 1
+        self.stats.peak_in_flight = max(self.stats.peak_in_flight, self.in_flight)
+        if user is not None:
+            self._per_user[user] = self._per_user.get(user, 0) + 1
+
+    async def acquire(self) -> str | None:
+        """Wait for a call slot; returns the user it was charged to."""
+        user = _user.get()
+        self.stats.calls += 1
+        if not self._waiters and self._eligible(user):
+            self._take(user)
+            telemetry.stats.observe("model_call_wait", 0.0)
+            return user
+
+        t0 = time.perf_counter()
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append((user, future))
+        self.stats.waited_calls += 1
+        self.stats.peak_waiting = max(self.stats.peak_waiting, len(self._waiters))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release(user)  # granted just as we were cancelled
+            elif (user, future) in self._waiters:
+                self._waiters.remove((user, future))
+            raise
+        waited = time.perf_counter() - t0
+        self.stats.total_wait_s += waited
+        self.stats.max_wait_s = max(self.stats.max_wait_s, waited)
+        telemetry.stats.observe("model_call_wait", waited)
+        return user
+
+    def release(self, user: str | None) -> None:
+        self.in_flight -= 1
+        if user is not None:
+            left = self._per_user[user] - 1
+            if left:
+                self._per_user[user] = left
+            else:
+                del self._per_user[user]
+        self._wake()
+
+    def _wake(self) -> None:
+        # Oldest first, skipping waiters whose user is already at their limit
+        for entry in list(self._waiters):
+            if self.in_flight >= self.max_calls:
+                return
+            user, future = entry
+            if future.done():
+                continue  # cancelled; its task removes it
+            if self._eligible(user):
+                self._waiters.remove(entry)
+                self._take(user)
+                future.set_result(None)
+
+    def prometheus(self) -> list[str]:
+        return [
+            f"# TYPE {_PREFIX}_model_calls_in_flight gauge",
+            f"{_PREFIX}_model_calls_in_flight {self.in_flight}",
+            f"# TYPE {_PREFIX}_model_calls_waiting gauge",
+            f"{_PREFIX}_model_calls_waiting {self.waiting}",
+            f"# TYPE {_PREFIX}_turns_in_progress gauge",
+            f"{_PREFIX}_turns_in_progress {self.active_turns}",
+            f"# TYPE {_PREFIX}_turns_shed_total counter",
+            f"{_PREFIX}_turns_shed_total {self.stats.shed}",
+        ]
+
+
+class _ReleasingStream(httpx2.AsyncByteStream):
+    """Response body that gives the call slot back once it is closed."""
+
+    def __init__(self, stream: httpx2.AsyncByteStream, release) -> None:
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._release()
+
+
+class LimitedTransport(httpx2.AsyncBaseTransport):
+    """HTTP transport that holds a `CallLimiter` slot for each request."""
+
+    def __init__(self, limiter: CallLimiter, transport: httpx2.AsyncBaseTransport) -> None:
+        self._limiter = limiter
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx2.Request) -> httpx2.Response:
+        user = await self._limiter.acquire()
+        released = False
+
+        def release() -> None:
+            nonlocal released
+            if not released:
+                released = True
+                self._limiter.release(user)
+
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException:
+            release()
+            raise
+        response.stream = _ReleasingStream(response.stream, release)
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+model_calls = CallLimiter()
+_client: AsyncOpenAI | None = None
+
+
+def configure_model_client(**client_kwargs) -> AsyncOpenAI:
+    """Create the shared pooled client (once) and make it the Agents SDK default.
+
+    `client_kwargs` (e.g. `base_url`) are passed to `AsyncOpenAI`; the API key and
+    base URL otherwise come from the usual `OPENAI_*` environment variables.
+    """
+    global _client
+    if _client is None:
+        transport = httpx2.AsyncHTTPTransport(
+            limits=httpx2.Limits(
+                max_connections=OPENAI_MAX_CONNECTIONS,
+                max_keepalive_connections=OPENAI_MAX_CONNECTIONS,
+                keepalive_expiry=OPENAI_KEEPALIVE_S,
+            ),
+        )
+        http_client = DefaultAsyncHttpxClient(
+            transport=LimitedTransport(model_calls, transport),
+            timeout=httpx2.Timeout(OPENAI_TIMEOUT_S, connect=10.0),
+        )
+        _client = AsyncOpenAI(http_client=http_client, **client_kwargs)
+        set_default_openai_client(_client)
+    return _client
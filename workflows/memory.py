@@ -0,0 +1,378 @@
+"""Token-budgeted conversation memory with a rolling summary.
+
+Each conversation keeps its recent turns verbatim and everything older as a
+short summary. `input_for(agent, message)` builds the model input from the
+summary plus as many of the newest turns as fit that agent's token budget, so
+prompt size stays flat however long a practice session runs.
+
+When the verbatim turns outgrow the budget, the oldest ones are folded into the
+summary by a background summarizer run; the current reply never waits for it.
+Until it finishes, those turns are simply left out of the prompt once they no
+longer fit. Large tool outputs (twister lists, guidance dicts) are shortened
+when stored, since the coach already used them in full on their own turn.
+"""
+
+import asyncio
+import json
+import os
+import re
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+from functools import cache
+from typing import Any
+
+from agents import Agent, Runner, TResponseInputItem
+
+from custom_agents.registry import load_prompt
+from workflows.prompt_cache import cache_friendly
+from workflows.resilience import resilience
+from workflows.telemetry import telemetry
+
+
+def _parse_budgets(spec: str) -> dict[str, int]:
+    """`"voice_coach=3000,dialect_coach=1500"` → `{"voice_coach": 3000, ...}`."""
+    budgets = {}
+    for part in spec.split(","):
+        name, _, value = part.partition("=")
+        if name.strip() and value.strip():
+            budgets[name.strip()] = int(value)
+    return budgets
+
+
+# Prompt tokens (summary + recent turns + new message) per agent run
+MEMORY_TOKEN_BUDGET = int(os.getenv("MEMORY_TOKEN_BUDGET", "2000"))
+# Per-agent overrides, e.g. "voice_coach=3000,Assistant=1000"
+MEMORY_AGENT_BUDGETS = _parse_budgets(os.getenv("MEMORY_AGENT_BUDGETS", ""))
+# Newest turns that are never folded into the summary
+MEMORY_RECENT_TURNS = int(os.getenv("MEMORY_RECENT_TURNS", "2"))
+# Stored length of a tool output, in characters
+MEMORY_TOOL_OUTPUT_CHARS = int(os.getenv("MEMORY_TOOL_OUTPUT_CHARS", "600"))
+# Conversations kept in memory (least recently used are dropped)
+MEMORY_MAX_SESSIONS = int(os.getenv("MEMORY_MAX_SESSIONS", "512"))
+# Summarize with the LLM (0: keep an extractive summary of the user's messages)
+MEMORY_SUMMARIZE = os.getenv("MEMORY_SUMMARIZE", "1") == "1"
+
+# A message opening like this asks about the last reply rather than something new
+_CLARIFY_RE = re.compile(
+    r"\s*(?:what do you mean|what does (?:that|this|it) mean|(?:can|could) you (?:explain|clarify|"
+    r"elaborate|expand|repeat|give (?:me )?an example)|i (?:still )?(?:don'?t|do not|didn'?t) "
+    r"(?:understand|get it)|how so|why (?:is that|does that|not)|say (?:that|it) again|"
+    r"(?:that|it) (?:didn'?t|doesn'?t) (?:work|help)|like what|what about|and then)\b",
+    re.IGNORECASE,
+)
+_WORD_RE = re.compile(r"[a-z0-9']+")
+# Word overlap with the previous message above which a message re-asks it
+_REPEAT_OVERLAP = 0.6
+_SUMMARY_CHARS = 1200
+_EXCERPT_CHARS = 160
+_ITEM_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token for English)."""
+    return len(text) // 4 + 1
+
+
+def _clip(text: str, chars: int) -> str:
+    if len(text) <= chars:
+        return text
+    return f"{text[:chars].rstrip()} … [{len(text) - chars} more characters omitted]"
+
+
+def _message_text(item: Any) -> str:
+    content = item.get("content")
+    if isinstance(content, str):
+        return content
+    return "".join(part.get("text", "") for part in content or [] if isinstance(part, dict))
+
+
+def _item_text(item: Any) -> str:
+    kind = item.get("type", "message")
+    if kind == "message" or "role" in item:
+        return _message_text(item)
+    if kind == "function_call":
+        return f"{item.get('name', '')}({item.get('arguments', '')})"
+    if kind == "function_call_output":
+        output = item.get("output", "")
+        return output if isinstance(output, str) else json.dumps(output, default=str)
+    return json.dumps(item, default=str)
+
+
+def compact_item(item: TResponseInputItem, chars: int = MEMORY_TOOL_OUTPUT_CHARS) -> TResponseInputItem:
+    """Shorten a tool output for storage; other items are kept as they are."""
+    if item.get("type") != "function_call_output":
+        return item
+    output = item.get("output")
+    if not isinstance(output, str) or len(output) <= chars:
+        return item
+    try:
+        value = json.loads(output)
+    except ValueError:
+        return {**item, "output": _clip(output, chars)}
+    if isinstance(value, list):
+        # Keep whole entries while they fit, then say how many were left out
+        kept, size = [], 2
+        for entry in value:
+            size += len(json.dumps(entry, separators=(",", ":"), default=str)) + 1
+            if size > chars:
+                break
+            kept.append(entry)
+        if len(kept) < len(value):
+            kept.append(f"… {len(value) - len(kept)} more omitted")
+        return {**item, "output": json.dumps(kept, separators=(",", ":"), default=str)}
+    return {**item, "output": _clip(json.dumps(value, separators=(",", ":"), default=str), chars)}
+
+
+def reply_items(result: Any, text: str) -> list[TResponseInputItem]:
+    """Items a run added to the conversation (just the text for cached replies)."""
+    new_items = getattr(result, "new_items", None)
+    if new_items:
+        return [item.to_input_item() for item in new_items]
+    return [{"role": "assistant", "content": text}]
+
+
+@cache
+def _summarizer() -> Agent:
+    instructions, model_name = load_prompt("memory_summarizer")
+    agent = Agent(name="MemorySummarizer", instructions=instructions, model=model_name)
+    return cache_friendly("memory_summarizer", agent)
+
+
+@dataclass
+class MemoryStats:
+    turns: int = 0
+    prompts: int = 0
+    prompt_tokens: int = 0
+    last_prompt_tokens: int = 0
+    compactions: int = 0
+    summarized_turns: int = 0
+    failed_compactions: int = 0
+    compaction_s: float = 0.0
+    evicted_sessions: int = 0
+
+    @property
+    def mean_prompt_tokens(self) -> float:
+        return self.prompt_tokens / self.prompts if self.prompts else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"memory prompt ~{self.last_prompt_tokens} tokens (mean {self.mean_prompt_tokens:.0f}) "
+            f"over {self.turns} turns, {self.compactions} compactions "
+            f"({self.summarized_turns} turns summarized, {self.failed_compactions} failed)"
+        )
+
+
+@dataclass
+class _Turn:
+    items: list[TResponseInputItem]
+    tokens: int
+
+
+class ConversationMemory:
+    """Recent turns verbatim plus a rolling summary of the older ones."""
+
+    def __init__(
+        self,
+        budget: int = MEMORY_TOKEN_BUDGET,
+        agent_budgets: dict[str, int] = MEMORY_AGENT_BUDGETS,
+        recent_turns: int = MEMORY_RECENT_TURNS,
+        summarize: bool = MEMORY_SUMMARIZE,
+        stats: MemoryStats | None = None,
+    ) -> None:
+        self.budget = budget
+        self.agent_budgets = agent_budgets
+        self.recent_turns = recent_turns
+        self.summarize = summarize
+        self.stats = stats if stats is not None else MemoryStats()
+        self.summary = ""
+        self._summary_tokens = 0
+        self._turns: list[_Turn] = []
+        self._compaction: asyncio.Task | None = None
+        # Turns added since the last reset, summarized ones included
+        self.turn_count = 0
+
+    @property
+    def has_context(self) -> bool:
+        return bool(self._turns or self.summary)
+
+    def is_follow_up(self, message: str) -> bool:
+        """Whether `message` re-asks the previous question or asks about the last reply.
+
+        Merely continuing a conversation does not count: a new question in
+        an ongoing chat is routed like a first one.
+        """
+        if not self._turns:
+            return False
+        if _CLARIFY_RE.match(message):
+            return True
+        words = set(_WORD_RE.findall(message.lower()))
+        previous = set(_WORD_RE.findall(_message_text(self._turns[-1].items[0]).lower()))
+        return len(words) >= 3 and len(words & previous) / len(words | previous) >= _REPEAT_OVERLAP
+
+    def budget_for(self, agent_name: str) -> int:
+        return self.agent_budgets.get(agent_name, self.budget)
+
+    # -------------------- reading --------------------
+
+    def input_for(self, agent_name: str, message: str) -> list[TResponseInputItem]:
+        """Summary, the newest turns that fit the agent's budget, then `message`."""
+        remaining = self.budget_for(agent_name) - self._summary_tokens - estimate_tokens(message)
+        recent: list[_Turn] = []
+        for turn in reversed(self._turns):
+            if turn.tokens > remaining:
+                break
+            recent.append(turn)
+            remaining -= turn.tokens
+
+        items: list[TResponseInputItem] = []
+        tokens = estimate_tokens(message)
+        if self.summary:
+            items.append({"role": "system", "content": f"Summary of the earlier conversation:\n{self.summary}"})
+            tokens += self._summary_tokens
+        for turn in reversed(recent):
+            items.extend(turn.items)
+            tokens += turn.tokens
+        items.append({"role": "user", "content": message})
+
+        self.stats.prompts += 1
+        self.stats.prompt_tokens += tokens
+        self.stats.last_prompt_tokens = tokens
+        return items
+
+    # -------------------- writing --------------------
+
+    def add_turn(self, message: str, replies: list[TResponseInputItem]) -> None:
+        """Store the user's message and what the agent run added in reply."""
+        items = [{"role": "user", "content": message}, *(compact_item(item) for item in replies)]
+        self._turns.append(_Turn(items, self._count(items)))
+        self.turn_count += 1
+        self.stats.turns += 1
+        self._maybe_compact()
+
+    def replace_last_reply(self, edit: Callable[[str], str]) -> None:
+        """Rewrite the text of the last assistant message (e.g. to cut it short)."""
+        for turn in reversed(self._turns):
+            for i in range(len(turn.items) - 1, -1, -1):
+                if turn.items[i].get("role") == "assistant":
+                    turn.items[i] = {"role": "assistant", "content": edit(_message_text(turn.items[i]))}
+                    turn.tokens = self._count(turn.items)
+                    return
+
+    def reset(self) -> None:
+        if self._compaction is not None:
+            self._compaction.cancel()
+            self._compaction = None
+        self._turns.clear()
+        self.turn_count = 0
+        self.summary = ""
+        self._summary_tokens = 0
+
+    @staticmethod
+    def _count(items: list[TResponseInputItem]) -> int:
+        return sum(estimate_tokens(_item_text(item)) + _ITEM_OVERHEAD_TOKENS for item in items)
+
+    # -------------------- compaction --------------------
+
+    def _maybe_compact(self) -> None:
+        if self._compaction is not None or len(self._turns) <= self.recent_turns:
+            return
+        verbatim = sum(turn.tokens for turn in self._turns)
+        if verbatim <= self.budget:
+            return
+        # Fold the oldest turns until the rest use at most half the budget
+        fold = 0
+        while fold < len(self._turns) - self.recent_turns and verbatim > self.budget // 2:
+            verbatim -= self._turns[fold].tokens
+            fold += 1
+        folded = self._turns[:fold]
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            self._apply(folded, self._extractive(folded), 0.0)
+            return
+        self._compaction = asyncio.create_task(self._compact(folded))
+
+    async def _compact(self, folded: list[_Turn]) -> None:
+        t0 = time.perf_counter()
+        summary = None
+        try:
+            if self.summarize:
+                summary = await self._summarize(folded)
+        except asyncio.CancelledError:
+            raise
+        except Exception:  # noqa: BLE001
+            self.stats.failed_compactions += 1
+        finally:
+            if self._compaction is asyncio.current_task():
+                self._compaction = None
+        self._apply(folded, summary or self._extractive(folded), time.perf_counter() - t0)
+        # Turns added while summarizing may already call for the next round
+        self._maybe_compact()
+
+    async def _summarize(self, folded: list[_Turn]) -> str:
+        lines = [f"Current summary:\n{self.summary or '(none yet)'}", "", "Older turns:"]
+        for turn in folded:
+            for item in turn.items:
+                role = item.get("role")
+                if role == "user":
+                    lines.append(f"User: {_message_text(item)}")
+                elif role == "assistant":
+                    lines.append(f"Coach: {_message_text(item)}")
+                elif item.get("type") == "function_call_output":
+                    lines.append(f"Tool result: {_clip(_item_text(item), _EXCERPT_CHARS)}")
+        summarizer = _summarizer()
+        # Not hedged: a late summary only delays compaction, and failures fall back to extractive
+        result = await resilience.call(
+            "summary",
+            "memory_summarizer",
+            summarizer.model,
+            lambda: Runner.run(summarizer, "\n".join(lines)),
+            hedge=False,
+        )
+        telemetry.current().add_usage("memory_summarizer", result)
+        return _clip(str(result.final_output).strip(), _SUMMARY_CHARS)
+
+    def _extractive(self, folded: list[_Turn]) -> str:
+        """Fallback summary: the previous one plus excerpts of the user's messages."""
+        said = "; ".join(
+            _clip(_message_text(turn.items[0]), _EXCERPT_CHARS) for turn in folded if turn.items
+        )
+        summary = f"{self.summary}\nEarlier the user said: {said}".strip()
+        # Keep the most recent part when it grows past the cap
+        return summary[-_SUMMARY_CHARS:]
+
+    def _apply(self, folded: list[_Turn], summary: str, seconds: float) -> None:
+        head = self._turns[: len(folded)]
+        if len(head) != len(folded) or any(a is not b for a, b in zip(head, folded)):
+            return  # reset while summarizing
+        del self._turns[: len(folded)]
+        self.summary = summary
+        self._summary_tokens = estimate_tokens(summary) + _ITEM_OVERHEAD_TOKENS
+        self.stats.compactions += 1
+        self.stats.summarized_turns += len(folded)
+        self.stats.compaction_s += seconds
+
+
+class MemoryStore:
+    """Conversation memories by session id, least recently used dropped first."""
+
+    def __init__(self, max_sessions: int = MEMORY_MAX_SESSIONS) -> None:
+        self.max_sessions = max_sessions
+        self.stats = MemoryStats()
+        self._sessions: OrderedDict[str, ConversationMemory] = OrderedDict()
+
+    def session(self, session_id: str) -> ConversationMemory:
+        memory = self._sessions.get(session_id)
+        if memory is None:
+            memory = self._sessions[session_id] = ConversationMemory(stats=self.stats)
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self.max_sessions:
+            _, evicted = self._sessions.popitem(last=False)
+            evicted.reset()
+            self.stats.evicted_sessions += 1
+        return memory
+
+
+conversation_memory = MemoryStore()
@@ -0,0 +1,221 @@
+"""Per-agent model tiers with confidence-based escalation.
+
+Every agent has an ordered list of models, fastest first, and a latency budget
+(`model_tiers` / `latency_budget_s` in its prompt YAML). Requests start on the
+fastest tier and move up only when:
+
+* the triage `AgentResponse.confidence` is below `MODEL_ROUTER_MIN_CONFIDENCE`
+  (the specialist starts one tier up),
+* the user asks a follow-up in an ongoing conversation (likewise), or
+* a non-streamed run fails output validation (a `ModelBehaviorError`, a triage
+  pick that is not a specialist, or a reply shorter than
+  `MODEL_ROUTER_MIN_REPLY_CHARS`), in which case it is re-run one tier up.
+
+A tier is skipped when its recent latency (an EWMA per model) would not fit in
+what is left of the agent's budget. Non-streamed runs go through `resilience`
+(stage deadline, hedging, per-model circuit breaker). A tier whose breaker is
+open, or whose run fails with a backend error, is left for the next tier up
+that is still healthy. Served tiers and escalations per agent are counted in
+`model_router.stats` and exported on the telemetry `/metrics` endpoint.
+"""
+
+import os
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any
+
+from agents import ModelBehaviorError, Runner
+
+from custom_agents.registry import SPECIALISTS, get_agent, load_model_tiers
+from workflows.resilience import CircuitOpen, is_backend_failure, resilience
+from workflows.telemetry import telemetry
+
+# Triage confidence below which the specialist starts one tier up
+MODEL_ROUTER_MIN_CONFIDENCE = float(os.getenv("MODEL_ROUTER_MIN_CONFIDENCE", "0.6"))
+# Shorter replies count as failed validation
+MODEL_ROUTER_MIN_REPLY_CHARS = int(os.getenv("MODEL_ROUTER_MIN_REPLY_CHARS", "20"))
+# Weight of the newest observation in each model's latency average
+_EWMA_ALPHA = 0.2
+
+_PREFIX = "vocal_coach"
+
+
+@dataclass
+class RouterStats:
+    # (agent, model) → requests served on that model
+    served: Counter = field(default_factory=Counter)
+    # (agent, reason) → escalations
+    escalations: Counter = field(default_factory=Counter)
+
+    @property
+    def escalation_rate(self) -> float:
+        requests = sum(self.served.values())
+        return sum(self.escalations.values()) / requests if requests else 0.0
+
+    def tier_distribution(self) -> dict[str, float]:
+        by_model: Counter = Counter()
+        for (_, model), n in self.served.items():
+            by_model[model] += n
+        total = sum(by_model.values())
+        return {model: n / total for model, n in by_model.most_common()} if total else {}
+
+    def __str__(self) -> str:
+        tiers = ", ".join(f"{model} {share:.0%}" for model, share in self.tier_distribution().items())
+        reasons: Counter = Counter()
+        for (_, reason), n in self.escalations.items():
+            reasons[reason] += n
+        why = ", ".join(f"{reason} {n}" for reason, n in reasons.most_common())
+        return (
+            f"tiers {tiers or 'unused'}; escalation rate {self.escalation_rate:.0%}"
+            + (f" ({why})" if why else "")
+        )
+
+
+def validate_output(agent_name: str, output: Any) -> bool:
+    """Cheap sanity check of a final output before it is used."""
+    if agent_name == "triage_agent":
+        return (
+            getattr(output, "selected_agent", None) in SPECIALISTS
+            and 0.0 <= getattr(output, "confidence", -1.0) <= 1.0
+        )
+    return output is not None and len(str(output).strip()) >= MODEL_ROUTER_MIN_REPLY_CHARS
+
+
+class ModelRouter:
+    """Pick the model tier for each agent run and escalate when needed."""
+
+    def __init__(self, min_confidence: float = MODEL_ROUTER_MIN_CONFIDENCE) -> None:
+        self.min_confidence = min_confidence
+        self.stats = RouterStats()
+        # model → EWMA of observed run latency
+        self.latency_s: dict[str, float] = {}
+        self._agents: dict[tuple[str, int], Any] = {}
+        telemetry.stats.collectors.append(self.prometheus)
+
+    # -------------------- tiers --------------------
+
+    def tiers(self, agent_name: str) -> tuple[str, ...]:
+        return load_model_tiers(agent_name)[0]
+
+    def model(self, agent_name: str, tier: int) -> str:
+        return self.tiers(agent_name)[tier]
+
+    def agent(self, agent_name: str, tier: int = 0) -> Any:
+        """The registry agent, cloned onto the tier's model when it differs."""
+        key = (agent_name, tier)
+        agent = self._agents.get(key)
+        if agent is None:
+            base = get_agent(agent_name)
+            model = self.model(agent_name, tier)
+            agent = self._agents[key] = base if base.model == model else base.clone(model=model)
+        return agent
+
+    def tier_of(self, agent_name: str, agent: Any) -> int:
+        tiers = self.tiers(agent_name)
+        return tiers.index(agent.model) if agent.model in tiers else 0
+
+    def _next_tier(self, agent_name: str, tier: int, elapsed_s: float = 0.0) -> int | None:
+        """The next healthy tier up whose typical latency fits the rest of the budget."""
+        tiers, budget = load_model_tiers(agent_name)
+        for higher in range(tier + 1, len(tiers)):
+            expected = self.latency_s.get(tiers[higher], 0.0)
+            if (budget is None or elapsed_s + expected <= budget) and resilience.available(tiers[higher]):
+                return higher
+        return None
+
+    def tier_for(
+        self, agent_name: str, confidence: float | None = None, follow_up: bool = False
+    ) -> tuple[int, str | None]:
+        """`(tier, escalation reason)` for a new request; tier 0 unless escalated."""
+        if confidence is not None and confidence < self.min_confidence:
+            reason = "low_confidence"
+        elif follow_up:
+            reason = "follow_up"
+        else:
+            return 0, None
+        higher = self._next_tier(agent_name, 0)
+        return (0, None) if higher is None else (higher, reason)
+
+    def select(self, agent_name: str, confidence: float | None = None, follow_up: bool = False) -> int:
+        """`tier_for`, counting the escalation; call it when the run is started."""
+        tier, reason = self.tier_for(agent_name, confidence, follow_up)
+        if reason:
+            self.stats.escalations[(agent_name, reason)] += 1
+        return tier
+
+    # -------------------- runs --------------------
+
+    def observe(self, model: str, seconds: float) -> None:
+        previous = self.latency_s.get(model)
+        self.latency_s[model] = (
+            seconds if previous is None else previous + _EWMA_ALPHA * (seconds - previous)
+        )
+
+    def served(self, agent_name: str, model: str) -> None:
+        self.stats.served[(agent_name, model)] += 1
+
+    async def run(self, agent_name: str, agent: Any, message: Any) -> Any:
+        """`Runner.run` on `agent`'s tier, re-running one tier up on invalid output.
+
+        Backend failures (timeouts, open breakers, 5xx) also move the run to
+        the next healthy tier; with none left the failure is raised.
+        """
+        tier = self.tier_of(agent_name, agent)
+        stage = "triage" if agent_name == "triage_agent" else "specialist"
+        t0 = time.perf_counter()
+        while True:
+            started = time.perf_counter()
+            error: Exception | None = None
+            result = None
+            try:
+                result = await resilience.call(
+                    stage, agent_name, agent.model, lambda agent=agent: Runner.run(agent, message)
+                )
+            except ModelBehaviorError as exc:
+                error = exc
+            except Exception as exc:
+                if not is_backend_failure(exc):
+                    raise
+                error = exc
+            if not isinstance(error, CircuitOpen):
+                self.observe(agent.model, time.perf_counter() - started)
+            if result is not None:
+                telemetry.current().add_usage(agent_name, result)
+                if validate_output(agent_name, result.final_output):
+                    break
+            backend_failed = error is not None and not isinstance(error, ModelBehaviorError)
+            # After a backend failure the latency budget no longer applies: any healthy tier will do
+            elapsed = 0.0 if backend_failed else time.perf_counter() - t0
+            higher = self._next_tier(agent_name, tier, elapsed)
+            if higher is None:
+                if error is not None:
+                    self.served(agent_name, agent.model)
+                    raise error
+                break  # best effort: nothing left within budget
+            reason = "failure" if backend_failed else "validation"
+            self.stats.escalations[(agent_name, reason)] += 1
+            tier, agent = higher, self.agent(agent_name, higher)
+        self.served(agent_name, agent.model)
+        return result
+
+    def prometheus(self) -> list[str]:
+        lines = [f"# TYPE {_PREFIX}_model_tier_requests_total counter"]
+        for (agent_name, model), n in sorted(self.stats.served.items()):
+            tier = self.tiers(agent_name).index(model) if model in self.tiers(agent_name) else 0
+            lines.append(
+                f'{_PREFIX}_model_tier_requests_total{{agent="{agent_name}",model="{model}",'
+                f'tier="{tier}"}} {n}'
+            )
+        lines.append(f"# TYPE {_PREFIX}_model_escalations_total counter")
+        for (agent_name, reason), n in sorted(self.stats.escalations.items()):
+            lines.append(
+                f'{_PREFIX}_model_escalations_total{{agent="{agent_name}",reason="{reason}"}} {n}'
+            )
+        lines.append(f"# TYPE {_PREFIX}_model_latency_seconds gauge")
+        for model, seconds in sorted(self.latency_s.items()):
+            lines.append(f'{_PREFIX}_model_latency_seconds{{model="{model}"}} {seconds:.4f}')
+        return lines
+
+
+model_router = ModelRouter()
@@ -1,13 +1,20 @@
 import random
 from collections.abc import AsyncIterator
-from typing import Callable
+from typing import Any, Callable
 
-from agents import Agent, Runner, TResponseInputItem, function_tool
+from agents import Agent, Runner, function_tool
 from agents.extensions.handoff_prompt import prompt_with_handoff_instructions
 from agents.voice import VoiceWorkflowBase, VoiceWorkflowHelper
 
+from workflows.barge_in import BargeIn, truncate_text
+from workflows.memory import ConversationMemory, reply_items
+from workflows.prompt_cache import cache_friendly
+from workflows.resilience import resilience
+from workflows.telemetry import telemetry, traced_tool
+
 
 @function_tool
+@traced_tool
 def get_weather(city: str) -> str:
     """Get the weather for a given city."""
     print(f"[debug] get_weather called with city: {city}")
@@ -15,67 +22,127 @@ def get_weather(city: str) -> str:
     return f"The weather in {city} is {random.choice(choices)}."
 
 
-spanish_agent = Agent(
-    name="Spanish",
-    handoff_description="A spanish speaking agent.",
-    instructions=prompt_with_handoff_instructions(
-        "You're speaking to a human, so be polite and concise. Speak in Spanish.",
+spanish_agent = cache_friendly(
+    "spanish",
+    Agent(
+        name="Spanish",
+        handoff_description="A spanish speaking agent.",
+        instructions=prompt_with_handoff_instructions(
+            "You're speaking to a human, so be polite and concise. Speak in Spanish.",
+        ),
+        model="gpt-4o-mini",
     ),
-    model="gpt-4o-mini",
 )
 
-agent = Agent(
-    name="Assistant",
-    instructions=prompt_with_handoff_instructions(
-        "You're speaking to a human, so be polite and concise. If the user speaks in Spanish, handoff to the spanish agent.",
+agent = cache_friendly(
+    "assistant",
+    Agent(
+        name="Assistant",
+        instructions=prompt_with_handoff_instructions(
+            "You're speaking to a human, so be polite and concise. If the user speaks in Spanish, handoff to the spanish agent.",
+        ),
+        model="gpt-4o-mini",
+        handoffs=[spanish_agent],
+        tools=[get_weather],
     ),
-    model="gpt-4o-mini",
-    handoffs=[spanish_agent],
-    tools=[get_weather],
 )
 
 
+class _StreamedReply:
+    """A streamed agent run that remembers whether it was cut off."""
+
+    def __init__(self, result: Any) -> None:
+        self.result = result
+        self.text: list[str] = []
+        self.interrupted = False
+        self.heard = 1.0
+
+    def done(self) -> bool:
+        return self.result.is_complete
+
+    def cancel(self) -> None:
+        self.interrupted = True
+        self.result.cancel()
+
+
 class MyWorkflow(VoiceWorkflowBase):
-    def __init__(self, secret_word: str, on_start: Callable[[str], None]):
+    def __init__(
+        self,
+        secret_word: str,
+        on_start: Callable[[str], None],
+        barge_in: BargeIn | None = None,
+    ):
         """
         Args:
             secret_word: The secret word to guess.
             on_start: A callback that is called when the workflow starts. The transcription
                 is passed in as an argument.
+            barge_in: If given, streamed replies are registered with it so they can be
+                cancelled when the user starts speaking.
         """
-        self._input_history: list[TResponseInputItem] = []
+        # Summary + recent turns, kept within each agent's token budget
+        self._memory = ConversationMemory()
         self._current_agent = agent
         self._secret_word = secret_word.lower()
         self._on_start = on_start
+        self._barge_in = barge_in
+        self._reply: _StreamedReply | None = None
+
+    def truncate_reply(self, heard: float) -> None:
+        """Keep only the part of the last reply the user heard before interrupting."""
+        if self._reply is not None:
+            # Still streaming: applied once the cancelled run has wound down
+            self._reply.heard = heard
+            return
+        self._memory.replace_last_reply(lambda text: truncate_text(text, heard))
 
     async def run(self, transcription: str) -> AsyncIterator[str]:
         self._on_start(transcription)
 
-        # Add the transcription to the input history
-        self._input_history.append(
-            {
-                "role": "user",
-                "content": transcription,
-            }
-        )
-
         # If the user guessed the secret word, do alternate logic
         if self._secret_word in transcription.lower():
             yield "You guessed the secret word!"
-            self._input_history.append(
-                {
-                    "role": "assistant",
-                    "content": "You guessed the secret word!",
-                }
+            self._memory.add_turn(
+                transcription, [{"role": "assistant", "content": "You guessed the secret word!"}]
             )
             return
 
-        # Otherwise, run the agent
-        result = Runner.run_streamed(self._current_agent, self._input_history)
+        # Otherwise, run the agent on the transcription plus the remembered context
+        history = self._memory.input_for(self._current_agent.name, transcription)
+        agent = self._current_agent
+        result = resilience.guard_stream(
+            "assistant", agent.model, Runner.run_streamed(agent, history), transcription
+        )
+        reply = self._reply = _StreamedReply(result)
+        if self._barge_in is not None:
+            self._barge_in.track(reply, reply.text)
+        trace = telemetry.current()
+        try:
+            with trace.span("assistant"):
+                async for chunk in VoiceWorkflowHelper.stream_text_from(result):
+                    trace.mark("first_token")
+                    reply.text.append(chunk)
+                    yield chunk
+                if result.degraded:
+                    # No first token before the deadline: say so rather than go silent
+                    reply.text.append(result.final_output)
+                    yield result.final_output
+        finally:
+            self._reply = None
+            if self._barge_in is not None:
+                self._barge_in.untrack(reply)
 
-        async for chunk in VoiceWorkflowHelper.stream_text_from(result):
-            yield chunk
+        if reply.interrupted:
+            # Carry what was said before the user cut in into the next turn
+            self._memory.add_turn(
+                transcription,
+                [{"role": "assistant", "content": truncate_text("".join(reply.text), reply.heard)}],
+            )
+            return
+        trace.add_usage(self._current_agent.name, result)
+        if self._barge_in is not None:
+            self._barge_in.record_reply(result.context_wrapper.usage.output_tokens, "".join(reply.text))
 
-        # Update the input history and current agent
-        self._input_history = result.to_input_list()
+        # Update the conversation memory and current agent
+        self._memory.add_turn(transcription, reply_items(result, "".join(reply.text)))
         self._current_agent = result.last_agent
@@ -0,0 +1,159 @@
+"""Prompt-cache-friendly agents and cached-token accounting.
+
+Provider-side prompt caching reuses the longest byte-identical prefix of a
+request (tools, then instructions, then input), so everything static about an
+agent has to come first and be rendered identically every time:
+
+* instructions are canonicalized when loaded (`registry.canonical_prompt`),
+* tools are sorted by name, so their schemas serialize in a fixed order,
+* dynamic content (conversation summary, recent turns, the new message) only
+  ever goes into the input, after the static part.
+
+`cache_friendly(name, agent)` applies this and versions the agent by a hash of
+its static prefix. The version is part of the `prompt_cache_key` sent with
+every request, so requests for the same agent and prompt version are routed
+to the same cache (by default the Agents SDK generates a fresh key per run).
+It also attaches hooks that record cached versus uncached input tokens of
+every model call in `prompt_cache_stats`, reported per agent on exit and on
+the telemetry `/metrics` endpoint.
+"""
+
+import dataclasses
+import hashlib
+import json
+import threading
+from dataclasses import dataclass
+from typing import Any
+
+from agents import Agent, AgentHooks, AgentOutputSchema
+from agents.items import ModelResponse
+
+from workflows.telemetry import telemetry
+
+_PREFIX = "vocal_coach"
+# Requests lighter than this are never cached by the provider
+CACHEABLE_MIN_TOKENS = 1024
+
+
+def static_prefix(agent: Agent) -> str:
+    """Canonical JSON of what stays the same across an agent's requests."""
+    output_type = agent.output_type
+    output_schema = AgentOutputSchema(output_type).json_schema() if output_type not in (None, str) else None
+    return json.dumps(
+        {
+            "tools": [
+                {
+                    "name": tool.name,
+                    "description": getattr(tool, "description", ""),
+                    "parameters": getattr(tool, "params_json_schema", None),
+                }
+                for tool in agent.tools
+            ],
+            "handoffs": [getattr(handoff, "name", None) for handoff in agent.handoffs],
+            "instructions": agent.instructions if isinstance(agent.instructions, str) else None,
+            "output": output_schema,
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+
+
+def prompt_version(agent: Agent) -> str:
+    return hashlib.sha256(static_prefix(agent).encode("utf-8")).hexdigest()[:12]
+
+
+@dataclass
+class _AgentCacheStats:
+    version: str = ""
+    calls: int = 0
+    input_tokens: int = 0
+    cached_tokens: int = 0
+    # Rough size of the static prefix, to tell whether it can be cached at all
+    prefix_tokens: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        return self.cached_tokens / self.input_tokens if self.input_tokens else 0.0
+
+
+class PromptCacheStats:
+    """Cached and uncached input tokens per agent, summed over model calls."""
+
+    def __init__(self) -> None:
+        self.agents: dict[str, _AgentCacheStats] = {}
+        self._lock = threading.Lock()
+        telemetry.stats.collectors.append(self.prometheus)
+
+    def register(self, name: str, version: str, prefix_tokens: int) -> None:
+        with self._lock:
+            entry = self.agents.setdefault(name, _AgentCacheStats())
+            entry.version, entry.prefix_tokens = version, prefix_tokens
+
+    def record(self, name: str, input_tokens: int, cached_tokens: int) -> None:
+        with self._lock:
+            entry = self.agents.setdefault(name, _AgentCacheStats())
+            entry.calls += 1
+            entry.input_tokens += input_tokens
+            entry.cached_tokens += cached_tokens
+
+    def report(self) -> str:
+        """One line per agent: version, calls, cached share of input tokens."""
+        lines = []
+        for name, entry in sorted(self.agents.items()):
+            if not entry.calls:
+                continue
+            note = " (static prefix below the cacheable minimum)" if (
+                entry.prefix_tokens < CACHEABLE_MIN_TOKENS
+            ) else ""
+            lines.append(
+                f"{name}@{entry.version}: {entry.calls} calls, {entry.cached_tokens}/"
+                f"{entry.input_tokens} input tokens cached ({entry.hit_ratio:.0%}){note}"
+            )
+        return "\n".join(lines) or "no model calls"
+
+    def __str__(self) -> str:
+        cached = sum(entry.cached_tokens for entry in self.agents.values())
+        total = sum(entry.input_tokens for entry in self.agents.values())
+        return f"prompt cache {cached}/{total} input tokens ({cached / total if total else 0.0:.0%})"
+
+    def prometheus(self) -> list[str]:
+        lines = [f"# TYPE {_PREFIX}_prompt_input_tokens_total counter"]
+        for name, entry in sorted(self.agents.items()):
+            labels = f'agent="{name}",version="{entry.version}"'
+            lines.append(
+                f'{_PREFIX}_prompt_input_tokens_total{{{labels},cached="true"}} {entry.cached_tokens}'
+            )
+            lines.append(
+                f'{_PREFIX}_prompt_input_tokens_total{{{labels},cached="false"}} '
+                f"{entry.input_tokens - entry.cached_tokens}"
+            )
+        return lines
+
+
+prompt_cache_stats = PromptCacheStats()
+
+
+class PromptCacheHooks(AgentHooks):
+    """Record the cached share of every model call's input tokens."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    async def on_llm_end(self, context: Any, agent: Agent, response: ModelResponse) -> None:
+        usage = response.usage
+        details = getattr(usage, "input_tokens_details", None)
+        prompt_cache_stats.record(self.name, usage.input_tokens, getattr(details, "cached_tokens", 0) or 0)
+
+
+def cache_friendly(name: str, agent: Agent) -> Agent:
+    """`agent` with a byte-stable static prefix, a versioned cache key and usage hooks."""
+    agent = agent.clone(tools=sorted(agent.tools, key=lambda tool: tool.name))
+    version = prompt_version(agent)
+    prompt_cache_stats.register(name, version, len(static_prefix(agent)) // 4)
+    extra_args = dict(agent.model_settings.extra_args or {})
+    extra_args["prompt_cache_key"] = f"vocal-coach:{name}:{version}"
+    return agent.clone(
+        model_settings=dataclasses.replace(agent.model_settings, extra_args=extra_args),
+        hooks=PromptCacheHooks(name),
+    )
@@ -0,0 +1,462 @@
+"""Deadlines, hedged requests, circuit breakers and degraded local answers.
+
+Every agent run goes through `resilience`:
+
+* **Deadlines** per stage (`STAGE_DEADLINES_S`): `triage` and `specialist`
+  runs, the `first_token` of a streamed reply, and memory `summary` calls. A
+  run past its deadline is cancelled and counts as a backend failure.
+* **Hedging**: a non-streamed run still going after its agent's recent p95
+  latency (`HEDGE_PERCENTILE`) gets a duplicate request. The first to finish
+  wins and the other is cancelled. A run that fails fast with a backend
+  error is hedged right away, which makes the hedge a retry.
+* **Circuit breakers** per model: `BREAKER_FAILURES` consecutive failures
+  (timeouts, connection errors, 429s and 5xx) open the breaker. Calls to that
+  model then fail at once, and `model_router` routes around it to another
+  tier. After `BREAKER_COOLDOWN_S` one probe request is let through, and its
+  outcome closes or re-opens the breaker.
+* **Degraded answers**: when no model can answer, `degraded(agent, message)`
+  builds a reply locally from the coaches' own tool logic (`match_keywords`,
+  `twister_suggestions`, `vocal_exercises`, `speaking_guidance`). Degraded
+  replies are never cached.
+
+Hedges fired and won, timeouts, failures, breaker states and degraded answers
+are counted in `resilience.stats` and exported on the telemetry `/metrics`
+endpoint.
+"""
+
+import asyncio
+import os
+import re
+import time
+from collections import Counter
+from collections.abc import AsyncIterator, Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any, TypeVar
+
+from openai import APIConnectionError, APIStatusError, RateLimitError
+
+from workflows.telemetry import Reservoir, telemetry
+
+# Seconds each stage may take; a stage missing here has no deadline
+STAGE_DEADLINES_S = os.getenv("STAGE_DEADLINES_S", "triage=8,specialist=30,first_token=10,summary=30")
+HEDGE = os.getenv("HEDGE", "1") == "1"
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "0.95"))
+# Until an agent has this many timed runs, hedge after HEDGE_DEFAULT_DELAY_S
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+HEDGE_DEFAULT_DELAY_S = float(os.getenv("HEDGE_DEFAULT_DELAY_S", "3"))
+HEDGE_MIN_DELAY_S = float(os.getenv("HEDGE_MIN_DELAY_S", "0.5"))
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", "5"))
+BREAKER_COOLDOWN_S = float(os.getenv("BREAKER_COOLDOWN_S", "30"))
+
+OFFLINE_NOTE = (
+    "(The coaching service is not responding right now, so this is a standard "
+    "answer prepared offline.)"
+)
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+_STATE_VALUES = {CLOSED: 0, OPEN: 1, HALF_OPEN: 2}
+_PREFIX = "vocal_coach"
+
+T = TypeVar("T")
+
+
+def parse_deadlines(spec: str) -> dict[str, float]:
+    """`"triage=8,specialist=30"` → `{"triage": 8.0, "specialist": 30.0}`."""
+    deadlines = {}
+    for part in spec.split(","):
+        stage, _, seconds = part.partition("=")
+        if stage.strip() and seconds.strip():
+            deadlines[stage.strip()] = float(seconds)
+    return deadlines
+
+
+class StageTimeout(TimeoutError):
+    """A stage ran past its deadline."""
+
+    def __init__(self, stage: str, deadline_s: float) -> None:
+        super().__init__(f"{stage} did not finish within {deadline_s:g}s")
+        self.stage = stage
+
+
+class CircuitOpen(Exception):
+    """The model's breaker is open; the request was not sent."""
+
+    def __init__(self, model: str) -> None:
+        super().__init__(f"circuit breaker for {model} is open")
+        self.model = model
+
+
+def is_backend_failure(exc: BaseException) -> bool:
+    """Errors that say the backend is unhealthy (worth a retry elsewhere or later)."""
+    if isinstance(exc, (RateLimitError, APIConnectionError, TimeoutError, CircuitOpen)):
+        return True
+    return isinstance(exc, APIStatusError) and exc.status_code >= 500
+
+
+# ---------------------------------------------------------------------------
+# Circuit breaker
+# ---------------------------------------------------------------------------
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker with a single half-open probe."""
+
+    def __init__(self, failures: int = BREAKER_FAILURES, cooldown_s: float = BREAKER_COOLDOWN_S) -> None:
+        self.max_failures = failures
+        self.cooldown_s = cooldown_s
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.opens = 0
+
+    def available(self) -> bool:
+        """Whether a request could go out now (without claiming the probe)."""
+        if self.state == OPEN:
+            return time.monotonic() - self.opened_at >= self.cooldown_s
+        return self.state == CLOSED
+
+    def allow(self) -> bool:
+        """Claim permission for one request."""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN and time.monotonic() - self.opened_at >= self.cooldown_s:
+            self.state = HALF_OPEN  # this request is the probe
+            return True
+        return False
+
+    def release(self) -> None:
+        """Give back an unanswered probe; the next request probes instead."""
+        if self.state == HALF_OPEN:
+            self.state = OPEN
+
+    def success(self) -> None:
+        self.state = CLOSED
+        self.failures = 0
+
+    def failure(self) -> None:
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.max_failures:
+            if self.state != OPEN:
+                self.opens += 1
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+
+
+# ---------------------------------------------------------------------------
+# Degraded answers
+# ---------------------------------------------------------------------------
+
+
+def _bullets(title: str, items: list[str]) -> str:
+    return f"{title}:\n" + "\n".join(f"- {item}" for item in items)
+
+
+def degraded_answer(agent_name: str, message: str) -> Any:
+    """A local stand-in for `agent_name`'s final output, without any model call."""
+    # Imported here: the coaches import workflows modules themselves
+    if agent_name == "triage_agent":
+        from custom_agents.triage_agent import AgentResponse, match_keywords
+
+        pick = match_keywords(message)
+        pick["reasoning"] += " (chosen by keyword: the triage model is unavailable)"
+        return AgentResponse(**pick)
+    if agent_name == "dialect_coach":
+        from custom_agents.dialect_coach import twister_suggestions
+        from data.twister_store import twister_store
+
+        words = set(re.findall(r"\w+", message.lower()))
+        language = next((lang for lang in twister_store.languages() if lang.lower() in words), "English")
+        tips = twister_suggestions(language, message)
+        if not tips["twisters"]:
+            return f"{OFFLINE_NOTE} {tips['reason']}"
+        return f"{OFFLINE_NOTE}\n\n{tips['reason']}\n\n" + "\n".join(f"- {t}" for t in tips["twisters"][:3])
+    if agent_name == "voice_coach":
+        from custom_agents.voice_coach import vocal_exercises
+
+        plan = vocal_exercises([message], [])
+        return "\n\n".join(
+            [
+                OFFLINE_NOTE,
+                _bullets("Warm up", plan["warm_ups"]),
+                _bullets("Exercises", plan["exercises"]),
+                _bullets("Look after your voice", plan["health_tips"]),
+                plan["progress_tracking"] + ".",
+            ]
+        )
+    if agent_name == "public_speaking_coach":
+        from custom_agents.public_speaking_coach import speaking_guidance
+
+        guide = speaking_guidance("presentation", [message])
+        return "\n\n".join(
+            [
+                OFFLINE_NOTE,
+                _bullets("Structure", guide["structure"]),
+                _bullets("Delivery", guide["body_language"]),
+                _bullets("Practice", guide["practice_exercises"]),
+            ]
+        )
+    return f"{OFFLINE_NOTE} Please try again in a minute."
+
+
+class DegradedResult:
+    """Stand-in for `RunResult` / `RunResultStreaming` holding a degraded answer."""
+
+    degraded = True
+    # Immutable, as it is shared by every instance
+    new_items: tuple = ()
+
+    def __init__(self, final_output: Any) -> None:
+        self.final_output = final_output
+
+    def cancel(self, mode: str = "immediate") -> None:
+        pass
+
+    async def stream_events(self):
+        return
+        yield
+
+
+# ---------------------------------------------------------------------------
+# Resilience layer
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class ResilienceStats:
+    hedges_fired: int = 0
+    hedges_won: int = 0
+    # stage → runs cut off at the deadline
+    timeouts: Counter = field(default_factory=Counter)
+    # model → backend failures
+    failures: Counter = field(default_factory=Counter)
+    short_circuited: int = 0  # requests refused by an open breaker
+    # agent → degraded answers served
+    degraded: Counter = field(default_factory=Counter)
+    # model → breaker state
+    breakers: dict[str, str] = field(default_factory=dict)
+
+    def __str__(self) -> str:
+        unhealthy = ", ".join(f"{model} {state}" for model, state in sorted(self.breakers.items()) if state != CLOSED)
+        return (
+            f"hedges {self.hedges_fired} fired / {self.hedges_won} won, "
+            f"timeouts {sum(self.timeouts.values())}, failures {sum(self.failures.values())}, "
+            f"degraded answers {sum(self.degraded.values())}, breakers {unhealthy or 'all closed'}"
+        )
+
+
+class Resilience:
+    """Deadlines, hedging and circuit breaking around agent runs."""
+
+    def __init__(
+        self,
+        deadlines: dict[str, float] | None = None,
+        hedge: bool = HEDGE,
+        breaker_failures: int = BREAKER_FAILURES,
+        breaker_cooldown_s: float = BREAKER_COOLDOWN_S,
+    ) -> None:
+        self.deadlines = parse_deadlines(STAGE_DEADLINES_S) if deadlines is None else deadlines
+        self.hedge = hedge
+        self.breaker_failures = breaker_failures
+        self.breaker_cooldown_s = breaker_cooldown_s
+        self.stats = ResilienceStats()
+        self._breakers: dict[str, CircuitBreaker] = {}
+        # agent → durations of successful runs, for the hedge delay
+        self._latency: dict[str, Reservoir] = {}
+        telemetry.stats.collectors.append(self.prometheus)
+
+    def reset(self) -> None:
+        """Forget breaker states, latencies and counters (e.g. between benchmark runs)."""
+        self.stats = ResilienceStats()
+        self._breakers.clear()
+        self._latency.clear()
+
+    # -------------------- breakers --------------------
+
+    def breaker(self, model: str) -> CircuitBreaker:
+        breaker = self._breakers.get(model)
+        if breaker is None:
+            breaker = self._breakers[model] = CircuitBreaker(self.breaker_failures, self.breaker_cooldown_s)
+            self.stats.breakers[model] = breaker.state
+        return breaker
+
+    def available(self, model: str) -> bool:
+        return self.breaker(model).available()
+
+    def _succeeded(self, model: str) -> None:
+        breaker = self.breaker(model)
+        breaker.success()
+        self.stats.breakers[model] = breaker.state
+
+    def _failed(self, model: str) -> None:
+        breaker = self.breaker(model)
+        breaker.failure()
+        self.stats.failures[model] += 1
+        self.stats.breakers[model] = breaker.state
+
+    # -------------------- hedging --------------------
+
+    def hedge_delay(self, agent_name: str) -> float:
+        reservoir = self._latency.get(agent_name)
+        if reservoir is None or reservoir.count < HEDGE_MIN_SAMPLES:
+            return HEDGE_DEFAULT_DELAY_S
+        return max(HEDGE_MIN_DELAY_S, reservoir.quantiles(HEDGE_PERCENTILE)[0])
+
+    async def _hedged(self, agent_name: str, attempt: Callable[[], Awaitable[T]], hedge: bool) -> T:
+        t0 = time.perf_counter()
+        delay = self.hedge_delay(agent_name)
+        first = asyncio.ensure_future(attempt())
+        pending = {first}
+        backup: asyncio.Future | None = None
+        error: BaseException | None = None
+        try:
+            while pending:
+                wait = None if backup is not None or not hedge else max(0.0, t0 + delay - time.perf_counter())
+                done, pending = await asyncio.wait(pending, timeout=wait, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is backup:
+                            self.stats.hedges_won += 1
+                        return task.result()
+                    error = task.exception()
+                # Slow past the agent's p95, or failed fast: send a duplicate
+                if hedge and backup is None and (not done or (not pending and is_backend_failure(error))):
+                    self.stats.hedges_fired += 1
+                    backup = asyncio.ensure_future(attempt())
+                    pending.add(backup)
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    # -------------------- runs --------------------
+
+    async def call(
+        self,
+        stage: str,
+        agent_name: str,
+        model: str,
+        attempt: Callable[[], Awaitable[T]],
+        hedge: bool = True,
+    ) -> T:
+        """Run `attempt()` (e.g. `Runner.run`) under the stage deadline, hedged and breaker-guarded."""
+        breaker = self.breaker(model)
+        allowed = breaker.allow()
+        self.stats.breakers[model] = breaker.state
+        if not allowed:
+            self.stats.short_circuited += 1
+            raise CircuitOpen(model)
+        deadline = self.deadlines.get(stage)
+        t0 = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(self._hedged(agent_name, attempt, hedge and self.hedge), deadline)
+        except asyncio.CancelledError:
+            # A cancelled probe (e.g. a discarded speculative run) proves nothing
+            breaker.release()
+            self.stats.breakers[model] = breaker.state
+            raise
+        except asyncio.TimeoutError:
+            self.stats.timeouts[stage] += 1
+            self._failed(model)
+            raise StageTimeout(stage, deadline) from None
+        except Exception as exc:
+            if is_backend_failure(exc):
+                self._failed(model)
+            raise
+        self._succeeded(model)
+        self._latency.setdefault(agent_name, Reservoir(256)).add(time.perf_counter() - t0)
+        return result
+
+    def guard_stream(self, agent_name: str, model: str, result: Any, message: str) -> "GuardedStream":
+        """Wrap a `RunResultStreaming` with the first-token deadline and degraded fallback."""
+        return GuardedStream(self, agent_name, model, result, message)
+
+    def degraded(self, agent_name: str, message: str) -> DegradedResult:
+        self.stats.degraded[agent_name] += 1
+        return DegradedResult(degraded_answer(agent_name, message))
+
+    def prometheus(self) -> list[str]:
+        lines = [
+            f"# TYPE {_PREFIX}_hedges_total counter",
+            f'{_PREFIX}_hedges_total{{outcome="fired"}} {self.stats.hedges_fired}',
+            f'{_PREFIX}_hedges_total{{outcome="won"}} {self.stats.hedges_won}',
+            f"# TYPE {_PREFIX}_stage_timeouts_total counter",
+        ]
+        for stage, n in sorted(self.stats.timeouts.items()):
+            lines.append(f'{_PREFIX}_stage_timeouts_total{{stage="{stage}"}} {n}')
+        lines.append(f"# TYPE {_PREFIX}_backend_failures_total counter")
+        for model, n in sorted(self.stats.failures.items()):
+            lines.append(f'{_PREFIX}_backend_failures_total{{model="{model}"}} {n}')
+        lines.append(f"# TYPE {_PREFIX}_degraded_answers_total counter")
+        for agent_name, n in sorted(self.stats.degraded.items()):
+            lines.append(f'{_PREFIX}_degraded_answers_total{{agent="{agent_name}"}} {n}')
+        # 0 closed, 1 open, 2 half-open
+        lines.append(f"# TYPE {_PREFIX}_circuit_state gauge")
+        for model, state in sorted(self.stats.breakers.items()):
+            lines.append(f'{_PREFIX}_circuit_state{{model="{model}"}} {_STATE_VALUES[state]}')
+        return lines
+
+
+class GuardedStream:
+    """A streamed run that falls back to a degraded answer if it fails before any text.
+
+    Everything but `stream_events`, `final_output` and `new_items` is delegated
+    to the wrapped `RunResultStreaming`. Once text has been streamed a failure
+    is raised as before, since part of the reply has already been shown.
+    """
+
+    def __init__(self, resilience: Resilience, agent_name: str, model: str, result: Any, message: str) -> None:
+        self._resilience = resilience
+        self._agent_name = agent_name
+        self._model = model
+        self._result = result
+        self._message = message
+        self.degraded = False
+        self._answer: Any = None
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._result, name)
+
+    @property
+    def final_output(self) -> Any:
+        return self._answer if self.degraded else self._result.final_output
+
+    @property
+    def new_items(self) -> list:
+        return [] if self.degraded else self._result.new_items
+
+    async def stream_events(self) -> AsyncIterator[Any]:
+        resilience = self._resilience
+        deadlines = resilience.deadlines
+        t0 = time.perf_counter()
+        events = self._result.stream_events().__aiter__()
+        streaming = False
+        try:
+            while True:
+                if streaming:
+                    stage, limit = "specialist", deadlines.get("specialist")
+                else:
+                    stage, limit = "first_token", deadlines.get("first_token")
+                timeout = None if limit is None else max(0.0, t0 + limit - time.perf_counter())
+                try:
+                    event = await asyncio.wait_for(events.__anext__(), timeout)
+                except StopAsyncIteration:
+                    break
+                except asyncio.TimeoutError:
+                    resilience.stats.timeouts[stage] += 1
+                    raise StageTimeout(stage, limit) from None
+                if getattr(getattr(event, "data", None), "type", "") == "response.output_text.delta":
+                    streaming = True
+                yield event
+        except Exception as exc:
+            if not is_backend_failure(exc):
+                raise
+            resilience._failed(self._model)
+            self._result.cancel()
+            if streaming:
+                raise
+            self.degraded = True
+            self._answer = resilience.degraded(self._agent_name, self._message).final_output
+            return
+        resilience._succeeded(self._model)
+
+
+resilience = Resilience()
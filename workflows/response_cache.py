@@ -0,0 +1,314 @@
+"""Response cache for triage and specialist runs.
+
+Entries are keyed on the normalised user input, the agent name, the model
+that produced the reply and a fingerprint of the agent's prompt YAML, so
+editing a prompt file invalidates that agent's entries automatically while
+each model tier keeps its own. A small in-memory LRU tier sits
+in front of an on-disk SQLite store; both honour a TTL and a size cap.
+Degraded answers (served while a backend is failing) are never stored.
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+from agents import Runner
+
+from custom_agents.registry import PROMPT_FILES
+from workflows.model_router import model_router
+from workflows.resilience import is_backend_failure, resilience
+
+CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH", "data/response_cache.sqlite")
+CACHE_TTL_S = float(os.getenv("RESPONSE_CACHE_TTL_S", str(7 * 24 * 3600)))
+CACHE_MEMORY_ENTRIES = int(os.getenv("RESPONSE_CACHE_MEMORY_ENTRIES", "256"))
+CACHE_DISK_ENTRIES = int(os.getenv("RESPONSE_CACHE_DISK_ENTRIES", "10000"))
+# Also match paraphrases that share the same set of content words
+CACHE_NEAR_DUPLICATES = os.getenv("RESPONSE_CACHE_NEAR_DUPLICATES", "1") == "1"
+
+_WORD_RE = re.compile(r"[\w']+")
+_STOPWORDS = frozenset(
+    "a an and are as at be can could do does for from how i i'm in is it me my "
+    "of on or please should so the to what when which with would you your".split()
+)
+_PURGE_EVERY = 100
+
+
+def normalize(text: str) -> str:
+    """Lower-case and drop punctuation / repeated whitespace."""
+    return " ".join(_WORD_RE.findall(text.lower()))
+
+
+def token_set(text: str) -> str:
+    """Order-insensitive content-word signature used for near-duplicate hits."""
+    return " ".join(sorted(set(_WORD_RE.findall(text.lower())) - _STOPWORDS))
+
+
+def _digest(*parts: str) -> str:
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    near_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+
+    def __str__(self) -> str:
+        lookups = self.hits + self.misses
+        return (
+            f"cache hits {self.hits}/{lookups} ({self.near_hits} near-duplicate), "
+            f"evictions {self.evictions}, invalidations {self.invalidations}"
+        )
+
+
+class PromptFingerprints:
+    """Hash of each agent's prompt file, recomputed only when the file changes."""
+
+    def __init__(self, prompt_files: dict[str, str] = PROMPT_FILES) -> None:
+        self.prompt_files = prompt_files
+        self._seen: dict[str, tuple[tuple[int, int], str]] = {}
+
+    def get(self, agent_name: str) -> str:
+        path = self.prompt_files.get(agent_name)
+        if path is None:
+            return _digest(agent_name)
+        st = os.stat(path)
+        stamp = (st.st_mtime_ns, st.st_size)
+        cached = self._seen.get(agent_name)
+        if cached is None or cached[0] != stamp:
+            with open(path, "rb") as fh:
+                cached = (stamp, hashlib.sha256(fh.read()).hexdigest())
+            self._seen[agent_name] = cached
+        return cached[1]
+
+
+class ResponseCache:
+    """Two-tier (memory LRU → SQLite) cache of final agent outputs."""
+
+    def __init__(
+        self,
+        path: str = CACHE_PATH,
+        ttl_s: float = CACHE_TTL_S,
+        memory_entries: int = CACHE_MEMORY_ENTRIES,
+        disk_entries: int = CACHE_DISK_ENTRIES,
+        near_duplicates: bool = CACHE_NEAR_DUPLICATES,
+    ) -> None:
+        self.path = path
+        self.ttl_s = ttl_s
+        self.memory_entries = memory_entries
+        self.disk_entries = disk_entries
+        self.near_duplicates = near_duplicates
+        self.fingerprints = PromptFingerprints()
+        self.stats = CacheStats()
+
+        # key -> (value, created, agent, near_key)
+        self._memory: OrderedDict[str, tuple[str, float, str, str]] = OrderedDict()
+        self._near: dict[str, str] = {}
+        self._current_fp: dict[str, str] = {}
+        self._puts = 0
+        self._db: sqlite3.Connection | None = None
+
+    # -------------------- storage --------------------
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.executescript(
+                """
+                PRAGMA journal_mode=WAL;
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    near_key TEXT,
+                    agent TEXT NOT NULL,
+                    fingerprint TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    created REAL NOT NULL,
+                    accessed REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS entries_near ON entries(near_key);
+                CREATE INDEX IF NOT EXISTS entries_accessed ON entries(accessed);
+                """
+            )
+        return self._db
+
+    def _keys(self, agent_name: str, text: str, model_name: str) -> tuple[str, str]:
+        # Only a prompt edit invalidates; each model tier keeps its own entries
+        fp = self.fingerprints.get(agent_name)
+        if self._current_fp.get(agent_name) not in (None, fp):
+            self._invalidate(agent_name, fp)
+        self._current_fp[agent_name] = fp
+        words = token_set(text)
+        return (
+            _digest(agent_name, fp, model_name, normalize(text)),
+            _digest(agent_name, fp, model_name, words) if words else "",
+        )
+
+    def _invalidate(self, agent_name: str, fingerprint: str) -> None:
+        """Drop entries written under an older version of the agent's prompt."""
+        self.stats.invalidations += 1
+        for key in [k for k, v in self._memory.items() if v[2] == agent_name]:
+            self._forget(key)
+        db = self._conn()
+        with db:
+            db.execute(
+                "DELETE FROM entries WHERE agent = ? AND fingerprint != ?",
+                (agent_name, fingerprint),
+            )
+
+    def _forget(self, key: str) -> None:
+        _, _, _, near_key = self._memory.pop(key)
+        if self._near.get(near_key) == key:
+            del self._near[near_key]
+
+    def _remember(self, key: str, near_key: str, agent_name: str, value: str, created: float) -> None:
+        self._memory[key] = (value, created, agent_name, near_key)
+        self._memory.move_to_end(key)
+        if near_key:
+            self._near[near_key] = key
+        while len(self._memory) > self.memory_entries:
+            self._forget(next(iter(self._memory)))
+            self.stats.evictions += 1
+
+    # -------------------- public API --------------------
+
+    def get(self, agent_name: str, text: str, model_name: str = "") -> str | None:
+        exact_key, near_key = self._keys(agent_name, text, model_name)
+        now = time.time()
+
+        key = exact_key
+        if self.near_duplicates and near_key and key not in self._memory:
+            key = self._near.get(near_key, key)
+        hit = self._memory.get(key)
+        if hit is not None:
+            if now - hit[1] <= self.ttl_s:
+                self._memory.move_to_end(key)
+                return self._hit(hit[0], key != exact_key)
+            self._forget(key)
+            self.stats.evictions += 1
+
+        db = self._conn()
+        row = db.execute(
+            "SELECT key, value, created FROM entries WHERE key = ?", (exact_key,)
+        ).fetchone()
+        if row is None and self.near_duplicates and near_key:
+            row = db.execute(
+                "SELECT key, value, created FROM entries WHERE near_key = ? "
+                "ORDER BY accessed DESC LIMIT 1",
+                (near_key,),
+            ).fetchone()
+        if row is not None and now - row[2] <= self.ttl_s:
+            with db:
+                db.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, row[0]))
+            self._remember(row[0], near_key, agent_name, row[1], row[2])
+            return self._hit(row[1], row[0] != exact_key)
+
+        self.stats.misses += 1
+        return None
+
+    def _hit(self, value: str, near: bool) -> str:
+        self.stats.hits += 1
+        self.stats.near_hits += near
+        return value
+
+    def put(self, agent_name: str, text: str, value: str, model_name: str = "") -> None:
+        key, near_key = self._keys(agent_name, text, model_name)
+        now = time.time()
+        self._remember(key, near_key, agent_name, value, now)
+
+        db = self._conn()
+        with db:
+            db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, near_key, agent_name, self._current_fp[agent_name], value, now, now),
+            )
+        self._puts += 1
+        if self._puts % _PURGE_EVERY == 0:
+            self.purge()
+
+    def purge(self) -> None:
+        """Apply TTL and size eviction to the disk tier."""
+        db = self._conn()
+        with db:
+            expired = db.execute(
+                "DELETE FROM entries WHERE created < ?", (time.time() - self.ttl_s,)
+            ).rowcount
+            overflow = db.execute(
+                "DELETE FROM entries WHERE key IN (SELECT key FROM entries "
+                "ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self.disk_entries,),
+            ).rowcount
+        self.stats.evictions += expired + overflow
+
+
+class CachedResult:
+    """Stand-in for `RunResult` / `RunResultStreaming` on a cache hit."""
+
+    def __init__(self, final_output: str) -> None:
+        self.final_output = final_output
+
+    def cancel(self, mode: str = "immediate") -> None:
+        pass
+
+    async def stream_events(self):
+        return
+        yield
+
+
+response_cache = ResponseCache()
+
+
+def answered_by(result: Any, agent: Any) -> str:
+    """Model that produced `result`, which is a higher tier than `agent`'s after an escalation."""
+    return getattr(getattr(result, "last_agent", None), "model", None) or agent.model
+
+
+async def run_cached(agent_name: str, agent: Any, message: str, degrade: bool = True) -> Any:
+    """`Runner.run` that serves and stores the final output via the cache.
+
+    Misses run through `model_router`, so an invalid reply is retried a tier up.
+    When every tier fails with a backend error, a degraded local answer is
+    returned instead (unless `degrade` is off, e.g. for batch jobs that retry).
+    """
+    cached = response_cache.get(agent_name, message, agent.model)
+    if cached is not None:
+        return CachedResult(cached)
+    try:
+        result = await model_router.run(agent_name, agent, message)
+    except Exception as exc:
+        if not degrade or not is_backend_failure(exc):
+            raise
+        return resilience.degraded(agent_name, message)
+    response_cache.put(agent_name, message, str(result.final_output), answered_by(result, agent))
+    return result
+
+
+def run_streamed_cached(
+    agent_name: str, agent: Any, message: str, history: list[Any] | None = None
+) -> Any:
+    """`Runner.run_streamed`, or a `CachedResult` when the reply is cached.
+
+    The caller stores the streamed reply with `response_cache.put` once done.
+    A run given `history` (earlier turns ending with `message`) is never served
+    from the cache, since its reply depends on more than the message. The stream
+    is guarded by `resilience`: with the model's breaker open, or no first
+    token before the deadline, it yields a degraded answer (`degraded` is set).
+    """
+    if not history:
+        cached = response_cache.get(agent_name, message, agent.model)
+        if cached is not None:
+            return CachedResult(cached)
+    if not resilience.available(agent.model):
+        resilience.stats.short_circuited += 1
+        return resilience.degraded(agent_name, message)
+    model_router.served(agent_name, agent.model)
+    return resilience.guard_stream(
+        agent_name, agent.model, Runner.run_streamed(agent, history or message), message
+    )
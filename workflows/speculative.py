@@ -0,0 +1,147 @@
+"""Speculative triage: start the likely specialist(s) while triage is still running.
+
+When the local classifier is confident the specialist is started directly.
+Otherwise the top-k guesses (bounded by a budget) are launched concurrently
+with the LLM triage call; the run triage confirms is kept and the rest are
+cancelled.
+
+Each run is started on the model tier `model_router` picks. Guesses start on
+the fastest tier; if triage then comes back with low confidence, the confirmed
+guess is replaced by a run one tier up.
+"""
+
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Generic, TypeVar
+
+from custom_agents.fast_triage import FastTriage, fast_triage
+from custom_agents.triage_agent import AgentResponse
+from workflows.model_router import ModelRouter, model_router
+
+# Speculative specialist runs per turn (0 disables speculation).
+SPECULATIVE_BUDGET = int(os.getenv("SPECULATIVE_BUDGET", "1"))
+# Cap on speculative runs in flight across all concurrent turns.
+SPECULATIVE_MAX_IN_FLIGHT = int(os.getenv("SPECULATIVE_MAX_IN_FLIGHT", "8"))
+# Guesses below this probability are not worth a speculative run.
+SPECULATIVE_MIN_PROB = float(os.getenv("SPECULATIVE_MIN_PROB", "0.2"))
+
+H = TypeVar("H")
+
+
+def _cancel_task(handle: Any) -> None:
+    handle.cancel()
+
+
+@dataclass
+class SpeculationStats:
+    turns: int = 0
+    launched: int = 0
+    hits: int = 0
+    misses: int = 0
+    cancelled: int = 0
+    saved_s: float = 0.0
+    wasted_s: float = 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"speculation hits {self.hits}/{self.hits + self.misses}, "
+            f"saved {self.saved_s:.2f}s, wasted {self.wasted_s:.2f}s "
+            f"over {self.cancelled} cancelled runs"
+        )
+
+
+@dataclass
+class SpeculativeTurn(Generic[H]):
+    triage: AgentResponse
+    handle: H
+    triage_duration: float
+    speculated: bool
+    tier: int = 0
+
+
+class SpeculativeRouter:
+    """Run triage and the most likely specialist(s) concurrently.
+
+    `start(agent_key, tier)` must begin a specialist run on that model tier and
+    return a handle (an `asyncio.Task`, a `RunResultStreaming`, ...);
+    `cancel(handle)` stops it. `follow_up` marks a message that re-asks or
+    asks about the last reply, which starts one tier up.
+    """
+
+    def __init__(
+        self,
+        classifier: FastTriage = fast_triage,
+        budget: int = SPECULATIVE_BUDGET,
+        max_in_flight: int = SPECULATIVE_MAX_IN_FLIGHT,
+        min_prob: float = SPECULATIVE_MIN_PROB,
+        models: ModelRouter = model_router,
+    ) -> None:
+        self.classifier = classifier
+        self.models = models
+        self.budget = budget
+        self.max_in_flight = max_in_flight
+        self.min_prob = min_prob
+        self.stats = SpeculationStats()
+        self._in_flight = 0
+
+    async def run(
+        self,
+        message: str,
+        start: Callable[[str, int], H],
+        cancel: Callable[[H], None] = _cancel_task,
+        follow_up: bool = False,
+    ) -> SpeculativeTurn[H]:
+        self.stats.turns += 1
+        t0 = time.perf_counter()
+
+        ranked = self.classifier.rank(message)
+        agent_key, confidence = ranked[0]
+        if confidence >= self.classifier.threshold:
+            self.classifier.stats.fast_hits += 1
+            triage = self.classifier.classify(message)
+            tier = self.models.select(agent_key, triage.confidence, follow_up)
+            return SpeculativeTurn(triage, start(agent_key, tier), time.perf_counter() - t0, False, tier)
+
+        slots = max(0, min(self.budget, self.max_in_flight - self._in_flight))
+        guesses = [key for key, prob in ranked[:slots] if prob >= self.min_prob]
+        # Guesses may be cancelled, so only a follow-up escalates them up front
+        guess_tiers = {key: self.models.tier_for(key, follow_up=follow_up)[0] for key in guesses}
+        started = {key: (start(key, guess_tiers[key]), time.perf_counter()) for key in guesses}
+        self._in_flight += len(started)
+        self.stats.launched += len(started)
+
+        try:
+            self.classifier.stats.llm_fallbacks += 1
+            triage = await self.classifier.llm_triage(message)
+        except BaseException:
+            for handle, _ in started.values():
+                cancel(handle)
+            raise
+        finally:
+            self._in_flight -= len(started)
+        triage_duration = time.perf_counter() - t0
+
+        selected = triage.selected_agent
+        tier = self.models.select(selected, triage.confidence, follow_up)
+        keep = started.pop(selected, None)
+        if keep is not None and guess_tiers[selected] < tier:
+            # Triage was unsure: the fast-tier guess is replaced by a stronger model
+            started[selected], keep = keep, None
+        now = time.perf_counter()
+        for handle, began in started.values():
+            cancel(handle)
+            self.stats.cancelled += 1
+            self.stats.wasted_s += now - began
+
+        if keep is not None:
+            self.stats.hits += 1
+            self.stats.saved_s += now - keep[1]
+            return SpeculativeTurn(triage, keep[0], triage_duration, True, tier)
+
+        if guesses and selected not in guesses:
+            self.stats.misses += 1
+        return SpeculativeTurn(triage, start(selected, tier), triage_duration, False, tier)
+
+
+speculative_router = SpeculativeRouter()
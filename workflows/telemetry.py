@@ -0,0 +1,338 @@
+"""Per-turn latency tracing and metrics export.
+
+A turn (one user message, typed or spoken) is opened with `telemetry.turn()`
+or `telemetry.start_turn()`. Spans inside it (triage, specialist, tool calls,
+time to first token, TTS, playback) are timed with `telemetry.span(...)` or
+`Turn.record(...)`. The current turn lives in a context variable, so agent
+runs and tools started from the turn's task are attributed to it.
+
+Each stage's durations go into a fixed-size reservoir for p50/p99. When a turn
+ends it is written as one JSON line (if `TELEMETRY_JSONL` is set). Stage
+summaries and counters are served in Prometheus text format on
+`TELEMETRY_PROMETHEUS_PORT`. Only a `TELEMETRY_SAMPLE_RATE` fraction of turns
+is traced; the rest get a no-op turn, so the overhead under heavy traffic is a
+random draw and a counter increment.
+"""
+
+import contextvars
+import functools
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import MappingProxyType
+from typing import Any, Callable, Iterator, Mapping
+
+import numpy as np
+
+TELEMETRY_SAMPLE_RATE = float(os.getenv("TELEMETRY_SAMPLE_RATE", "1"))
+TELEMETRY_JSONL = os.getenv("TELEMETRY_JSONL", "")
+TELEMETRY_PROMETHEUS_PORT = int(os.getenv("TELEMETRY_PROMETHEUS_PORT", "0"))
+TELEMETRY_RESERVOIR = int(os.getenv("TELEMETRY_RESERVOIR", "2048"))
+
+_PREFIX = "vocal_coach"
+
+
+class Reservoir:
+    """The most recent `size` durations of one stage, plus running totals."""
+
+    def __init__(self, size: int) -> None:
+        self._values = np.zeros(size)
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, seconds: float) -> None:
+        self._values[self.count % len(self._values)] = seconds
+        self.count += 1
+        self.total += seconds
+
+    def quantiles(self, *qs: float) -> list[float]:
+        recent = self._values[: min(self.count, len(self._values))]
+        if not len(recent):
+            return [0.0 for _ in qs]
+        return [float(v) for v in np.quantile(recent, qs)]
+
+
+class LatencyStats:
+    """Per-stage reservoirs and counters shared by every turn."""
+
+    def __init__(self, reservoir: int = TELEMETRY_RESERVOIR) -> None:
+        self._reservoir = reservoir
+        self._lock = threading.Lock()
+        self.stages: dict[str, Reservoir] = {}
+        self.turns: dict[tuple[str, bool], int] = defaultdict(int)
+        self.agents: dict[str, int] = defaultdict(int)
+        self.tokens: dict[tuple[str, str], int] = defaultdict(int)
+        # Other components' metrics, rendered as Prometheus text lines
+        self.collectors: list[Callable[[], list[str]]] = []
+
+    def observe(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            reservoir = self.stages.get(stage)
+            if reservoir is None:
+                reservoir = self.stages[stage] = Reservoir(self._reservoir)
+            reservoir.add(seconds)
+
+    def count_turn(self, entry_point: str, sampled: bool) -> None:
+        with self._lock:
+            self.turns[entry_point, sampled] += 1
+
+    def count_agent(self, agent: str) -> None:
+        with self._lock:
+            self.agents[agent] += 1
+
+    def count_tokens(self, agent: str, input_tokens: int, output_tokens: int) -> None:
+        with self._lock:
+            self.tokens[agent, "input"] += input_tokens
+            self.tokens[agent, "output"] += output_tokens
+
+    def prometheus(self) -> str:
+        """Render every metric in Prometheus text exposition format."""
+        lines = [
+            f"# HELP {_PREFIX}_stage_seconds Latency of each stage of sampled turns.",
+            f"# TYPE {_PREFIX}_stage_seconds summary",
+        ]
+        with self._lock:
+            for stage, reservoir in sorted(self.stages.items()):
+                p50, p99 = reservoir.quantiles(0.5, 0.99)
+                label = f'stage="{stage}"'
+                lines.append(f'{_PREFIX}_stage_seconds{{{label},quantile="0.5"}} {p50:.6f}')
+                lines.append(f'{_PREFIX}_stage_seconds{{{label},quantile="0.99"}} {p99:.6f}')
+                lines.append(f"{_PREFIX}_stage_seconds_sum{{{label}}} {reservoir.total:.6f}")
+                lines.append(f"{_PREFIX}_stage_seconds_count{{{label}}} {reservoir.count}")
+            lines.append(f"# TYPE {_PREFIX}_turns_total counter")
+            for (entry_point, sampled), n in sorted(self.turns.items()):
+                sampled_label = str(sampled).lower()
+                lines.append(f'{_PREFIX}_turns_total{{entry_point="{entry_point}",sampled="{sampled_label}"}} {n}')
+            lines.append(f"# TYPE {_PREFIX}_agent_selected_total counter")
+            for agent, n in sorted(self.agents.items()):
+                lines.append(f'{_PREFIX}_agent_selected_total{{agent="{agent}"}} {n}')
+            lines.append(f"# TYPE {_PREFIX}_tokens_total counter")
+            for (agent, kind), n in sorted(self.tokens.items()):
+                lines.append(f'{_PREFIX}_tokens_total{{agent="{agent}",kind="{kind}"}} {n}')
+        for collect in self.collectors:
+            lines.extend(collect())
+        return "\n".join(lines) + "\n"
+
+    def __str__(self) -> str:
+        with self._lock:
+            parts = []
+            for stage, reservoir in sorted(self.stages.items()):
+                p50, p99 = reservoir.quantiles(0.5, 0.99)
+                parts.append(f"{stage} p50 {p50 * 1000:.0f} ms / p99 {p99 * 1000:.0f} ms")
+        return "; ".join(parts) if parts else "no sampled turns yet"
+
+
+class Turn:
+    """Spans and attributes of one sampled turn."""
+
+    sampled = True
+
+    def __init__(self, telemetry: "Telemetry", entry_point: str, **attrs: Any) -> None:
+        self._telemetry = telemetry
+        self.id = uuid.uuid4().hex[:12]
+        self.entry_point = entry_point
+        self.attrs: dict[str, Any] = dict(attrs)
+        self.spans: list[dict[str, Any]] = []
+        self.marks: dict[str, float] = {}
+        self.started_wall = time.time()
+        self.started = time.perf_counter()
+        self.ended = False
+
+    def record(self, name: str, seconds: float, started: float | None = None, **attrs: Any) -> None:
+        """Add a finished span (`started` is a `perf_counter` value, default: now - seconds)."""
+        if self.ended:
+            return
+        begin = (started if started is not None else time.perf_counter() - seconds) - self.started
+        span = {"name": name, "start_ms": round(begin * 1000, 2), "duration_ms": round(seconds * 1000, 2)}
+        if attrs:
+            span["attrs"] = attrs
+        self.spans.append(span)
+        self._telemetry.stats.observe(name, seconds)
+
+    @contextmanager
+    def span(self, name: str, **attrs: Any) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - t0, t0, **attrs)
+
+    def mark(self, name: str, record: bool = True) -> None:
+        """Note a point in time once (e.g. first token), optionally as a span from turn start."""
+        if name in self.marks:
+            return
+        now = self.marks[name] = time.perf_counter()
+        if record:
+            self.record(name, now - self.started, self.started)
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+        if "agent" in attrs:
+            self._telemetry.stats.count_agent(attrs["agent"])
+
+    def add_usage(self, agent: str, result: Any) -> None:
+        """Record token counts from a run result (cached results have none)."""
+        usage = getattr(getattr(result, "context_wrapper", None), "usage", None)
+        if usage is None:
+            return
+        tokens = self.attrs.setdefault("tokens", {})
+        entry = tokens.setdefault(agent, {"input": 0, "cached": 0, "output": 0, "requests": 0})
+        entry["input"] += usage.input_tokens
+        entry["cached"] += getattr(usage.input_tokens_details, "cached_tokens", 0) or 0
+        entry["output"] += usage.output_tokens
+        entry["requests"] += usage.requests
+        self._telemetry.stats.count_tokens(agent, usage.input_tokens, usage.output_tokens)
+
+    def end(self) -> None:
+        if self.ended:
+            return
+        self.record("turn", time.perf_counter() - self.started, self.started)
+        self.ended = True
+        self._telemetry._finish(self)
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "turn_id": self.id,
+            "entry_point": self.entry_point,
+            "start": round(self.started_wall, 3),
+            "attrs": self.attrs,
+            "spans": self.spans,
+        }
+
+
+class _UnsampledTurn:
+    """Stand-in for turns skipped by sampling: every call is a no-op."""
+
+    sampled = False
+    # Read-only, so nothing written here leaks into other unsampled turns
+    marks: Mapping[str, float] = MappingProxyType({})
+
+    def record(self, *args: Any, **kwargs: Any) -> None:
+        pass
+
+    @contextmanager
+    def span(self, name: str, **attrs: Any) -> Iterator[None]:
+        yield
+
+    def mark(self, name: str, record: bool = True) -> None:
+        pass
+
+    def set(self, **attrs: Any) -> None:
+        pass
+
+    def add_usage(self, agent: str, result: Any) -> None:
+        pass
+
+    def end(self) -> None:
+        pass
+
+
+_UNSAMPLED = _UnsampledTurn()
+_current: contextvars.ContextVar[Any] = contextvars.ContextVar("telemetry_turn", default=_UNSAMPLED)
+
+
+class Telemetry:
+    """Turn factory, sampling decision and exporters."""
+
+    def __init__(
+        self,
+        sample_rate: float = TELEMETRY_SAMPLE_RATE,
+        jsonl_path: str = TELEMETRY_JSONL,
+        prometheus_port: int = TELEMETRY_PROMETHEUS_PORT,
+    ) -> None:
+        self.sample_rate = sample_rate
+        self.jsonl_path = jsonl_path
+        self.prometheus_port = prometheus_port
+        self.stats = LatencyStats()
+        self._sink_lock = threading.Lock()
+        self._server: ThreadingHTTPServer | None = None
+
+    # -------------------- turns and spans --------------------
+
+    def start_turn(self, entry_point: str, sample: bool | None = None, **attrs: Any) -> Turn | _UnsampledTurn:
+        """Open a turn and make it current for this task (and tasks it starts).
+
+        `sample` forces (or skips) tracing regardless of the sample rate.
+        """
+        if sample is None:
+            sample = self.sample_rate >= 1.0 or random.random() < self.sample_rate
+        self.stats.count_turn(entry_point, sample)
+        turn = Turn(self, entry_point, **attrs) if sample else _UNSAMPLED
+        _current.set(turn)
+        return turn
+
+    @contextmanager
+    def turn(self, entry_point: str, sample: bool | None = None, **attrs: Any) -> Iterator[Turn | _UnsampledTurn]:
+        turn = self.start_turn(entry_point, sample, **attrs)
+        try:
+            yield turn
+        finally:
+            turn.end()
+
+    def current(self) -> Turn | _UnsampledTurn:
+        return _current.get()
+
+    def span(self, name: str, **attrs: Any):
+        """Time a block as a span of the current turn (no-op outside a sampled turn)."""
+        return _current.get().span(name, **attrs)
+
+    def _finish(self, turn: Turn) -> None:
+        if _current.get() is turn:
+            _current.set(_UNSAMPLED)
+        if not self.jsonl_path:
+            return
+        line = json.dumps(turn.to_json(), default=str) + "\n"
+        with self._sink_lock, open(self.jsonl_path, "a", encoding="utf-8") as fh:
+            fh.write(line)
+
+    # -------------------- exporters --------------------
+
+    def start_exporters(self) -> None:
+        """Serve `/metrics` for Prometheus when a port is configured (idempotent)."""
+        if self._server is not None or not self.prometheus_port:
+            return
+        stats = self.stats
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args: Any) -> None:
+                pass
+
+            def do_GET(self) -> None:
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = stats.prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._server = ThreadingHTTPServer(("0.0.0.0", self.prometheus_port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+
+def traced_tool(func: Callable[..., Any]) -> Callable[..., Any]:
+    """Record a function tool's execution as a `tool:<name>` span of the current turn.
+
+    Apply below `@function_tool`; the wrapper keeps the signature and docstring
+    the tool schema is generated from.
+    """
+    name = f"tool:{func.__name__}"
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        with _current.get().span(name):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+telemetry = Telemetry()